@@ -67,7 +67,8 @@ class GroupHashesEndpoint(GroupEndpoint):
         return Response(status=202)
 
     def __handle_results(self, project_id, group_id, user, results):
-        return [self.__handle_result(user, project_id, group_id, result) for result in results]
+        with eventstore.prefetch_nodes([(project_id, result["event_id"]) for result in results]):
+            return [self.__handle_result(user, project_id, group_id, result) for result in results]
 
     def __handle_result(self, user, project_id, group_id, result):
         event = eventstore.get_event_by_id(project_id, result["event_id"])
@@ -246,22 +246,26 @@ class OrganizationEventsSpansExamplesEndpoint(OrganizationEventsSpansEndpointBas
                 max_exclusive_time,
             )
 
-            return [
-                {
-                    "op": span.op,
-                    "group": span.group,
-                    "examples": [
-                        get_example_transaction(
-                            event,
-                            span.op,
-                            span.group,
-                            min_exclusive_time,
-                            max_exclusive_time,
-                        ).serialize()
-                        for event in example_transactions.get(span, [])
-                    ],
-                }
-            ]
+            events = example_transactions.get(span, [])
+            with eventstore.prefetch_nodes(
+                [(event.project_id, event.event_id) for event in events]
+            ):
+                return [
+                    {
+                        "op": span.op,
+                        "group": span.group,
+                        "examples": [
+                            get_example_transaction(
+                                event,
+                                span.op,
+                                span.group,
+                                min_exclusive_time,
+                                max_exclusive_time,
+                            ).serialize()
+                            for event in events
+                        ],
+                    }
+                ]
 
         with self.handle_query_errors():
             return self.paginate(
@@ -551,26 +555,29 @@ def query_suspect_span_groups(
     snql_query = builder.get_snql_query()
     results = raw_snql_query(snql_query, "api.organization-events-spans-performance-suspects")
 
-    return [
-        SuspectSpan(
-            op=suspect["array_join_spans_op"],
-            group=suspect["array_join_spans_group"],
-            description=get_span_description(
-                EventID(params["project_id"][0], suspect["any_id"]),
-                span_op=suspect["array_join_spans_op"],
-                span_group=suspect["array_join_spans_group"],
-            ),
-            frequency=suspect.get("count_unique_id"),
-            count=suspect.get("count"),
-            avg_occurrences=suspect.get("equation[0]"),
-            sum_exclusive_time=suspect.get("sumArray_spans_exclusive_time"),
-            p50_exclusive_time=suspect.get("percentileArray_spans_exclusive_time_0_50"),
-            p75_exclusive_time=suspect.get("percentileArray_spans_exclusive_time_0_75"),
-            p95_exclusive_time=suspect.get("percentileArray_spans_exclusive_time_0_95"),
-            p99_exclusive_time=suspect.get("percentileArray_spans_exclusive_time_0_99"),
-        )
-        for suspect in results["data"]
-    ]
+    with eventstore.prefetch_nodes(
+        [(params["project_id"][0], suspect["any_id"]) for suspect in results["data"]]
+    ):
+        return [
+            SuspectSpan(
+                op=suspect["array_join_spans_op"],
+                group=suspect["array_join_spans_group"],
+                description=get_span_description(
+                    EventID(params["project_id"][0], suspect["any_id"]),
+                    span_op=suspect["array_join_spans_op"],
+                    span_group=suspect["array_join_spans_group"],
+                ),
+                frequency=suspect.get("count_unique_id"),
+                count=suspect.get("count"),
+                avg_occurrences=suspect.get("equation[0]"),
+                sum_exclusive_time=suspect.get("sumArray_spans_exclusive_time"),
+                p50_exclusive_time=suspect.get("percentileArray_spans_exclusive_time_0_50"),
+                p75_exclusive_time=suspect.get("percentileArray_spans_exclusive_time_0_75"),
+                p95_exclusive_time=suspect.get("percentileArray_spans_exclusive_time_0_95"),
+                p99_exclusive_time=suspect.get("percentileArray_spans_exclusive_time_0_99"),
+            )
+            for suspect in results["data"]
+        ]
 
 
 class SpanQueryBuilder(QueryBuilder):  # type: ignore
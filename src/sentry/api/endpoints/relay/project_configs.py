@@ -1,6 +1,5 @@
 import logging
 import random
-from typing import Optional
 
 from django.conf import settings
 from rest_framework.request import Request
@@ -12,7 +11,7 @@ from sentry.api.base import Endpoint, region_silo_endpoint
 from sentry.api.permissions import RelayPermission
 from sentry.models import Organization, OrganizationOption, Project, ProjectKey, ProjectKeyStatus
 from sentry.relay import config, projectconfig_cache
-from sentry.tasks.relay import schedule_build_project_config
+from sentry.tasks.relay import schedule_build_project_configs
 from sentry.utils import metrics
 
 logger = logging.getLogger(__name__)
@@ -114,33 +113,23 @@ class RelayProjectConfigsEndpoint(Endpoint):
 
         proj_configs = {}
         pending = []
-        for key in public_keys:
-            computed = self._get_cached_or_schedule(key)
+        for key, computed in projectconfig_cache.get_many(public_keys).items():
             if not computed:
                 pending.append(key)
             else:
                 proj_configs[key] = computed
 
+        # Configs missing from the cache are computed by a task, debouncing
+        # happens after the tasks have been scheduled.
+        if pending:
+            schedule_build_project_configs(public_keys=pending)
+
         metrics.incr("relay.project_configs.post_v3.pending", amount=len(pending))
         metrics.incr("relay.project_configs.post_v3.fetched", amount=len(proj_configs))
         res = {"configs": proj_configs, "pending": pending}
 
         return Response(res, status=200)
 
-    def _get_cached_or_schedule(self, public_key) -> Optional[dict]:
-        """
-        Returns the config of a project if it's in the cache; else, schedules a
-        task to compute and write it into the cache.
-
-        Debouncing of the project happens after the task has been scheduled.
-        """
-        cached_config = projectconfig_cache.get(public_key)
-        if cached_config:
-            return cached_config
-
-        schedule_build_project_config(public_key=public_key)
-        return None
-
     def _post_by_key(self, request: Request, full_config_requested):
         public_keys = request.relay_request_data.get("publicKeys")
         public_keys = set(public_keys or ())
@@ -1,6 +1,9 @@
 import logging
+from collections import defaultdict
 
+from django.db import connections, router
 from django.db.models import F
+from django.db.models.signals import post_save
 
 from sentry.signals import buffer_incr_complete
 from sentry.tasks.process_buffer import process_incr
@@ -28,7 +31,7 @@ class Buffer(Service, metaclass=BufferMount):
     keep up with the updates.
     """
 
-    __all__ = ("get", "incr", "process", "process_pending", "validate")
+    __all__ = ("get", "incr", "process", "process_batch", "process_pending", "validate")
 
     def get(self, model, columns, filters):
         """
@@ -102,3 +105,100 @@ class Buffer(Service, metaclass=BufferMount):
             created=created,
             sender=model,
         )
+
+    def process_batch(self, batch):
+        """
+        Applies a list of ``(model, columns, filters, extra, signal_only)``
+        buffered increments.
+
+        Increments that target a single row by primary key are written with
+        one ``UPDATE ... FROM (VALUES ...)`` statement per model and column
+        set. Everything else (signal only increments, rows that may need to be
+        created) goes through ``process`` one at a time.
+        """
+        bulk = defaultdict(list)
+        for model, columns, filters, extra, signal_only in batch:
+            if signal_only or len(filters) != 1 or not ({"id", "pk"} & filters.keys()):
+                # Subclasses such as ``RedisBuffer`` override ``process`` with
+                # a different signature, so use the model level one directly.
+                Buffer.process(self, model, columns, filters, extra, signal_only)
+                continue
+            (pk,) = filters.values()
+            shape = (model, tuple(sorted(columns)), tuple(sorted(extra or ())))
+            bulk[shape].append((pk, columns, filters, extra))
+
+        for (model, column_names, extra_names), rows in bulk.items():
+            self._bulk_update(model, column_names, extra_names, rows)
+
+    def _bulk_update(self, model, column_names, extra_names, rows):
+        from sentry.models import Group
+
+        using = router.db_for_write(model)
+        connection = connections[using]
+        qn = connection.ops.quote_name
+        opts = model._meta
+
+        fields = [opts.pk] + [opts.get_field(name) for name in column_names + extra_names]
+        aliases = ["pk"] + [f"c{i}" for i in range(len(fields) - 1)]
+        incr_aliases = aliases[1 : len(column_names) + 1]
+
+        assignments = [
+            f"{qn(field.column)} = COALESCE(t.{qn(field.column)}, 0) + v.{alias}"
+            for field, alias in zip(fields[1 : len(column_names) + 1], incr_aliases)
+        ] + [
+            f"{qn(field.column)} = v.{alias}"
+            for field, alias in zip(
+                fields[len(column_names) + 1 :], aliases[len(column_names) + 1 :]
+            )
+        ]
+
+        # HACK(dcramer): see ``process`` for why ``score`` is special cased.
+        if model is Group and "times_seen" in column_names and "last_seen" in extra_names:
+            times_seen = aliases[fields.index(opts.get_field("times_seen"))]
+            last_seen = aliases[fields.index(opts.get_field("last_seen"))]
+            assignments.append(
+                f"score = log(t.times_seen + v.{times_seen}) * 600"
+                f" + floor(extract(epoch from v.{last_seen}))::int"
+            )
+
+        placeholder = "({})".format(
+            ", ".join(f"%s::{field.cast_db_type(connection)}" for field in fields)
+        )
+        params = []
+        for pk, columns, _, extra in rows:
+            values = [pk] + [columns[name] for name in column_names]
+            values += [extra[name] for name in extra_names]
+            params.extend(
+                field.get_db_prep_save(value, connection) for field, value in zip(fields, values)
+            )
+
+        sql = (
+            "UPDATE {table} AS t SET {assignments} "
+            "FROM (VALUES {values}) AS v({aliases}) "
+            "WHERE t.{pk} = v.pk"
+        ).format(
+            table=qn(opts.db_table),
+            assignments=", ".join(assignments),
+            values=", ".join([placeholder] * len(rows)),
+            aliases=", ".join(aliases),
+            pk=qn(opts.pk.column),
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+
+        # XXX: ``Group`` is updated through ``update`` in ``process`` so that
+        # ``post_save`` refreshes the cache. Do the same here, with one query
+        # for the whole batch.
+        if model is Group:
+            for group in Group.objects.filter(id__in=[pk for pk, _, _, _ in rows]):
+                post_save.send(sender=Group, instance=group, created=False)
+
+        for _, columns, filters, extra in rows:
+            buffer_incr_complete.send_robust(
+                model=model,
+                columns=columns,
+                filters=filters,
+                extra=extra,
+                created=False,
+                sender=model,
+            )
@@ -1,8 +1,13 @@
+import atexit
+import logging
+import os
 import pickle
 import threading
-from datetime import datetime
+from collections import defaultdict
+from datetime import datetime, timedelta
 from time import time
 
+from celery.signals import worker_process_shutdown
 from django.db import models
 from django.utils import timezone
 from django.utils.encoding import force_bytes, force_text
@@ -16,9 +21,17 @@ from sentry.utils.hashlib import md5_text
 from sentry.utils.imports import import_string
 from sentry.utils.redis import get_cluster_from_options
 
+logger = logging.getLogger(__name__)
+
 _local_buffers = None
 _local_buffers_lock = threading.Lock()
 
+# Buffer fields written by the compact codec start with this version byte. It
+# can't be confused with the legacy JSON (``{`` or ``[``) or pickle (``\x80``
+# or a protocol 0 opcode) encodings, which lets both be read side by side.
+CODEC_VERSION = b"\x01"
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
 
 class PendingBuffer:
     def __init__(self, size):
@@ -47,17 +60,219 @@ class PendingBuffer:
         return rv
 
 
+class CoalescedIncr:
+    """
+    An in-process accumulator for all ``incr`` calls targeting the same
+    buffer key. Counters are summed, extra values are last write wins and
+    ``signal_only`` is sticky once set, mirroring what the Redis hash would
+    look like had every call been written through individually.
+    """
+
+    __slots__ = ("model", "filters", "columns", "extra", "signal_only", "calls")
+
+    def __init__(self, model, filters):
+        self.model = model
+        self.filters = filters
+        self.columns = defaultdict(int)
+        self.extra = {}
+        self.signal_only = False
+        self.calls = 0
+
+    def merge(self, columns, extra=None, signal_only=None):
+        for column, amount in columns.items():
+            self.columns[column] += amount
+        if extra:
+            self.extra.update(extra)
+        if signal_only is True:
+            self.signal_only = True
+        self.calls += 1
+
+    def update(self, other):
+        """
+        Merges the increments of a more recent ``other`` entry into this one.
+        """
+        for column, amount in other.columns.items():
+            self.columns[column] += amount
+        self.extra.update(other.extra)
+        self.signal_only = self.signal_only or other.signal_only
+        self.calls += other.calls
+
+
+class CoalescingBuffer:
+    """
+    Merges ``RedisBuffer.incr`` calls for the same ``(model, filters)`` key in
+    memory and writes them to Redis as one pipeline per host, either once
+    ``window`` seconds have passed since the oldest pending increment or once
+    ``max_keys`` distinct keys are pending, whichever comes first.
+
+    The window is enforced by a timer thread, so increments are written even
+    if no further ``add`` follows. Increments that fail to be written are put
+    back and retried with the next flush.
+    """
+
+    def __init__(self, buffer, window, max_keys):
+        assert window > 0
+        assert max_keys > 0
+        self.buffer = buffer
+        self.window = window
+        self.max_keys = max_keys
+        self._reset()
+        # Forked worker processes start out empty, the parent process still
+        # owns (and writes) whatever was pending at the time of the fork.
+        os.register_at_fork(after_in_child=self._reset)
+
+    def _reset(self):
+        self.pending = {}
+        self.started_at = None
+        self.timer = None
+        self.lock = threading.Lock()
+
+    def add(self, key, model, columns, filters, extra=None, signal_only=None):
+        with self.lock:
+            entry = self.pending.get(key)
+            if entry is None:
+                entry = self.pending[key] = CoalescedIncr(model, filters)
+            entry.merge(columns, extra, signal_only)
+
+            if self.started_at is None:
+                self._start_window()
+
+            if len(self.pending) < self.max_keys and time() - self.started_at < self.window:
+                return
+            pending = self._swap()
+
+        self._write(pending, reason="full" if len(pending) >= self.max_keys else "window")
+
+    def get(self, key, columns):
+        with self.lock:
+            entry = self.pending.get(key)
+            if entry is None:
+                return {}
+            return {col: entry.columns[col] for col in columns if col in entry.columns}
+
+    def flush(self, reason="manual"):
+        with self.lock:
+            pending = self._swap()
+        self._write(pending, reason=reason)
+
+    def flush_on_shutdown(self, **kwargs):
+        # Celery's prefork children leave through ``os._exit``, which skips
+        # ``atexit`` handlers, so this is also connected to
+        # ``worker_process_shutdown``.
+        self.flush(reason="shutdown")
+
+    def _flush_window(self):
+        try:
+            self.flush(reason="window")
+        except Exception:
+            logger.exception("buffer.coalesce.flush-failed")
+
+    def _start_window(self):
+        self.started_at = time()
+        self.timer = threading.Timer(self.window, self._flush_window)
+        self.timer.daemon = True
+        self.timer.start()
+
+    def _swap(self):
+        pending, self.pending = self.pending, {}
+        self.started_at = None
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+        return pending
+
+    def _restore(self, pending):
+        with self.lock:
+            for key, entry in pending.items():
+                current = self.pending.get(key)
+                if current is not None:
+                    entry.update(current)
+                self.pending[key] = entry
+
+            if self.pending and self.started_at is None:
+                self._start_window()
+
+    def _write(self, pending, reason):
+        if not pending:
+            return
+
+        calls = sum(entry.calls for entry in pending.values())
+        router = self.buffer.cluster.get_router()
+        hosts = defaultdict(list)
+        for key in pending:
+            hosts[router.get_host_for_key(key)].append(key)
+
+        unwritten = dict(pending)
+        try:
+            for host_id, keys in hosts.items():
+                conn = self.buffer.cluster.get_local_client(host_id)
+                with conn.pipeline(transaction=False) as pipe:
+                    for key in keys:
+                        entry = pending[key]
+                        self.buffer._queue_incr(
+                            pipe,
+                            key,
+                            entry.model,
+                            entry.columns,
+                            entry.filters,
+                            entry.extra,
+                            entry.signal_only or None,
+                        )
+                    pipe.execute()
+                for key in keys:
+                    del unwritten[key]
+        except Exception:
+            metrics.incr(
+                "buffer.coalesce.flush-failed", tags={"reason": reason}, skip_internal=True
+            )
+            self._restore(unwritten)
+            raise
+
+        metrics.incr("buffer.coalesce.flush", tags={"reason": reason}, skip_internal=True)
+        metrics.timing("buffer.coalesce.calls", calls, skip_internal=True)
+        metrics.timing("buffer.coalesce.keys", len(pending), skip_internal=True)
+        metrics.timing("buffer.coalesce.ratio", calls / len(pending), skip_internal=True)
+
+
 class RedisBuffer(Buffer):
     key_expire = 60 * 60  # 1 hour
     pending_key = "b:p"
 
-    def __init__(self, pending_partitions=1, incr_batch_size=2, **options):
+    def __init__(
+        self,
+        pending_partitions=1,
+        incr_batch_size=2,
+        coalesce_window=0,
+        coalesce_max_keys=1000,
+        codec="pickle",
+        allow_pickle=True,
+        **options,
+    ):
         self.cluster, options = get_cluster_from_options("SENTRY_BUFFER_OPTIONS", options)
         self.pending_partitions = pending_partitions
         self.incr_batch_size = incr_batch_size
         assert self.pending_partitions > 0
         assert self.incr_batch_size > 0
 
+        # ``codec`` selects how filters and extra values are written, while
+        # reads always accept the compact codec and the legacy JSON format. To
+        # migrate, deploy with ``codec="compact"`` first and set
+        # ``allow_pickle=False`` once no pickled hashes are left (after
+        # ``key_expire``).
+        assert codec in ("pickle", "compact")
+        self.codec = codec
+        self.allow_pickle = allow_pickle
+
+        # When ``coalesce_window`` is set, increments are pre-aggregated per
+        # worker process and flushed in batches instead of being written to
+        # Redis on every call. Anything still pending is written on shutdown.
+        if coalesce_window:
+            self.coalescer = CoalescingBuffer(self, coalesce_window, coalesce_max_keys)
+            atexit.register(self.coalescer.flush_on_shutdown)
+            worker_process_shutdown.connect(self.coalescer.flush_on_shutdown, weak=False)
+        else:
+            self.coalescer = None
+
     def validate(self):
         try:
             # wait 10 seconds at most
@@ -145,6 +360,95 @@ class RedisBuffer(Buffer):
         else:
             raise TypeError(f"invalid type: {type_}")
 
+    def _encode_value(self, value):
+        """
+        Encodes a single filter or extra value as a type tag followed by its
+        shortest exact textual representation.
+        """
+        if value is None:
+            return "n"
+        elif isinstance(value, bool):
+            return "b1" if value else "b0"
+        elif isinstance(value, int):
+            return f"i{value}"
+        elif isinstance(value, models.Model):
+            return f"i{value.pk}"
+        elif isinstance(value, str):
+            return f"s{value}"
+        elif isinstance(value, datetime):
+            if value.tzinfo is None:
+                value = value.replace(tzinfo=timezone.utc)
+            delta = value - EPOCH
+            return "d%d" % ((delta.days * 86400 + delta.seconds) * 1000000 + delta.microseconds)
+        elif isinstance(value, float):
+            return f"f{value!r}"
+        elif isinstance(value, (dict, list)):
+            return "j" + json.dumps(value)
+        raise TypeError(type(value))
+
+    def _decode_value(self, value):
+        type_, value = value[:1], value[1:]
+        if type_ == "i":
+            return int(value)
+        elif type_ == "s":
+            return value
+        elif type_ == "d":
+            return EPOCH + timedelta(microseconds=int(value))
+        elif type_ == "f":
+            return float(value)
+        elif type_ == "b":
+            return value == "1"
+        elif type_ == "n":
+            return None
+        elif type_ == "j":
+            return json.loads(value)
+        raise TypeError(f"invalid type: {type_}")
+
+    def _dump_filters(self, filters):
+        if self.codec == "compact":
+            try:
+                return CODEC_VERSION + json.dumps(
+                    {k: self._encode_value(v) for k, v in filters.items()}
+                ).encode("utf-8")
+            except TypeError:
+                if not self.allow_pickle:
+                    raise
+                metrics.incr("buffer.codec.pickle-fallback", skip_internal=True)
+        return pickle.dumps(filters)
+
+    def _dump_extra(self, value):
+        if self.codec == "compact":
+            try:
+                return CODEC_VERSION + self._encode_value(value).encode("utf-8")
+            except TypeError:
+                if not self.allow_pickle:
+                    raise
+                metrics.incr("buffer.codec.pickle-fallback", skip_internal=True)
+        return pickle.dumps(value)
+
+    def _load_filters(self, payload):
+        if payload.startswith(CODEC_VERSION):
+            return {
+                k: self._decode_value(v) for k, v in json.loads(payload[1:].decode("utf-8")).items()
+            }
+        elif payload.startswith(b"{"):
+            return self._load_values(json.loads(payload.decode("utf-8")))
+        return self._load_pickle(payload)
+
+    def _load_extra(self, payload):
+        if payload.startswith(CODEC_VERSION):
+            return self._decode_value(payload[1:].decode("utf-8"))
+        elif payload.startswith(b"["):
+            return self._load_value(json.loads(payload.decode("utf-8")))
+        return self._load_pickle(payload)
+
+    def _load_pickle(self, payload):
+        # TODO(dcramer): legacy pickle support - remove in Sentry 9.1
+        if not self.allow_pickle:
+            raise TypeError("refusing to unpickle buffer value")
+        metrics.incr("buffer.codec.pickle-load", skip_internal=True)
+        return pickle.loads(payload)
+
     def get(self, model, columns, filters):
         """
         Fetches buffered values for a model/filter. Passed columns must be integer columns.
@@ -157,10 +461,24 @@ class RedisBuffer(Buffer):
             pipe.hget(key, f"i+{col}")
         results = pipe.execute()
 
-        return {
+        rv = {
             col: (int(results[i]) if results[i] is not None else 0) for i, col in enumerate(columns)
         }
 
+        # Include increments that have not been written to Redis yet.
+        if self.coalescer is not None:
+            for col, amount in self.coalescer.get(key, columns).items():
+                rv[col] += amount
+
+        return rv
+
+    def flush_coalesced(self):
+        """
+        Writes any increments held by the in-process coalescer to Redis.
+        """
+        if self.coalescer is not None:
+            self.coalescer.flush()
+
     def incr(self, model, columns, filters, extra=None, signal_only=None, return_incr_results=True):
         """
         Increment the key by doing the following:
@@ -170,22 +488,38 @@ class RedisBuffer(Buffer):
             - Perform a set (last write wins) on extra
             - Perform a set on signal_only (only if True)
         - Add hashmap key to pending flushes
+
+        If coalescing is enabled the increment is merged in memory first and
+        written along with all other pending increments on the next flush.
         """
+        key = self._make_key(model, filters)
+
+        if self.coalescer is not None:
+            self.coalescer.add(key, model, columns, filters, extra, signal_only)
+        else:
+            # We can't use conn.map() due to wanting to support multiple pending
+            # keys (one per Redis partition)
+            conn = self.cluster.get_local_client_for_key(key)
+            pipe = conn.pipeline()
+            self._queue_incr(pipe, key, model, columns, filters, extra, signal_only)
+            pipe.execute()
+
+        metrics.incr(
+            "buffer.incr",
+            skip_internal=True,
+            tags={"module": model.__module__, "model": model.__name__},
+        )
 
+    def _queue_incr(self, pipe, key, model, columns, filters, extra=None, signal_only=None):
+        """
+        Adds the commands for a single buffered increment to ``pipe``.
+        """
         # TODO(dcramer): longer term we'd rather not have to serialize values
         # here (unless it's to JSON)
-        key = self._make_key(model, filters)
         pending_key = self._make_pending_key_from_key(key)
-        # We can't use conn.map() due to wanting to support multiple pending
-        # keys (one per Redis partition)
-        conn = self.cluster.get_local_client_for_key(key)
 
-        pipe = conn.pipeline()
         pipe.hsetnx(key, "m", f"{model.__module__}.{model.__name__}")
-        # TODO(dcramer): once this goes live in production, we can kill the pickle path
-        # (this is to ensure a zero downtime deploy where we can transition event processing)
-        pipe.hsetnx(key, "f", pickle.dumps(filters))
-        # pipe.hsetnx(key, 'f', json.dumps(self._dump_values(filters)))
+        pipe.hsetnx(key, "f", self._dump_filters(filters))
         for column, amount in columns.items():
             pipe.hincrby(key, "i+" + column, amount)
 
@@ -194,23 +528,13 @@ class RedisBuffer(Buffer):
             # hook here
             # e.g. "update score if last_seen or times_seen is changed"
             for column, value in extra.items():
-                # TODO(dcramer): once this goes live in production, we can kill the pickle path
-                # (this is to ensure a zero downtime deploy where we can transition event processing)
-                pipe.hset(key, "e+" + column, pickle.dumps(value))
-                # pipe.hset(key, 'e+' + column, json.dumps(self._dump_value(value)))
+                pipe.hset(key, "e+" + column, self._dump_extra(value))
 
         if signal_only is True:
             pipe.hset(key, "s", "1")
 
         pipe.expire(key, self.key_expire)
         pipe.zadd(pending_key, {key: time()})
-        pipe.execute()
-
-        metrics.incr(
-            "buffer.incr",
-            skip_internal=True,
-            tags={"module": model.__module__, "model": model.__name__},
-        )
 
     def process_pending(self, partition=None):
         if partition is None and self.pending_partitions > 1:
@@ -262,12 +586,52 @@ class RedisBuffer(Buffer):
         if key is not None:
             batch_keys = [key]
 
-        for key in batch_keys:
-            self._process_single_incr(key)
+        if len(batch_keys) == 1:
+            self._process_single_incr(batch_keys[0])
+        else:
+            self._process_batch_incr(batch_keys)
 
     def _process(self, model, columns, filters, extra=None, signal_only=None):
         return super().process(model, columns, filters, extra, signal_only)
 
+    def _process_batch(self, batch):
+        return super().process_batch(batch)
+
+    def _load_buffered(self, key, values):
+        """
+        Decodes the contents of a buffer hash into the arguments for
+        ``Buffer.process``, or returns ``None`` if the hash is empty.
+        """
+        # XXX(python3): In python2 this isn't as important since redis will
+        # return string tyes (be it, byte strings), but in py3 we get bytes
+        # back, and really we just want to deal with keys as strings.
+        values = {force_text(k): v for k, v in values.items()}
+
+        if not values:
+            metrics.incr("buffer.revoked", tags={"reason": "empty"}, skip_internal=False)
+            self.logger.debug("buffer.revoked.empty", extra={"redis_key": key})
+            return None
+
+        # XXX(py3): Note that ``import_string`` explicitly wants a str in
+        # python2, so we'll decode (for python3) and then translate back to
+        # a byte string (in python2) for import_string.
+        model = import_string(str(values.pop("m").decode("utf-8")))
+
+        filters = self._load_filters(values.pop("f"))
+
+        incr_values = {}
+        extra_values = {}
+        signal_only = None
+        for k, v in values.items():
+            if k.startswith("i+"):
+                incr_values[k[2:]] = int(v)
+            elif k.startswith("e+"):
+                extra_values[k[2:]] = self._load_extra(v)
+            elif k == "s":
+                signal_only = bool(int(v))  # Should be 1 if set
+
+        return model, incr_values, filters, extra_values, signal_only
+
     def _process_single_incr(self, key):
         client = self.cluster.get_routing_client()
         lock_key = self._make_lock_key(key)
@@ -288,42 +652,54 @@ class RedisBuffer(Buffer):
             pipe.delete(key)
             values = pipe.execute()[0]
 
-            # XXX(python3): In python2 this isn't as important since redis will
-            # return string tyes (be it, byte strings), but in py3 we get bytes
-            # back, and really we just want to deal with keys as strings.
-            values = {force_text(k): v for k, v in values.items()}
-
-            if not values:
-                metrics.incr("buffer.revoked", tags={"reason": "empty"}, skip_internal=False)
-                self.logger.debug("buffer.revoked.empty", extra={"redis_key": key})
-                return
+            buffered = self._load_buffered(key, values)
+            if buffered is not None:
+                self._process(*buffered)
+        finally:
+            client.delete(lock_key)
 
-            # XXX(py3): Note that ``import_string`` explicitly wants a str in
-            # python2, so we'll decode (for python3) and then translate back to
-            # a byte string (in python2) for import_string.
-            model = import_string(str(values.pop("m").decode("utf-8")))
+    def _process_batch_incr(self, keys):
+        """
+        Flushes many buffer keys at once. Locks are taken, hashes are read
+        and database updates are applied for the whole batch instead of once
+        per key.
+        """
+        # prevent a stampede due to the way we use celery etas + duplicate
+        # tasks
+        with self.cluster.map() as conn:
+            locks = {key: conn.set(self._make_lock_key(key), "1", nx=True, ex=10) for key in keys}
 
-            if values["f"].startswith(b"{"):
-                filters = self._load_values(json.loads(values.pop("f").decode("utf-8")))
+        acquired = []
+        for key, result in locks.items():
+            if result.value:
+                acquired.append(key)
             else:
-                # TODO(dcramer): legacy pickle support - remove in Sentry 9.1
-                filters = pickle.loads(values.pop("f"))
-
-            incr_values = {}
-            extra_values = {}
-            signal_only = None
-            for k, v in values.items():
-                if k.startswith("i+"):
-                    incr_values[k[2:]] = int(v)
-                elif k.startswith("e+"):
-                    if v.startswith(b"["):
-                        extra_values[k[2:]] = self._load_value(json.loads(v.decode("utf-8")))
-                    else:
-                        # TODO(dcramer): legacy pickle support - remove in Sentry 9.1
-                        extra_values[k[2:]] = pickle.loads(v)
-                elif k == "s":
-                    signal_only = bool(int(v))  # Should be 1 if set
-
-            self._process(model, incr_values, filters, extra_values, signal_only)
+                metrics.incr("buffer.revoked", tags={"reason": "locked"}, skip_internal=False)
+                self.logger.debug("buffer.revoked.locked", extra={"redis_key": key})
+
+        if not acquired:
+            return
+
+        try:
+            # The pending set lives on the same host as the key (see
+            # ``_queue_incr``), so every command is routed by the buffer key.
+            with self.cluster.all() as conn:
+                results = {}
+                for key in acquired:
+                    client = conn.target_key(key)
+                    results[key] = client.hgetall(key)
+                    client.zrem(self._make_pending_key_from_key(key), key)
+                    client.delete(key)
+
+            batch = []
+            for key, result in results.items():
+                buffered = self._load_buffered(key, result.value)
+                if buffered is not None:
+                    batch.append(buffered)
+
+            metrics.timing("buffer.batch-size", len(batch), skip_internal=False)
+            self._process_batch(batch)
         finally:
-            client.delete(lock_key)
+            with self.cluster.map() as conn:
+                for key in acquired:
+                    conn.delete(self._make_lock_key(key))
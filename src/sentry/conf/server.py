@@ -1527,6 +1527,19 @@ SENTRY_DEFAULT_MAX_EVENTS_PER_MINUTE = "90%"
 SENTRY_SNUBA = os.environ.get("SNUBA", "http://127.0.0.1:1218")
 SENTRY_SNUBA_TIMEOUT = 30
 SENTRY_SNUBA_CACHE_TTL_SECONDS = 60
+# Referrers whose query results are cached in stale-while-revalidate mode, regardless of
+# whether callers ask for the cache.  Maps referrers to `{"soft_ttl": seconds, "ttl": seconds}`.
+# Results older than `soft_ttl` are refreshed by one caller while the others keep being served
+# the cached result, until it is older than `ttl`.
+SENTRY_SNUBA_CACHE_REVALIDATE = {}
+# Worker threads that send the queries of bulk snuba requests, per group of referrers.  A
+# referrer belongs to the first group listing a prefix of it in `referrers`, or to the
+# "default" group.  Queries wait up to SENTRY_SNUBA_EXECUTOR_QUEUE_TIMEOUT seconds for room
+# in a full queue before they are rejected, a `queue_size` of 0 means unbounded.
+SENTRY_SNUBA_EXECUTORS = {
+    "default": {"workers": 10, "queue_size": 1000},
+}
+SENTRY_SNUBA_EXECUTOR_QUEUE_TIMEOUT = 5
 
 # Node storage backend
 SENTRY_NODESTORE = "sentry.nodestore.django.DjangoNodeStorage"
@@ -2951,9 +2964,11 @@ SENTRY_POST_PROCESS_LOCKS_BACKEND_OPTIONS = {
 ORGANIZATION_VITALS_OVERVIEW_PROJECT_LIMIT = 300
 
 
-# Default string indexer cache options
+# Default string indexer cache options. Set "local_cache_size" to put a
+# process-local LRU tier in front of the cache, see StringIndexerCache.
 SENTRY_STRING_INDEXER_CACHE_OPTIONS = {
     "cache_name": "default",
+    "local_cache_size": 0,
 }
 SENTRY_POSTGRES_INDEXER_RETRY_COUNT = 2
 
@@ -2,8 +2,11 @@ import logging
 import pickle
 from base64 import b64encode
 from collections.abc import MutableMapping
+from contextlib import contextmanager
+from contextvars import ContextVar
 from uuid import uuid4
 
+import sentry_sdk
 from django.db.models.signals import post_delete
 
 from sentry import nodestore
@@ -14,10 +17,40 @@ from sentry.utils.strings import compress, decompress
 
 from .gzippeddict import GzippedDictField
 
-__all__ = ("NodeField", "NodeData")
+__all__ = ("NodeField", "NodeData", "prefetch_nodes")
 
 logger = logging.getLogger("sentry")
 
+# Node payloads fetched by the innermost `prefetch_nodes` block, keyed by id
+_prefetched_nodes = ContextVar("prefetched_nodes", default=None)
+
+
+@contextmanager
+def prefetch_nodes(node_ids):
+    """
+    Fetches all ``node_ids`` with a single ``nodestore.get_multi`` call (which
+    goes through the ``nodedata`` cache) and serves lazy `NodeData` reads
+    for those ids from the result until the block exits.  Use this around
+    code that loads events one by one, e.g. ``eventstore.get_event_by_id``
+    in a loop, to turn N nodestore reads into one.
+
+    >>> with prefetch_nodes([Event.generate_node_id(project_id, event_id) for ...]):
+    >>>     events = [eventstore.get_event_by_id(project_id, event_id) for ...]
+    """
+    node_ids = list({node_id for node_id in node_ids if node_id})
+    with sentry_sdk.start_span(op="nodestore.prefetch_nodes") as span:
+        span.set_data("num_ids", len(node_ids))
+        prefetched = nodestore.get_multi(node_ids) if node_ids else {}
+
+    # Nodes missing from nodestore are remembered as empty to avoid
+    # fetching them again one by one.
+    prefetched = {node_id: prefetched.get(node_id) or {} for node_id in node_ids}
+    token = _prefetched_nodes.set(prefetched)
+    try:
+        yield
+    finally:
+        _prefetched_nodes.reset(token)
+
 
 class NodeIntegrityFailure(Exception):
     pass
@@ -104,7 +137,13 @@ class NodeData(MutableMapping):
             return self._node_data
 
         elif self.id:
-            self.bind_data(nodestore.get(self.id) or {})
+            prefetched = _prefetched_nodes.get()
+            if prefetched is not None and self.id in prefetched:
+                # Each prefetched payload is bound once, as `bind_data`
+                # takes ownership of the dict.
+                self.bind_data(prefetched.pop(self.id))
+            else:
+                self.bind_data(nodestore.get(self.id) or {})
             return self._node_data
 
         rv = {}
@@ -129,19 +168,18 @@ class NodeData(MutableMapping):
             self.data["_ref"] = ref
             self.data["_ref_version"] = self.ref_version
 
-    def save(self, subkeys=None):
+    def get_subkeys_to_save(self, subkeys=None):
         """
-        Write current data back to nodestore.
-
-        :param subkeys: Additional JSON payloads to attach to nodestore value,
-            currently only {"unprocessed": {...}} is added for reprocessing.
-            See documentation of nodestore.
+        Returns ``(id, subkeys)`` as they would be written by ``save``, so
+        that many nodes can be written at once with
+        ``nodestore.set_subkeys_multi``. ``subkeys`` is ``None`` if there is
+        nothing to save.
         """
 
         # We never loaded any data for reading or writing, so there
         # is nothing to save.
         if self._node_data is None:
-            return
+            return self.id, None
 
         # We can't put our wrappers into the nodestore, so we need to
         # ensure that the data is converted into a plain old dict
@@ -151,8 +189,21 @@ class NodeData(MutableMapping):
 
         subkeys = subkeys or {}
         subkeys[None] = to_write
+        return self.id, subkeys
+
+    def save(self, subkeys=None):
+        """
+        Write current data back to nodestore.
+
+        :param subkeys: Additional JSON payloads to attach to nodestore value,
+            currently only {"unprocessed": {...}} is added for reprocessing.
+            See documentation of nodestore.
+        """
+        node_id, subkeys = self.get_subkeys_to_save(subkeys=subkeys)
+        if subkeys is None:
+            return
 
-        nodestore.set_subkeys(self.id, subkeys)
+        nodestore.set_subkeys(node_id, subkeys)
 
 
 class NodeField(GzippedDictField):
@@ -2,6 +2,9 @@ import pickle
 import zlib
 from typing import Any
 
+from sentry import options
+from sentry.utils import json
+
 
 class Codec:
     def encode(self, value: Any) -> bytes:
@@ -17,3 +20,27 @@ class CompressedPickleCodec(Codec):
 
     def decode(self, value: bytes) -> Any:
         return pickle.loads(zlib.decompress(value))
+
+
+class JSONCodec(Codec):
+    """
+    Encodes values as JSON, namedtuples are encoded as objects and decoded as dicts.
+
+    Values that were encoded with `CompressedPickleCodec` can still be decoded, so that records
+    added to timelines before switching codecs are delivered. Values are written with
+    `CompressedPickleCodec` as well until `digests.write-event-references` is enabled, which
+    must only happen once no worker that can't decode JSON is left.
+    """
+
+    legacy_codec = CompressedPickleCodec()
+
+    def encode(self, value: Any) -> bytes:
+        if not options.get("digests.write-event-references"):
+            return self.legacy_codec.encode(value)
+        return json.dumps(value).encode("utf-8")
+
+    def decode(self, value: bytes) -> Any:
+        # zlib streams start with a 0x78 ("x") header byte, which JSON documents never do.
+        if value[:1] == b"x":
+            return self.legacy_codec.decode(value)
+        return json.loads(value.decode("utf-8"))
@@ -6,9 +6,10 @@ import logging
 from collections import defaultdict, namedtuple
 from typing import Any, Mapping, MutableMapping, MutableSequence, Sequence
 
-from sentry import tsdb
+from sentry import eventstore, options, tsdb
 from sentry.digests import Digest, Record
-from sentry.eventstore.models import Event
+from sentry.eventstore.models import Event, GroupEvent
+from sentry.issues.issue_occurrence import IssueOccurrence
 from sentry.models import Group, GroupStatus, Project, Rule
 from sentry.notifications.types import ActionTargetType, FallthroughChoiceType
 from sentry.utils.dates import to_timestamp
@@ -17,6 +18,8 @@ from sentry.utils.pipeline import Pipeline
 logger = logging.getLogger("sentry.digests")
 
 Notification = namedtuple("Notification", "event rules")
+# What records store in place of a `Notification`, the event is fetched when building the digest.
+NotificationReference = namedtuple("NotificationReference", "event_id group_id occurrence_id rules")
 
 
 def split_key(
@@ -56,17 +59,98 @@ def unsplit_key(
     return f"mail:p:{project.id}:{target_type.value}:{target_str}:{fallthrough}"
 
 
-def event_to_record(event: Event, rules: Sequence[Rule]) -> Record:
+def event_to_record(event: Event | GroupEvent, rules: Sequence[Rule]) -> Record:
     if not rules:
         logger.warning(f"Creating record for {event} that does not contain any rules!")
 
+    if not options.get("digests.write-event-references"):
+        return Record(
+            event.event_id,
+            Notification(event, [rule.id for rule in rules]),
+            to_timestamp(event.datetime),
+        )
+
     return Record(
         event.event_id,
-        Notification(event, [rule.id for rule in rules]),
+        NotificationReference(
+            event.event_id,
+            event.group_id,
+            getattr(event, "occurrence_id", None),
+            [rule.id for rule in rules],
+        ),
         to_timestamp(event.datetime),
     )
 
 
+def load_record(record: Record) -> Record:
+    """
+    Restores the `NotificationReference` of a record decoded by the JSON codec, which decodes it
+    as a dict. Records that contain a pickled `Notification` are returned as they are.
+    """
+    if isinstance(record.value, Mapping):
+        return record._replace(value=NotificationReference(**record.value))
+    return record
+
+
+def get_record_reference(record: Record) -> NotificationReference | None:
+    """
+    Returns the reference stored in a record (see `load_record`), or `None` for records that
+    contain a pickled `Notification` and were added before records only stored references.
+    """
+    if isinstance(record.value, NotificationReference):
+        return record.value
+    return None
+
+
+def get_record_group_id(record: Record) -> int:
+    reference = get_record_reference(record)
+    group_id = reference.group_id if reference is not None else record.value.event.group_id
+    return int(group_id)
+
+
+def fetch_events(
+    project: Project, groups: Mapping[int, Group], records: Sequence[Record]
+) -> Mapping[str, GroupEvent]:
+    """
+    Fetches the events referenced by records in bulk, keyed by event ID. Events that are missing
+    from nodestore or whose group no longer exists are left out.
+    """
+    references = [
+        reference
+        for reference in map(get_record_reference, records)
+        if reference is not None and reference.group_id in groups
+    ]
+    if not references:
+        return {}
+
+    events = [
+        Event(project_id=project.id, event_id=reference.event_id, group_id=reference.group_id)
+        for reference in references
+    ]
+    eventstore.bind_nodes(events, "data")
+
+    occurrence_ids = list(
+        {reference.occurrence_id for reference in references if reference.occurrence_id}
+    )
+    occurrences = dict(zip(occurrence_ids, IssueOccurrence.fetch_multi(occurrence_ids, project.id)))
+
+    group_events = {}
+    for reference, event in zip(references, events):
+        if not event.data:
+            logger.debug(f"Event {reference.event_id} could not be fetched from nodestore.")
+            continue
+        group_event = GroupEvent(
+            project_id=project.id,
+            event_id=reference.event_id,
+            group=groups[reference.group_id],
+            data=event.data,
+        )
+        if reference.occurrence_id:
+            group_event.occurrence = occurrences.get(reference.occurrence_id)
+        group_events[reference.event_id] = group_event
+    return group_events
+
+
 def fetch_state(project: Project, records: Sequence[Record]) -> Mapping[str, Any]:
     # This reads a little strange, but remember that records are returned in
     # reverse chronological order, and we query the database in chronological
@@ -75,10 +159,11 @@ def fetch_state(project: Project, records: Sequence[Record]) -> Mapping[str, Any
     start = records[-1].datetime
     end = records[0].datetime
 
-    groups = Group.objects.in_bulk(record.value.event.group_id for record in records)
+    groups = Group.objects.in_bulk(get_record_group_id(record) for record in records)
     return {
         "project": project,
         "groups": groups,
+        "events": fetch_events(project, groups, records),
         "rules": Rule.objects.in_bulk(
             itertools.chain.from_iterable(record.value.rules for record in records)
         ),
@@ -95,6 +180,7 @@ def attach_state(
     rules: Mapping[int, Rule],
     event_counts: Mapping[int, int],
     user_counts: Mapping[int, int],
+    events: Mapping[str, GroupEvent] | None = None,
 ) -> Mapping[str, Any]:
     for id, group in groups.items():
         assert group.project_id == project.id, "Group must belong to Project"
@@ -112,7 +198,7 @@ def attach_state(
     for id, user_count in user_counts.items():
         groups[id].user_count = user_count
 
-    return {"project": project, "groups": groups, "rules": rules}
+    return {"project": project, "groups": groups, "rules": rules, "events": events or {}}
 
 
 def rewrite_record(
@@ -120,8 +206,16 @@ def rewrite_record(
     project: Project,
     groups: Mapping[int, Group],
     rules: Mapping[str, Rule],
+    events: Mapping[str, GroupEvent] | None = None,
 ) -> Record | None:
-    event = record.value.event
+    reference = get_record_reference(record)
+    if reference is not None:
+        event = (events or {}).get(reference.event_id)
+        if event is None:
+            logger.debug(f"{record} could not be associated with an event.")
+            return None
+    else:
+        event = record.value.event
 
     # Reattach the group to the event.
     group = groups.get(event.group_id)
@@ -192,6 +286,8 @@ def build_digest(
     if not records:
         return None, []
 
+    records = [load_record(record) for record in records]
+
     # XXX(hack): Allow generating a mock digest without actually doing any real IO!
     state = state or fetch_state(project, records)
 
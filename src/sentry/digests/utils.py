@@ -142,13 +142,7 @@ def get_participants_by_event(
 
 def sort_records(records: Sequence[Record]) -> Sequence[Record]:
     """Sorts records ordered from newest to oldest."""
-
-    def sort_func(record: Record) -> datetime:
-        # Explicitly typing to satisfy mypy.
-        key: datetime = record.value.event.datetime
-        return key
-
-    return sorted(records, key=sort_func, reverse=True)
+    return sorted(records, key=lambda record: record.timestamp, reverse=True)
 
 
 def get_groups(digest: Digest) -> Sequence[tuple[Rule, Group, Event]]:
@@ -14,6 +14,7 @@ from typing import (
     TYPE_CHECKING,
     Any,
     Dict,
+    Iterable,
     Mapping,
     MutableMapping,
     Optional,
@@ -39,6 +40,7 @@ from sentry import (
     eventstream,
     eventtypes,
     features,
+    nodestore,
     options,
     quotas,
     reprocessing2,
@@ -454,36 +456,70 @@ class EventManager:
 
             return jobs[0]["event"]
 
-        with metrics.timer("event_manager.save.organization.get_from_cache"):
-            project.set_cached_field_value(
-                "organization", Organization.objects.get_from_cache(id=project.organization_id)
+        job["cache_key"] = cache_key
+        jobs = save_error_events([job], projects, raise_on_discard=True)
+
+        if jobs:
+            self._data = job["event"].data.data
+
+            # Check if the project is configured for auto upgrading and we need to upgrade
+            # to the latest grouping config.
+            if auto_upgrade_grouping and _project_should_update_grouping(project):
+                _auto_update_grouping(project)
+
+        return job["event"]
+
+
+def save_error_events(
+    jobs: Sequence[Job], projects: ProjectsMapping, raise_on_discard: bool = False
+) -> Sequence[Job]:
+    """
+    Saves normalized error events. Lookups that can be shared between events
+    (organizations, releases, environments, project keys) and writes to
+    nodestore are done once for all ``jobs``, everything that depends on the
+    individual event (grouping, attachments) is done per job.
+
+    Every job must carry ``data``, ``project_id``, ``raw``, ``start_time`` and
+    ``cache_key``. Returns the jobs that ended up being assigned to a group.
+    Events whose hash was discarded are dropped from the result unless
+    ``raise_on_discard`` is set, in which case ``HashDiscarded`` is raised.
+
+    Jobs are marked as ``saving`` once their group is being saved. From then
+    on counters, TSDB or the eventstream may have seen the event, so if this
+    raises, only jobs without the mark can safely be saved again.
+    """
+    with metrics.timer("event_manager.save.organization.get_from_cache"):
+        organizations = {
+            o.id: o
+            for o in Organization.objects.get_many_from_cache(
+                {p.organization_id for p in projects.values()}
             )
+        }
+        for project in projects.values():
+            project.set_cached_field_value("organization", organizations[project.organization_id])
 
-        jobs = [job]
+    for job in jobs:
+        job["is_reprocessed"] = is_reprocessed_event(job["data"])
 
-        is_reprocessed = is_reprocessed_event(job["data"])
+    with sentry_sdk.start_span(op="event_manager.save.pull_out_data"):
+        _pull_out_data(jobs, projects)
 
-        with sentry_sdk.start_span(op="event_manager.save.pull_out_data"):
-            _pull_out_data(jobs, projects)
+    with sentry_sdk.start_span(op="event_manager.save.get_or_create_release_many"):
+        _get_or_create_release_many(jobs, projects)
 
-        with sentry_sdk.start_span(op="event_manager.save.get_or_create_release_many"):
-            _get_or_create_release_many(jobs, projects)
+    with sentry_sdk.start_span(op="event_manager.save.get_event_user_many"):
+        _get_event_user_many(jobs, projects)
 
-        with sentry_sdk.start_span(op="event_manager.save.get_event_user_many"):
-            _get_event_user_many(jobs, projects)
+    _get_project_key_many(jobs)
 
-        job["project_key"] = None
-        if job["key_id"] is not None:
-            with metrics.timer("event_manager.load_project_key"):
-                try:
-                    job["project_key"] = ProjectKey.objects.get_from_cache(id=job["key_id"])
-                except ProjectKey.DoesNotExist:
-                    pass
+    _derive_plugin_tags_many(jobs, projects)
+    _derive_interface_tags_many(jobs)
 
-        _derive_plugin_tags_many(jobs, projects)
-        _derive_interface_tags_many(jobs)
+    do_background_grouping_before = options.get("store.background-grouping-before")
+
+    for job in jobs:
+        project = projects[job["project_id"]]
 
-        do_background_grouping_before = options.get("store.background-grouping-before")
         if do_background_grouping_before:
             _run_background_grouping(project, job)
 
@@ -506,7 +542,7 @@ class EventManager:
         with metrics.timer("event_manager.load_grouping_config"):
             # At this point we want to normalize the in_app values in case the
             # clients did not set this appropriately so far.
-            if is_reprocessed:
+            if job["is_reprocessed"]:
                 # The customer might have changed grouping enhancements since
                 # the event was ingested -> make sure we get the fresh one for reprocessing.
                 grouping_config = get_grouping_config_dict_for_project(project)
@@ -524,7 +560,7 @@ class EventManager:
         ):
             hashes = _calculate_event_grouping(project, job["event"], grouping_config)
 
-        hashes = CalculatedHashes(
+        job["hashes"] = hashes = CalculatedHashes(
             hashes=list(hashes.hashes) + list(secondary_hashes and secondary_hashes.hashes or []),
             hierarchical_hashes=hashes.hierarchical_hashes,
             tree_labels=hashes.tree_labels,
@@ -536,8 +572,17 @@ class EventManager:
         if hashes.tree_labels:
             job["finest_tree_label"] = hashes.finest_tree_label
 
-        _materialize_metadata_many(jobs)
+    _materialize_metadata_many(jobs)
 
+    hashes_by_project: dict[int, set[str]] = {}
+    for job in jobs:
+        hashes_by_project.setdefault(job["project_id"], set()).update(
+            list(job["hashes"].hashes) + list(job["hashes"].hierarchical_hashes or ())
+        )
+    grouphashes = _get_grouphashes_many(hashes_by_project)
+
+    saved_jobs = []
+    for job in jobs:
         kwargs = _create_kwargs(job)
 
         kwargs["culprit"] = job["culprit"]
@@ -548,16 +593,18 @@ class EventManager:
         # based on the group counter.
         with metrics.timer("event_manager.get_attachments"):
             with sentry_sdk.start_span(op="event_manager.save.get_attachments"):
-                attachments = get_attachments(cache_key, job)
+                job["attachments"] = attachments = get_attachments(job["cache_key"], job)
 
+        job["saving"] = True
         try:
             with sentry_sdk.start_span(op="event_manager.save.save_aggregate_fn"):
                 group_info = _save_aggregate(
                     event=job["event"],
-                    hashes=hashes,
+                    hashes=job["hashes"],
                     release=job["release"],
                     metadata=dict(job["event_metadata"]),
                     received_timestamp=job["received_timestamp"],
+                    grouphashes=grouphashes,
                     **kwargs,
                 )
                 job["groups"] = [group_info]
@@ -570,10 +617,12 @@ class EventManager:
                 },
             )
             discard_event(job, attachments)
-            raise
+            if raise_on_discard:
+                raise
+            continue
 
         if not group_info:
-            return job["event"]
+            continue
 
         job["event"].group = group_info.group
 
@@ -581,31 +630,43 @@ class EventManager:
         # XXX(markus): No clue what this does
         job["event"].data.bind_ref(job["event"])
 
-        _get_or_create_environment_many(jobs, projects)
-        _get_or_create_group_environment_many(jobs, projects)
-        _get_or_create_release_associated_models(jobs, projects)
-        _get_or_create_group_release_many(jobs, projects)
-        _tsdb_record_all_metrics(jobs)
+        saved_jobs.append(job)
 
-        UserReport.objects.filter(project_id=project.id, event_id=job["event"].event_id).update(
-            group_id=group_info.group.id, environment_id=job["environment"].id
-        )
+    jobs = saved_jobs
+    if not jobs:
+        return jobs
+
+    _get_or_create_environment_many(jobs, projects)
+    _get_or_create_group_environment_many(jobs, projects)
+    _get_or_create_release_associated_models(jobs, projects)
+    _get_or_create_group_release_many(jobs, projects)
+    _tsdb_record_all_metrics(jobs)
+
+    for job in jobs:
+        group_info = job["groups"][0]
+        UserReport.objects.filter(
+            project_id=job["project_id"], event_id=job["event"].event_id
+        ).update(group_id=group_info.group.id, environment_id=job["environment"].id)
 
         with metrics.timer("event_manager.filter_attachments_for_group"):
-            attachments = filter_attachments_for_group(attachments, job)
+            job["attachments"] = filter_attachments_for_group(job["attachments"], job)
 
-        # XXX: DO NOT MUTATE THE EVENT PAYLOAD AFTER THIS POINT
-        _materialize_event_metrics(jobs)
+    # XXX: DO NOT MUTATE THE EVENT PAYLOAD AFTER THIS POINT
+    _materialize_event_metrics(jobs)
 
-        for attachment in attachments:
+    for job in jobs:
+        for attachment in job["attachments"]:
             key = f"bytes.stored.{attachment.type}"
             old_bytes = job["event_metrics"].get(key) or 0
             job["event_metrics"][key] = old_bytes + attachment.size
 
-        _nodestore_save_many(jobs)
+    _nodestore_save_many(jobs)
+
+    for job in jobs:
+        project = projects[job["project_id"]]
         save_unprocessed_event(project, job["event"].event_id)
 
-        if not raw:
+        if not job["raw"]:
             if not project.first_event:
                 project.update(first_event=job["event"].datetime)
                 first_event_received.send_robust(
@@ -620,7 +681,7 @@ class EventManager:
                     project=project, event=job["event"], sender=Project
                 )
 
-        if is_reprocessed:
+        if job["is_reprocessed"]:
             safe_execute(
                 reprocessing2.buffered_delete_old_primary_hash,
                 project_id=job["event"].project_id,
@@ -632,17 +693,18 @@ class EventManager:
                 _with_transaction=False,
             )
 
-        _eventstream_insert_many(jobs)
+    _eventstream_insert_many(jobs)
 
+    for job in jobs:
         # Do this last to ensure signals get emitted even if connection to the
         # file store breaks temporarily.
         #
         # We do not need this for reprocessed events as for those we update the
         # group_id on existing models in post_process_group, which already does
         # this because of indiv. attachments.
-        if not is_reprocessed:
+        if not job["is_reprocessed"]:
             with metrics.timer("event_manager.save_attachments"):
-                save_attachments(cache_key, attachments, job)
+                save_attachments(job["cache_key"], job["attachments"], job)
 
         metric_tags = {"from_relay": "_relay_processed" in job["data"]}
 
@@ -658,16 +720,9 @@ class EventManager:
             tags=metric_tags,
         )
 
-        _track_outcome_accepted_many(jobs)
-
-        self._data = job["event"].data.data
-
-        # Check if the project is configured for auto upgrading and we need to upgrade
-        # to the latest grouping config.
-        if auto_upgrade_grouping and _project_should_update_grouping(project):
-            _auto_update_grouping(project)
+    _track_outcome_accepted_many(jobs)
 
-        return job["event"]
+    return jobs
 
 
 def _project_should_update_grouping(project: Project) -> bool:
@@ -960,6 +1015,18 @@ def _get_event_user_many(jobs: Sequence[Job], projects: ProjectsMapping) -> None
         job["user"] = user
 
 
+@metrics.wraps("save_event.get_project_key_many")
+def _get_project_key_many(jobs: Sequence[Job]) -> None:
+    key_ids = {job["key_id"] for job in jobs if job["key_id"] is not None}
+    project_keys = {}
+    if key_ids:
+        with metrics.timer("event_manager.load_project_key"):
+            project_keys = {k.id: k for k in ProjectKey.objects.get_many_from_cache(key_ids)}
+
+    for job in jobs:
+        job["project_key"] = project_keys.get(job["key_id"])
+
+
 @metrics.wraps("save_event.derive_plugin_tags_many")
 def _derive_plugin_tags_many(jobs: Sequence[Job], projects: ProjectsMapping) -> None:
     # XXX: We ought to inline or remove this one for sure
@@ -1037,10 +1104,14 @@ def _create_kwargs(job: Union[Job, PerformanceJob]) -> dict[str, Any]:
 
 @metrics.wraps("save_event.get_or_create_environment_many")
 def _get_or_create_environment_many(jobs: Sequence[Job], projects: ProjectsMapping) -> None:
+    environments: dict[tuple[int, Optional[str]], Environment] = {}
     for job in jobs:
-        job["environment"] = Environment.get_or_create(
-            project=projects[job["project_id"]], name=job["environment"]
-        )
+        environment_key = (job["project_id"], job["environment"])
+        if environment_key not in environments:
+            environments[environment_key] = Environment.get_or_create(
+                project=projects[job["project_id"]], name=job["environment"]
+            )
+        job["environment"] = environments[environment_key]
 
 
 @metrics.wraps("save_event.get_or_create_group_environment_many")
@@ -1175,6 +1246,7 @@ def _tsdb_record_all_metrics(jobs: Sequence[Job]) -> None:
 @metrics.wraps("save_event.nodestore_save_many")
 def _nodestore_save_many(jobs: Sequence[Job]) -> None:
     inserted_time = datetime.utcnow().replace(tzinfo=UTC).timestamp()
+    nodes = {}
     for job in jobs:
         # Write the event to Nodestore
         subkeys = {}
@@ -1190,7 +1262,12 @@ def _nodestore_save_many(jobs: Sequence[Job]) -> None:
                 subkeys["unprocessed"] = unprocessed
 
         job["event"].data["nodestore_insert"] = inserted_time
-        job["event"].data.save(subkeys=subkeys)
+        node_id, to_write = job["event"].data.get_subkeys_to_save(subkeys=subkeys)
+        if to_write is not None:
+            nodes[node_id] = to_write
+
+    if nodes:
+        nodestore.set_subkeys_multi(nodes)
 
 
 @metrics.wraps("save_event.eventstream_insert_many")
@@ -1396,18 +1473,56 @@ def get_culprit(data: Mapping[str, Any]) -> str:
     )
 
 
+GroupHashesMapping = Mapping[Tuple[int, str], GroupHash]
+
+
+@metrics.wraps("save_event.get_grouphashes_many")
+def _get_grouphashes_many(hashes_by_project: Mapping[int, Iterable[str]]) -> GroupHashesMapping:
+    """
+    Looks up existing grouphashes for many events at once, with a single query
+    per project.
+
+    Hashes that don't exist yet are missing from the result and need to go
+    through ``get_or_create`` (and possibly group creation) as usual.
+    """
+    rv: dict[tuple[int, str], GroupHash] = {}
+    for project_id, hashes in hashes_by_project.items():
+        hashes = set(hashes)
+        if not hashes:
+            continue
+        for grouphash in GroupHash.objects.filter(project_id=project_id, hash__in=hashes):
+            rv[(project_id, grouphash.hash)] = grouphash
+    return rv
+
+
 def _save_aggregate(
     event: Event,
     hashes: CalculatedHashes,
     release: Optional[Release],
     metadata: dict[str, Any],
     received_timestamp: Union[int, float],
+    grouphashes: Optional[GroupHashesMapping] = None,
+    retry_missing_group: bool = True,
     **kwargs: dict[str, Any],
 ) -> Optional[GroupInfo]:
+    """
+    :param grouphashes: Grouphashes prefetched with ``_get_grouphashes_many``.
+        Only hashes missing from this mapping are looked up (and created)
+        individually.
+    :param retry_missing_group: Whether to look up the grouphashes again when
+        the group of an existing grouphash doesn't exist anymore.
+    """
     project = event.project
 
+    if grouphashes is None:
+        grouphashes = _get_grouphashes_many(
+            {project.id: list(hashes.hashes) + list(hashes.hierarchical_hashes or ())}
+        )
+
     flat_grouphashes = [
-        GroupHash.objects.get_or_create(project=project, hash=hash)[0] for hash in hashes.hashes
+        grouphashes.get((project.id, hash))
+        or GroupHash.objects.get_or_create(project=project, hash=hash)[0]
+        for hash in hashes.hashes
     ]
 
     # The root_hierarchical_hash is the least specific hash within the tree, so
@@ -1417,13 +1532,14 @@ def _save_aggregate(
     # when groups are created and also relieves contention by locking a more
     # specific hash than `hierarchical_hashes[0]`.
     existing_grouphash, root_hierarchical_hash = _find_existing_grouphash(
-        project, flat_grouphashes, hashes.hierarchical_hashes
+        project, flat_grouphashes, hashes.hierarchical_hashes, grouphashes
     )
 
     if root_hierarchical_hash is not None:
-        root_hierarchical_grouphash = GroupHash.objects.get_or_create(
-            project=project, hash=root_hierarchical_hash
-        )[0]
+        root_hierarchical_grouphash = (
+            grouphashes.get((project.id, root_hierarchical_hash))
+            or GroupHash.objects.get_or_create(project=project, hash=root_hierarchical_hash)[0]
+        )
 
         metadata.update(
             hashes.group_metadata_from_hash(
@@ -1513,7 +1629,24 @@ def _save_aggregate(
 
                 return GroupInfo(group, is_new, is_regression)
 
-    group = Group.objects.get(id=existing_grouphash.group_id)
+    try:
+        group = Group.objects.get(id=existing_grouphash.group_id)
+    except Group.DoesNotExist:
+        if not retry_missing_group:
+            raise
+        # A prefetched grouphash may point to a group that has been merged or
+        # deleted since it was looked up. Look up all hashes again.
+        return _save_aggregate(
+            event,
+            hashes,
+            release,
+            metadata,
+            received_timestamp,
+            grouphashes=None,
+            retry_missing_group=False,
+            **kwargs,
+        )
+
     if group.issue_category != GroupCategory.ERROR:
         logger.info(
             "event_manager.category_mismatch",
@@ -1577,6 +1710,7 @@ def _find_existing_grouphash(
     project: Project,
     flat_grouphashes: Sequence[GroupHash],
     hierarchical_hashes: Optional[Sequence[str]],
+    grouphashes: Optional[GroupHashesMapping] = None,
 ) -> tuple[Optional[GroupHash], Optional[str]]:
     all_grouphashes = []
     root_hierarchical_hash = None
@@ -1584,10 +1718,17 @@ def _find_existing_grouphash(
     found_split = False
 
     if hierarchical_hashes:
-        hierarchical_grouphashes = {
-            h.hash: h
-            for h in GroupHash.objects.filter(project=project, hash__in=hierarchical_hashes)
-        }
+        if grouphashes is not None:
+            hierarchical_grouphashes = {
+                hash: grouphashes[(project.id, hash)]
+                for hash in hierarchical_hashes
+                if (project.id, hash) in grouphashes
+            }
+        else:
+            hierarchical_grouphashes = {
+                h.hash: h
+                for h in GroupHash.objects.filter(project=project, hash__in=hierarchical_hashes)
+            }
 
         # Look for splits:
         # 1. If we find a hash with SPLIT state at `n`, we want to use
@@ -3,10 +3,12 @@ from copy import deepcopy
 import sentry_sdk
 
 from sentry import nodestore
+from sentry.db.models.fields.node import prefetch_nodes
 from sentry.eventstore.models import Event
 from sentry.snuba.dataset import Dataset
 from sentry.snuba.events import Columns
 from sentry.utils.services import Service
+from sentry.utils.validators import normalize_event_id
 
 
 class Filter:
@@ -125,6 +127,7 @@ class EventStorage(Service):
         "get_prev_event_id",
         "get_next_event_id",
         "bind_nodes",
+        "prefetch_nodes",
         "get_unfetched_transactions",
     )
 
@@ -265,6 +268,25 @@ class EventStorage(Service):
                 data = node_results.get(node.id) or {}
                 node.bind_data(data, ref=node.get_ref(item))
 
+    def prefetch_nodes(self, project_event_ids):
+        """
+        For a list of ``(project_id, event_id)`` pairs, return a context
+        manager that fetches all their data blobs with a single multi-get
+        command to nodestore. Within the block, events created for those ids
+        (e.g. by `get_event_by_id`) are bound to the prefetched blobs instead
+        of fetching them one by one.
+
+        Use `bind_nodes` instead if the Event objects already exist.
+        """
+        normalized_ids = [
+            (project_id, normalize_event_id(event_id)) for project_id, event_id in project_event_ids
+        ]
+        return prefetch_nodes(
+            Event.generate_node_id(project_id, event_id)
+            for project_id, event_id in normalized_ids
+            if event_id
+        )
+
     def get_unfetched_transactions(
         self,
         snuba_filter,
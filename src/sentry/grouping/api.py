@@ -20,6 +20,9 @@ from sentry.grouping.variants import (
     FallbackVariant,
     SaltedComponentVariant,
 )
+from sentry.utils import metrics
+from sentry.utils.cache import LRUCache
+from sentry.utils.hashlib import md5_text
 from sentry.utils.safe import get_path
 
 HASH_RE = re.compile(r"^[0-9a-f]{32}$")
@@ -44,6 +47,25 @@ _synthetic_exception_type_re = re.compile(
 )
 
 
+# Process-wide caches of parsed grouping configs. All of them are keyed by the
+# content they were built from (config id, hash of the enhancements or rules),
+# so a change to a project's grouping options yields a new key and nothing has
+# to be invalidated explicitly; stale entries simply age out.
+_enhancements_cache = LRUCache(max_size=1000)
+_fingerprinting_rules_cache = LRUCache(max_size=1000)
+_grouping_config_cache = LRUCache(max_size=1000)
+
+
+def _get_from_local_cache(local_cache, cache_name, key):
+    rv = local_cache.get(key)
+    metrics.incr(
+        "grouping.config_cache",
+        tags={"cache": cache_name, "result": "miss" if rv is None else "hit"},
+        skip_internal=True,
+    )
+    return rv
+
+
 class GroupingConfigNotFound(LookupError):
     pass
 
@@ -73,13 +95,17 @@ class GroupingConfigLoader:
         # Instead of parsing and dumping out config here, we can make a
         # shortcut
         from sentry.utils.cache import cache
-        from sentry.utils.hashlib import md5_text
 
         cache_prefix = self.cache_prefix
         cache_prefix += f"{LATEST_VERSION}:"
         cache_key = cache_prefix + md5_text(f"{enhancements_base}|{enhancements}").hexdigest()
+        rv = _get_from_local_cache(_enhancements_cache, "enhancements", cache_key)
+        if rv is not None:
+            return rv
+
         rv = cache.get(cache_key)
         if rv is not None:
+            _enhancements_cache.set(cache_key, rv)
             return rv
 
         try:
@@ -87,6 +113,7 @@ class GroupingConfigLoader:
         except InvalidEnhancerConfig:
             rv = get_default_enhancements()
         cache.set(cache_key, rv)
+        _enhancements_cache.set(cache_key, rv)
         return rv
 
     def _get_config_id(self, project):
@@ -161,7 +188,11 @@ def get_default_grouping_config_dict(id=None):
 
 
 def load_grouping_config(config_dict=None):
-    """Loads the given grouping config."""
+    """Loads the given grouping config.
+
+    Loaded configs are shared within the process, callers must not modify
+    them.
+    """
     if config_dict is None:
         config_dict = get_default_grouping_config_dict()
     elif "id" not in config_dict:
@@ -170,7 +201,19 @@ def load_grouping_config(config_dict=None):
     config_id = config_dict.pop("id")
     if config_id not in CONFIGURATIONS:
         raise GroupingConfigNotFound(config_id)
-    return CONFIGURATIONS[config_id](**config_dict)
+
+    # Only ``enhancements`` are part of the cache key, anything else is rare
+    # enough to be constructed every time.
+    if set(config_dict) - {"enhancements"}:
+        return CONFIGURATIONS[config_id](**config_dict)
+
+    enhancements = config_dict.get("enhancements")
+    cache_key = (config_id, md5_text(enhancements).hexdigest() if enhancements else None)
+    rv = _get_from_local_cache(_grouping_config_cache, "grouping_config", cache_key)
+    if rv is None:
+        rv = CONFIGURATIONS[config_id](**config_dict)
+        _grouping_config_cache.set(cache_key, rv)
+    return rv
 
 
 def load_default_grouping_config():
@@ -185,18 +228,24 @@ def get_fingerprinting_config_for_project(project):
         return FingerprintingRules([])
 
     from sentry.utils.cache import cache
-    from sentry.utils.hashlib import md5_text
 
     cache_key = "fingerprinting-rules:" + md5_text(rules).hexdigest()
+    rv = _get_from_local_cache(_fingerprinting_rules_cache, "fingerprinting_rules", cache_key)
+    if rv is not None:
+        return rv
+
     rv = cache.get(cache_key)
     if rv is not None:
-        return FingerprintingRules.from_json(rv)
+        rv = FingerprintingRules.from_json(rv)
+        _fingerprinting_rules_cache.set(cache_key, rv)
+        return rv
 
     try:
         rv = FingerprintingRules.from_config_string(rules)
     except InvalidFingerprintingConfig:
         rv = FingerprintingRules([])
     cache.set(cache_key, rv.to_json())
+    _fingerprinting_rules_cache.set(cache_key, rv)
     return rv
 
 
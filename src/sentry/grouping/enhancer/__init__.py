@@ -19,6 +19,7 @@ from .matchers import (
     FrameMatch,
     Match,
     create_match_frame,
+    normalize_path_prefix,
 )
 
 # Grammar is defined in EBNF syntax.
@@ -96,6 +97,78 @@ class StacktraceState:
         return f"{hint} by stack trace rule ({description})"
 
 
+class RuleIndex:
+    """Indexes a list of rules by the literal prefixes of their function,
+    module and package matchers and by their family matchers.
+
+    For every stacktrace the index yields the frames each rule can possibly
+    match, which means the full matchers only run on a handful of candidate
+    frames, and rules without any candidate frame are skipped entirely.
+    Only fields which actions never modify are indexed, so candidates can
+    be computed once up front while rules are still applied in order.
+    """
+
+    def __init__(self, rules):
+        self.rules = rules
+        # Maps ``(kind, field)`` to ``{prefix length: {prefix: [rule index]}}``
+        # for prefix guards and to ``{value: [rule index]}`` for exact ones.
+        self._guards = {}
+        self._indexed = set()
+
+        for rule_idx, rule in enumerate(rules):
+            guard = rule.get_index_guard()
+            if guard is None:
+                continue
+            kind, field, values = guard
+            self._indexed.add(rule_idx)
+            buckets = self._guards.setdefault((kind, field), {})
+            if kind == "exact":
+                for value in values:
+                    buckets.setdefault(value, []).append(rule_idx)
+            else:
+                buckets.setdefault(len(values), {}).setdefault(values, []).append(rule_idx)
+
+    def _get_candidate_frames(self, match_frames):
+        rv = {}
+        for (kind, field), buckets in self._guards.items():
+            for frame_idx, match_frame in enumerate(match_frames):
+                value = match_frame[field]
+                if value is None:
+                    continue
+                if kind == "exact":
+                    rule_ids = buckets.get(value, ())
+                else:
+                    if kind == "path_prefix":
+                        value = normalize_path_prefix(value)
+                    rule_ids = [
+                        rule_idx
+                        for length, prefixes in buckets.items()
+                        for rule_idx in prefixes.get(value[:length], ())
+                    ]
+                for rule_idx in rule_ids:
+                    rv.setdefault(rule_idx, []).append(frame_idx)
+        return rv
+
+    def iter_matching_frame_actions(self, match_frames, platform, exception_data, cache):
+        """Yields ``(rule, frame index, action)`` for all matching rules in
+        rule order.  Matching is evaluated lazily, so modifications applied
+        by earlier rules are visible to later ones.
+        """
+        candidates = self._get_candidate_frames(match_frames)
+
+        for rule_idx, rule in enumerate(self.rules):
+            frame_indices = None
+            if rule_idx in self._indexed:
+                frame_indices = candidates.get(rule_idx)
+                if not frame_indices:
+                    continue
+
+            for idx, action in rule.get_matching_frame_actions(
+                match_frames, platform, exception_data, cache, frame_indices=frame_indices
+            ):
+                yield rule, idx, action
+
+
 class Enhancements:
 
     # NOTE: You must add a version to ``VERSIONS`` any time attributes are added
@@ -103,6 +176,10 @@ class Enhancements:
     # from cache.
     # See ``_get_project_enhancements_config`` in src/sentry/grouping/api.py.
 
+    # Evaluate rules through a ``RuleIndex``.  Can be disabled to compare
+    # against evaluating every rule on every frame.
+    use_rule_index = True
+
     def __init__(self, rules, version=None, bases=None, id=None):
         self.id = id
         self.rules = rules
@@ -115,37 +192,47 @@ class Enhancements:
 
         self._modifier_rules = [rule for rule in self.iter_rules() if rule.is_modifier]
         self._updater_rules = [rule for rule in self.iter_rules() if rule.is_updater]
+        self._modifier_index = RuleIndex(self._modifier_rules)
+        self._updater_index = RuleIndex(self._updater_rules)
+
+    def _iter_matching_frame_actions(self, index, match_frames, platform, exception_data):
+        cache = {}
+
+        if self.use_rule_index:
+            yield from index.iter_matching_frame_actions(
+                match_frames, platform, exception_data, cache
+            )
+            return
+
+        for rule in index.rules:
+            for idx, action in rule.get_matching_frame_actions(
+                match_frames, platform, exception_data, cache
+            ):
+                yield rule, idx, action
 
     def apply_modifications_to_frame(self, frames, platform, exception_data):
         """This applies the frame modifications to the frames itself.  This
         does not affect grouping.
         """
 
-        cache = {}
-
         match_frames = [create_match_frame(frame, platform) for frame in frames]
 
-        for rule in self._modifier_rules:
-            for idx, action in rule.get_matching_frame_actions(
-                match_frames, platform, exception_data, cache
-            ):
-                action.apply_modifications_to_frame(frames, match_frames, idx, rule=rule)
+        for rule, idx, action in self._iter_matching_frame_actions(
+            self._modifier_index, match_frames, platform, exception_data
+        ):
+            action.apply_modifications_to_frame(frames, match_frames, idx, rule=rule)
 
     def update_frame_components_contributions(self, components, frames, platform, exception_data):
 
-        cache = {}
-
         match_frames = [create_match_frame(frame, platform) for frame in frames]
 
         stacktrace_state = StacktraceState()
         # Apply direct frame actions and update the stack state alongside
-        for rule in self._updater_rules:
-
-            for idx, action in rule.get_matching_frame_actions(
-                match_frames, platform, exception_data, cache
-            ):
-                action.update_frame_components_contributions(components, frames, idx, rule=rule)
-                action.modify_stacktrace_state(stacktrace_state, rule)
+        for rule, idx, action in self._iter_matching_frame_actions(
+            self._updater_index, match_frames, platform, exception_data
+        ):
+            action.update_frame_components_contributions(components, frames, idx, rule=rule)
+            action.modify_stacktrace_state(stacktrace_state, rule)
 
         # Use the stack state to update frame contributions again to trim
         # down to max-frames.  min-frames is handled on the other hand for
@@ -312,9 +399,31 @@ class Rule:
             matchers[matcher.key] = matcher.pattern
         return {"match": matchers, "actions": [str(x) for x in self.actions]}
 
-    def get_matching_frame_actions(self, frames, platform, exception_data=None, cache=None):
+    def get_index_guard(self):
+        """Returns the most selective index guard of this rule's frame
+        matchers, see ``RuleIndex``.
+        """
+        best = None
+        for matcher in self._other_matchers:
+            if not isinstance(matcher, FrameMatch):
+                continue
+            guard = matcher.get_index_guard()
+            if guard is None:
+                continue
+            # Any literal prefix is preferred over a family guard
+            if best is None or (
+                guard[0] != "exact" and (best[0] == "exact" or len(guard[2]) > len(best[2]))
+            ):
+                best = guard
+        return best
+
+    def get_matching_frame_actions(
+        self, frames, platform, exception_data=None, cache=None, frame_indices=None
+    ):
         """Given a frame returns all the matching actions based on this rule.
         If the rule does not match `None` is returned.
+
+        If `frame_indices` is given only those frames are considered.
         """
         if not self.matchers:
             return []
@@ -327,7 +436,10 @@ class Rule:
         rv = []
 
         # 2 - Check if frame matchers match
-        for idx, frame in enumerate(frames):
+        if frame_indices is None:
+            frame_indices = range(len(frames))
+
+        for idx in frame_indices:
             if all(
                 m.matches_frame(frames, idx, platform, exception_data, cache)
                 for m in self._other_matchers
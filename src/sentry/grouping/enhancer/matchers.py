@@ -24,6 +24,10 @@ MATCH_KEYS = {
 }
 SHORT_MATCH_KEYS = {v: k for k, v in MATCH_KEYS.items()}
 
+# Characters that end the literal part of a glob pattern.
+GLOB_SPECIAL_CHARS = frozenset(b"*?[]{}\\")
+PATH_SEPARATORS = b"/\\."
+
 assert len(SHORT_MATCH_KEYS) == len(MATCH_KEYS)  # assert short key names are not reused
 
 FAMILIES = {"native": "N", "javascript": "J", "all": "a"}
@@ -176,6 +180,14 @@ class FrameMatch(Match):
         # Implement is subclasses
         raise NotImplementedError
 
+    def get_index_guard(self):
+        """Returns a ``(kind, field, values)`` tuple describing a cheap
+        precondition every frame matched by this matcher fulfills, or
+        `None` if there is none.  Only fields which are never modified by
+        actions may be used here, see ``RuleIndex``.
+        """
+        return None
+
     def _to_config_structure(self, version):
         if self.key == "family":
             arg = "".join(_f for _f in [FAMILIES.get(x) for x in self.pattern.split(",")] if _f)
@@ -186,6 +198,24 @@ class FrameMatch(Match):
         return ("!" if self.negated else "") + MATCH_KEYS[self.key] + arg
 
 
+def get_literal_prefix(pattern: bytes) -> bytes:
+    """Returns the part of a glob pattern before its first special character.
+    Every value matched by the pattern starts with this prefix.
+    """
+    for idx, char in enumerate(pattern):
+        if char in GLOB_SPECIAL_CHARS:
+            return pattern[:idx]
+    return pattern
+
+
+def normalize_path_prefix(value: bytes) -> bytes:
+    """Strips leading separators so that path-like values can be compared
+    against prefixes regardless of ``path_normalize`` and the implicit
+    leading slash added by ``path_like_match``.
+    """
+    return value.lstrip(PATH_SEPARATORS)
+
+
 def path_like_match(pattern, value):
     """Stand-alone function for use with ``cached``"""
     if glob_match(value, pattern, ignorecase=False, doublestar=True, path_normalize=True):
@@ -209,6 +239,17 @@ class PathLikeMatch(FrameMatch):
 
         return cached(cache, path_like_match, self._encoded_pattern, value)
 
+    def get_index_guard(self):
+        if self.negated:
+            return None
+        # Path normalization may rewrite separators, so only the literal part
+        # up to the first separator is a safe precondition.
+        prefix = normalize_path_prefix(get_literal_prefix(self._encoded_pattern))
+        prefix = prefix.split(b"/")[0].split(b"\\")[0]
+        if not prefix:
+            return None
+        return ("path_prefix", self.field, prefix)
+
 
 class PackageMatch(PathLikeMatch):
 
@@ -231,6 +272,11 @@ class FamilyMatch(FrameMatch):
 
         return match_frame["family"] in self._flags
 
+    def get_index_guard(self):
+        if self.negated or b"all" in self._flags:
+            return None
+        return ("exact", "family", self._flags)
+
 
 class InAppMatch(FrameMatch):
     def __init__(self, *args, **kwargs):
@@ -243,10 +289,25 @@ class InAppMatch(FrameMatch):
 
 
 class FunctionMatch(FrameMatch):
+
+    field = "function"
+
     def _positive_frame_match(self, match_frame, platform, exception_data, cache):
 
         return cached(cache, glob_match, match_frame["function"], self._encoded_pattern)
 
+    def get_index_guard(self):
+        return _get_prefix_guard(self)
+
+
+def _get_prefix_guard(matcher):
+    if matcher.negated:
+        return None
+    prefix = get_literal_prefix(matcher._encoded_pattern)
+    if not prefix:
+        return None
+    return ("prefix", matcher.field, prefix)
+
 
 class FrameFieldMatch(FrameMatch):
     def _positive_frame_match(self, match_frame, platform, exception_data, cache):
@@ -261,6 +322,9 @@ class ModuleMatch(FrameFieldMatch):
 
     field = "module"
 
+    def get_index_guard(self):
+        return _get_prefix_guard(self)
+
 
 class CategoryMatch(FrameFieldMatch):
 
@@ -22,7 +22,7 @@ import sentry_sdk
 from django.conf import settings
 from django.core.cache import cache
 
-from sentry import eventstore, features
+from sentry import eventstore, features, options
 from sentry.attachments import CachedAttachment, attachment_cache
 from sentry.event_manager import save_attachment
 from sentry.eventstore.processing import event_processing_store
@@ -31,7 +31,12 @@ from sentry.ingest.userreport import Conflict, save_userreport
 from sentry.killswitches import killswitch_matches_context
 from sentry.models import Project
 from sentry.signals import event_accepted
-from sentry.tasks.store import preprocess_event, save_event_transaction
+from sentry.tasks.store import (
+    can_save_event_in_batch,
+    preprocess_event,
+    save_event_batch,
+    save_event_transaction,
+)
 from sentry.utils import json, metrics
 from sentry.utils.batching_kafka_consumer import AbstractBatchWorker
 from sentry.utils.cache import cache_key_for_event
@@ -56,6 +61,15 @@ class AsyncResult(NamedTuple):  # TODO: Use Generic[T] with 3.7+
 Message = Any
 
 
+class BatchedEvent(NamedTuple):
+    cache_key: str
+    data: Any
+    start_time: float
+    event_id: str
+    project_id: int
+    on_saved: Callable[[], None]
+
+
 class IngestConsumerWorker(AbstractBatchWorker):
     def __init__(self, process_event_executor: Optional[ThreadPoolExecutor] = None) -> None:
         self.__process_event_executor = process_event_executor
@@ -96,13 +110,21 @@ class IngestConsumerWorker(AbstractBatchWorker):
 
         projects_to_fetch = set()
 
+        # Error events that can skip preprocessing are collected here and
+        # saved together once the whole batch has been dispatched.
+        save_batch: Optional[MutableSequence[BatchedEvent]] = None
+        process_event_func = self.__process_event
+        if options.get("store.ingest-consumer-batch-save-errors"):
+            save_batch = []
+            process_event_func = functools.partial(self.__process_event, save_batch=save_batch)
+
         with metrics.timer("ingest_consumer.prepare_messages"):
             for message in batch:
                 message_type = message["type"]
                 projects_to_fetch.add(message["project_id"])
 
                 if message_type == "event":
-                    other_messages.append((self.__process_event, message))
+                    other_messages.append((process_event_func, message))
                 elif message_type == "attachment_chunk":
                     attachment_chunks.append(message)
                 elif message_type == "attachment":
@@ -148,6 +170,12 @@ class IngestConsumerWorker(AbstractBatchWorker):
                     (time.monotonic() - other_messages_flush_start) / len(other_messages),
                 )
 
+        if save_batch:
+            with metrics.timer("ingest_consumer.save_event_batch"):
+                save_event_batch([event._asdict() for event in save_batch], projects)
+            for event in save_batch:
+                event.on_saved()
+
     def shutdown(self):
         if self.__process_event_executor is not None:
             self.__process_event_executor.shutdown()
@@ -169,8 +197,12 @@ def trace_func(**span_kwargs):
 
 
 @metrics.wraps("ingest_consumer.process_event")
-def _do_process_event(message: Message, projects: Mapping[int, Project]) -> None:
-    result = _load_event(message, projects)
+def _do_process_event(
+    message: Message,
+    projects: Mapping[int, Project],
+    save_batch: Optional[MutableSequence[BatchedEvent]] = None,
+) -> None:
+    result = _load_event(message, projects, save_batch)
     if result is None:
         return
 
@@ -179,7 +211,9 @@ def _do_process_event(message: Message, projects: Mapping[int, Project]) -> None
 
 
 def _load_event(
-    message: Message, projects: Mapping[int, Project]
+    message: Message,
+    projects: Mapping[int, Project],
+    save_batch: Optional[MutableSequence[BatchedEvent]] = None,
 ) -> Optional[Tuple[Any, Callable[[str], None]]]:
     """
     Perform some initial filtering and deserialize the message payload. If the
@@ -187,6 +221,9 @@ def _load_event(
     function that can be called with the event's storage key to resume
     processing after the event has been persisted and is available to be read by
     other processing components.
+
+    If ``save_batch`` is given, events that can be saved without preprocessing
+    are appended to it instead of being dispatched to ``preprocess_event``.
     """
     payload = message["payload"]
     start_time = float(message["start_time"])
@@ -267,7 +304,20 @@ def _load_event(
     ):
         return
 
+    def mark_accepted() -> None:
+        # remember for an 1 hour that we saved this event (deduplication protection)
+        cache.set(deduplication_key, "", CACHE_TIMEOUT)
+
+        # emit event_accepted once everything is done
+        event_accepted.send_robust(ip=remote_addr, data=data, project=project, sender=process_event)
+
     def dispatch_task(cache_key: str) -> None:
+        if save_batch is not None and can_save_event_in_batch(data, bool(attachments)):
+            save_batch.append(
+                BatchedEvent(cache_key, data, start_time, event_id, project_id, mark_accepted)
+            )
+            return
+
         if attachments:
             with sentry_sdk.start_span(op="ingest_consumer.set_attachment_cache"):
                 attachment_objects = [
@@ -303,11 +353,7 @@ def _load_event(
                     has_attachments=bool(attachments),
                 )
 
-        # remember for an 1 hour that we saved this event (deduplication protection)
-        cache.set(deduplication_key, "", CACHE_TIMEOUT)
-
-        # emit event_accepted once everything is done
-        event_accepted.send_robust(ip=remote_addr, data=data, project=project, sender=process_event)
+        mark_accepted()
 
     return data, dispatch_task
 
@@ -318,14 +364,21 @@ def _store_event(data) -> str:
 
 
 @trace_func(name="ingest_consumer.process_event")
-def process_event(message: Message, projects: Mapping[int, Project]) -> None:
-    return _do_process_event(message, projects)
+def process_event(
+    message: Message,
+    projects: Mapping[int, Project],
+    save_batch: Optional[MutableSequence[BatchedEvent]] = None,
+) -> None:
+    return _do_process_event(message, projects, save_batch)
 
 
 def process_event_async(
-    executor: ThreadPoolExecutor, message: Message, projects: Mapping[int, Project]
+    executor: ThreadPoolExecutor,
+    message: Message,
+    projects: Mapping[int, Project],
+    save_batch: Optional[MutableSequence[BatchedEvent]] = None,
 ) -> Optional["AsyncResult[str]"]:
-    result = _load_event(message, projects)
+    result = _load_event(message, projects, save_batch)
     if result is None:
         return None
 
@@ -154,3 +154,14 @@ class IssueOccurrence:
         if results:
             return IssueOccurrence.from_dict(results)
         return None
+
+    @classmethod
+    def fetch_multi(
+        cls, ids: Sequence[str], project_id: int
+    ) -> Sequence[Optional[IssueOccurrence]]:
+        node_ids = [cls.build_storage_identifier(id_, project_id) for id_ in ids]
+        results = nodestore.get_multi(node_ids)
+        return [
+            IssueOccurrence.from_dict(results[node_id]) if results.get(node_id) else None
+            for node_id in node_ids
+        ]
@@ -119,6 +119,32 @@ class ProjectOptionManager(OptionManager["Project"]):
         values: Mapping[str, Value] = self._option_cache.get(cache_key, {})
         return values
 
+    def preload_all_values(self, project_ids: Sequence[int]) -> None:
+        """Loads the options of many projects into the local cache at once, with a single
+        cache read and at most a single query, so that subsequent ``get_value`` calls do not
+        hit the cache or database per project.
+        """
+        cache_keys = {
+            self._make_key(project_id): project_id
+            for project_id in project_ids
+            if self._make_key(project_id) not in self._option_cache
+        }
+        if not cache_keys:
+            return
+
+        cached = cache.get_many(list(cache_keys))
+        self._option_cache.update(cached)
+
+        missing = [project_id for key, project_id in cache_keys.items() if key not in cached]
+        if not missing:
+            return
+
+        results: dict[str, dict[str, Value]] = {self._make_key(i): {} for i in missing}
+        for option in self.filter(project__in=missing):
+            results[self._make_key(option.project_id)][option.key] = option.value
+        cache.set_many(results)
+        self._option_cache.update(results)
+
     def reload_cache(self, project_id: int, update_reason: str) -> Mapping[str, Value]:
         if update_reason != "projectoption.get_all_values":
             # this hook may be called from model hooks during an
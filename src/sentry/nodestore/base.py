@@ -65,6 +65,7 @@ class NodeStorage(local, Service):
         "get_multi",
         "set",
         "set_subkeys",
+        "set_subkeys_multi",
         "cleanup",
         "validate",
         "bootstrap",
@@ -246,6 +247,30 @@ class NodeStorage(local, Service):
             # set cache only after encoding and write to nodestore has succeeded
             self._set_cache_item(id, cache_item)
 
+    def _set_bytes_multi(self, items, ttl=None):
+        """
+        >>> nodestore._set_bytes_multi({'key1': b"{'foo': 'bar'}"})
+        """
+        for id, data in items.items():
+            self._set_bytes(id, data, ttl=ttl)
+
+    def set_subkeys_multi(self, items, ttl=None):
+        """
+        Set values and subkeys for many ids at once.
+
+        >>> nodestore.set_subkeys_multi({
+        ...    'key1': {None: {'foo': 'bar'}},
+        ...    'key2': {None: {'foo': 'baz'}, "unprocessed": {'foo': 'bam'}},
+        ... })
+        """
+        with sentry_sdk.start_span(op="nodestore.set_subkeys_multi") as span:
+            span.set_data("num_ids", len(items))
+            cache_items = {id: data.get(None) for id, data in items.items()}
+            bytes_data = {id: self._encode(data) for id, data in items.items()}
+            self._set_bytes_multi(bytes_data, ttl=ttl)
+            # set cache only after encoding and write to nodestore has succeeded
+            self._set_cache_items({id: data for id, data in cache_items.items() if data})
+
     def cleanup(self, cutoff_timestamp):
         raise NotImplementedError
 
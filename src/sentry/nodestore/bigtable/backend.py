@@ -67,6 +67,14 @@ class BigtableNodeStorage(NodeStorage):
     def _set_bytes(self, id, data, ttl=None):
         self.store.set(id, data, ttl)
 
+    def _set_bytes_multi(self, items, ttl=None):
+        if len(items) == 1:
+            ((id, data),) = items.items()
+            self._set_bytes(id, data, ttl=ttl)
+            return
+
+        self.store.set_many(items, ttl)
+
     def delete(self, id):
         if self.skip_deletes:
             return
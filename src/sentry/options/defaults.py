@@ -88,6 +88,11 @@ register("mail.reply-hostname", default="", flags=FLAG_ALLOW_EMPTY | FLAG_PRIORI
 register("mail.mailgun-api-key", default="", flags=FLAG_ALLOW_EMPTY | FLAG_PRIORITIZE_DISK)
 register("mail.timeout", default=10, type=Int, flags=FLAG_ALLOW_EMPTY | FLAG_PRIORITIZE_DISK)
 
+# Digests
+# Whether digest records store references to events as JSON instead of pickled events. Only enable
+# once every worker runs a release that decodes JSON records.
+register("digests.write-event-references", default=False)
+
 # TOTP (Auth app)
 register(
     "totp.disallow-new-enrollment",
@@ -316,6 +321,14 @@ register("post-process.use-error-hook-sampling", default=False)  # unused
 # From 0.0 to 1.0: Randomly enqueue process_resource_change task
 register("post-process.error-hook-sample-rate", default=0.0)  # unused
 
+# From 0.0 to 1.0: Randomly log the wall time, CPU time and calls to the database, redis and snuba
+# of every post process pipeline step for an event.
+register("post-process.step-profile-sample-rate", default=0.0)
+
+# Seconds for which the counts queried by event frequency conditions are reused for later events
+# of the same issue. With 0, counts are only shared between the rules evaluated for one event.
+register("rules.frequency-query-memo-ttl", default=0)
+
 # Transaction events
 # True => kill switch to disable ingestion of transaction events for internal project.
 register("transaction-events.force-disable-internal-project", default=False)
@@ -444,6 +457,11 @@ register("symbolicate-event.low-priority.metrics.submission-rate", default=0.0)
 # special save_event task for transactions avoiding the preprocess.
 register("store.save-transactions-ingest-consumer-rate", default=0.0)
 
+# Save error events that need neither symbolication nor plugin processing
+# directly in the ingest consumer, one multi-event batch per Kafka batch,
+# instead of going through preprocess_event and save_event.
+register("store.ingest-consumer-batch-save-errors", default=False)
+
 # Drop delete_old_primary_hash messages for a particular project.
 register("reprocessing2.drop-delete-old-primary-hash", default=[])
 
@@ -597,6 +615,14 @@ register("performance.issues.render_blocking_assets.fcp_minimum_threshold", defa
 register("performance.issues.render_blocking_assets.fcp_maximum_threshold", default=10000.0)
 register("performance.issues.render_blocking_assets.fcp_ratio_threshold", default=0.33)
 register("performance.issues.render_blocking_assets.size_threshold", default=1000000)
+# Seconds for which cached per-project detection settings are used without re-reading options.
+# With 0, options are read for every event but settings and detectors are still reused. Those
+# reads are served from the in-process option caches, and 0 applies option changes to the next
+# event.
+register("performance.issues.settings-cache-ttl", default=0)
+# Summed size of the mapping files whose proguard mappers are kept open for deobfuscating
+# call stacks of file IO on main thread problems.
+register("performance.issues.proguard-mapper-cache-bytes", default=256 * 1024 * 1024)
 
 # Dynamic Sampling system wide options
 # Killswitch to disable new dynamic sampling behavior specifically new dynamic sampling biases
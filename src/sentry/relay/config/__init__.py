@@ -33,7 +33,7 @@ from sentry.ingest.inbound_filters import (
 )
 from sentry.ingest.transaction_clusterer.rules import get_sorted_rules
 from sentry.interfaces.security import DEFAULT_DISALLOWED_SOURCES
-from sentry.models import Project, ProjectKey
+from sentry.models import Organization, Project, ProjectKey
 from sentry.relay.config.metric_extraction import get_metric_conditional_tagging_rules
 from sentry.relay.utils import to_camel_case_name
 from sentry.utils import metrics
@@ -55,13 +55,37 @@ EXTRACT_ABNORMAL_MECHANISM_VERSION = 2
 
 logger = logging.getLogger(__name__)
 
+#: Memoizes organization-level parts of project configs across the projects
+#: of one organization, see :func:`get_project_config`.
+OrganizationConfigCache = MutableMapping[Any, Any]
 
-def get_exposed_features(project: Project) -> Sequence[str]:
+
+def _org_cached(
+    org_cache: Optional[OrganizationConfigCache], func: Callable[..., Any], *args: Any
+) -> Any:
+    """Calls ``func(*args)``, reusing the result from ``org_cache`` if given.
+
+    Only use this for values which depend on nothing but the organization.
+    """
+    if org_cache is None:
+        return func(*args)
+
+    cache_key = (func, *args)
+    try:
+        return org_cache[cache_key]
+    except KeyError:
+        rv = org_cache[cache_key] = func(*args)
+        return rv
+
+
+def get_exposed_features(
+    project: Project, org_cache: Optional[OrganizationConfigCache] = None
+) -> Sequence[str]:
 
     active_features = []
     for feature in EXPOSABLE_FEATURES:
         if feature.startswith("organizations:"):
-            has_feature = features.has(feature, project.organization)
+            has_feature = _org_cached(org_cache, features.has, feature, project.organization)
         elif feature.startswith("projects:"):
             has_feature = features.has(feature, project)
         else:
@@ -137,7 +161,10 @@ def get_quotas(project: Project, keys: Optional[Sequence[ProjectKey]] = None) ->
 
 
 def get_project_config(
-    project: Project, full_config: bool = True, project_keys: Optional[Sequence[ProjectKey]] = None
+    project: Project,
+    full_config: bool = True,
+    project_keys: Optional[Sequence[ProjectKey]] = None,
+    org_cache: Optional[OrganizationConfigCache] = None,
 ) -> "ProjectConfig":
     """Constructs the ProjectConfig information.
     :param project: The project to load configuration for. Ensure that
@@ -150,12 +177,17 @@ def get_project_config(
         no project keys are provided it is assumed that the config does not
         need to contain auth information (this is the case when used in
         python's StoreView)
+    :param org_cache: An optional dict that is shared between calls for projects of the
+        same organization, so that organization-level values such as features and retention
+        are only computed once.  Pass a new dict for every organization.
     :return: a ProjectConfig object for the given project
     """
     with sentry_sdk.push_scope() as scope:
         scope.set_tag("project", project.id)
         with metrics.timer("relay.config.get_project_config.duration"):
-            return _get_project_config(project, full_config=full_config, project_keys=project_keys)
+            return _get_project_config(
+                project, full_config=full_config, project_keys=project_keys, org_cache=org_cache
+            )
 
 
 def get_dynamic_sampling_config(project: Project) -> Optional[Mapping[str, Any]]:
@@ -238,8 +270,15 @@ def _should_extract_abnormal_mechanism(project: Project) -> bool:
     )
 
 
+def _get_trusted_relays(organization: Organization) -> List[str]:
+    return [r["public_key"] for r in organization.get_option("sentry:trusted-relays", []) if r]
+
+
 def _get_project_config(
-    project: Project, full_config: bool = True, project_keys: Optional[Sequence[ProjectKey]] = None
+    project: Project,
+    full_config: bool = True,
+    project_keys: Optional[Sequence[ProjectKey]] = None,
+    org_cache: Optional[OrganizationConfigCache] = None,
 ) -> "ProjectConfig":
     if project.status != ObjectStatus.VISIBLE:
         return ProjectConfig(project, disabled=True)
@@ -257,14 +296,10 @@ def _get_project_config(
             "publicKeys": public_keys,
             "config": {
                 "allowedDomains": list(get_origins(project)),
-                "trustedRelays": [
-                    r["public_key"]
-                    for r in project.organization.get_option("sentry:trusted-relays", [])
-                    if r
-                ],
+                "trustedRelays": _org_cached(org_cache, _get_trusted_relays, project.organization),
                 "piiConfig": get_pii_config(project),
                 "datascrubbingSettings": get_datascrubbing_settings(project),
-                "features": get_exposed_features(project),
+                "features": get_exposed_features(project, org_cache),
             },
             "organizationId": project.organization_id,
             "projectId": project.id,  # XXX: Unused by Relay, required by Python store
@@ -289,7 +324,7 @@ def _get_project_config(
 
     config["breakdownsV2"] = project.get_option("sentry:breakdowns")
 
-    if _should_extract_transaction_metrics(project):
+    if _should_extract_transaction_metrics(project, org_cache):
         add_experimental_config(
             config,
             "transactionMetrics",
@@ -305,13 +340,18 @@ def _get_project_config(
             config, "metricConditionalTagging", get_metric_conditional_tagging_rules, project
         )
 
-    if features.has("organizations:metrics-extraction", project.organization):
+    if _org_cached(
+        org_cache, features.has, "organizations:metrics-extraction", project.organization
+    ):
         config["sessionMetrics"] = {
             "version": EXTRACT_ABNORMAL_MECHANISM_VERSION
             if _should_extract_abnormal_mechanism(project)
             else EXTRACT_METRICS_VERSION,
-            "drop": features.has(
-                "organizations:release-health-drop-sessions", project.organization
+            "drop": _org_cached(
+                org_cache,
+                features.has,
+                "organizations:release-health-drop-sessions",
+                project.organization,
             ),
         }
 
@@ -321,7 +361,9 @@ def _get_project_config(
     with Hub.current.start_span(op="get_grouping_config_dict_for_project"):
         config["groupingConfig"] = get_grouping_config_dict_for_project(project)
     with Hub.current.start_span(op="get_event_retention"):
-        config["eventRetention"] = quotas.get_event_retention(project.organization)
+        config["eventRetention"] = _org_cached(
+            org_cache, quotas.get_event_retention, project.organization
+        )
     with Hub.current.start_span(op="get_all_quotas"):
         config["quotas"] = get_quotas(project, keys=project_keys)
 
@@ -538,9 +580,16 @@ class TransactionMetricsSettings(TypedDict):
     acceptTransactionNames: TransactionNameStrategy
 
 
-def _should_extract_transaction_metrics(project: Project) -> bool:
-    return features.has(
-        "organizations:transaction-metrics-extraction", project.organization
+def _should_extract_transaction_metrics(
+    project: Project, org_cache: Optional[OrganizationConfigCache] = None
+) -> bool:
+    return bool(
+        _org_cached(
+            org_cache,
+            features.has,
+            "organizations:transaction-metrics-extraction",
+            project.organization,
+        )
     ) and not killswitches.killswitch_matches_context(
         "relay.drop-transaction-metrics", {"project_id": project.id}
     )
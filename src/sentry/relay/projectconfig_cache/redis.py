@@ -1,4 +1,5 @@
 import logging
+import threading
 
 import zstandard
 
@@ -12,7 +13,37 @@ COMPRESSION_LEVEL = 3  # 3 is the default level of compression
 logger = logging.getLogger(__name__)
 
 
+class UnknownCompressionDictionary(Exception):
+    pass
+
+
+def load_compression_dictionary(path):
+    """Loads a zstd dictionary trained with `zstandard.train_dictionary` (or `zstd --train`).
+
+    Raw content dictionaries are rejected: they have no dictionary id, so frames compressed
+    with them could not be told apart from frames compressed without a dictionary.
+    """
+    with open(path, "rb") as f:
+        dictionary = zstandard.ZstdCompressionDict(f.read(), dict_type=zstandard.DICT_TYPE_FULLDICT)
+    if not dictionary.dict_id():
+        raise ValueError(f"zstd dictionary {path} has no dictionary id")
+    return dictionary
+
+
 class RedisProjectConfigCache(ProjectConfigCache):
+    """
+    Stores project configs as zstd compressed JSON.
+
+    When the `compression_dictionary` option points to a trained zstd dictionary, configs are
+    compressed with it.  The id of the dictionary is part of the zstd frame header, which is
+    how readers select the dictionary to decompress with.  Dictionaries listed in
+    `compression_dictionaries` are only used for reading, so that payloads written with a
+    previous dictionary stay readable while it is being rotated out.  Payloads compressed
+    without a dictionary and raw JSON are always readable.
+
+    Relay reads this cache as well: only enable a dictionary once every reader has it.
+    """
+
     def __init__(self, **options):
         cluster_key = options.get("cluster", "default")
         self.cluster = redis.redis_clusters.get(cluster_key)
@@ -20,6 +51,20 @@ class RedisProjectConfigCache(ProjectConfigCache):
         read_cluster_key = options.get("read_cluster", cluster_key)
         self.cluster_read = redis.redis_clusters.get(read_cluster_key)
 
+        self.compression_dictionary = None
+        self.decompression_dictionaries = {}
+        for path in options.get("compression_dictionaries", ()):
+            dictionary = load_compression_dictionary(path)
+            self.decompression_dictionaries[dictionary.dict_id()] = dictionary
+        if options.get("compression_dictionary"):
+            dictionary = load_compression_dictionary(options["compression_dictionary"])
+            dictionary.precompute_compress(level=COMPRESSION_LEVEL)
+            self.compression_dictionary = dictionary
+            self.decompression_dictionaries[dictionary.dict_id()] = dictionary
+
+        # zstd (de)compressors must not be shared between threads.
+        self._local = threading.local()
+
         super().__init__(**options)
 
     def validate(self):
@@ -28,6 +73,33 @@ class RedisProjectConfigCache(ProjectConfigCache):
     def __get_redis_key(self, public_key):
         return f"relayconfig:{public_key}"
 
+    def __compress(self, data):
+        if self.compression_dictionary is None:
+            return zstandard.compress(data, level=COMPRESSION_LEVEL)
+
+        compressor = getattr(self._local, "compressor", None)
+        if compressor is None:
+            compressor = self._local.compressor = zstandard.ZstdCompressor(
+                level=COMPRESSION_LEVEL, dict_data=self.compression_dictionary
+            )
+        return compressor.compress(data)
+
+    def __decompress(self, data):
+        dict_id = zstandard.get_frame_parameters(data).dict_id
+        if not dict_id:
+            return zstandard.decompress(data)
+
+        decompressors = getattr(self._local, "decompressors", None)
+        if decompressors is None:
+            decompressors = self._local.decompressors = {}
+        decompressor = decompressors.get(dict_id)
+        if decompressor is None:
+            dictionary = self.decompression_dictionaries.get(dict_id)
+            if dictionary is None:
+                raise UnknownCompressionDictionary(dict_id)
+            decompressor = decompressors[dict_id] = zstandard.ZstdDecompressor(dict_data=dictionary)
+        return decompressor.decompress(data)
+
     def set_many(self, configs):
         metrics.incr("relay.projectconfig_cache.write", amount=len(configs), tags={"action": "set"})
 
@@ -35,7 +107,7 @@ class RedisProjectConfigCache(ProjectConfigCache):
         p = self.cluster.pipeline()
         for public_key, config in configs.items():
             serialized = json.dumps(config).encode()
-            compressed = zstandard.compress(serialized, level=COMPRESSION_LEVEL)
+            compressed = self.__compress(serialized)
             metrics.timing("relay.projectconfig_cache.uncompressed_size", len(serialized))
             metrics.timing("relay.projectconfig_cache.size", len(compressed))
 
@@ -54,13 +126,35 @@ class RedisProjectConfigCache(ProjectConfigCache):
             "relay.projectconfig_cache.write", amount=sum(return_values), tags={"action": "delete"}
         )
 
-    def get(self, public_key):
-        rv = self.cluster_read.get(self.__get_redis_key(public_key))
+    def __load(self, rv):
         if rv is not None:
             try:
-                rv = zstandard.decompress(rv).decode()
+                rv = self.__decompress(rv).decode()
             except (TypeError, zstandard.ZstdError):
                 # assume raw json
                 pass
+            except UnknownCompressionDictionary as e:
+                # Written with a dictionary this process does not know about.  Treat it as a
+                # cache miss, the config gets recomputed and written with our dictionary.
+                logger.warning(
+                    "relay.projectconfig_cache.unknown_dictionary", extra={"dict_id": e.args[0]}
+                )
+                return None
             return json.loads(rv)
         return None
+
+    def get(self, public_key):
+        return self.__load(self.cluster_read.get(self.__get_redis_key(public_key)))
+
+    def get_many(self, public_keys):
+        public_keys = list(public_keys)
+        if not public_keys:
+            return {}
+
+        # Note: Those are multiple pipelines, one per cluster node
+        with self.cluster_read.pipeline() as p:
+            for public_key in public_keys:
+                p.get(self.__get_redis_key(public_key))
+            values = p.execute()
+
+        return {public_key: self.__load(value) for public_key, value in zip(public_keys, values)}
@@ -17,7 +17,13 @@ class ProjectConfigDebounceCache(Service):
     multiple instances of this debounce cache with different keys.
     """
 
-    __all__ = ("is_debounced", "debounce", "mark_task_done")
+    __all__ = (
+        "is_debounced",
+        "debounce",
+        "is_debounced_many",
+        "debounce_many",
+        "mark_task_done",
+    )
 
     def __init__(self, **options):
         pass
@@ -37,6 +43,23 @@ class ProjectConfigDebounceCache(Service):
         The highest-scoped argument passed in will be debounced.
         """
 
+    def is_debounced_many(self, *, public_keys):
+        """Checks many public keys at once.
+
+        Returns the subset of ``public_keys`` which are debounced.  Unlike `is_debounced`
+        only the public key scope is checked.
+        """
+        return {
+            public_key
+            for public_key in public_keys
+            if self.is_debounced(public_key=public_key, project_id=None, organization_id=None)
+        }
+
+    def debounce_many(self, *, public_keys):
+        """Debounces many public keys at once, without performing any checks."""
+        for public_key in public_keys:
+            self.debounce(public_key=public_key, project_id=None, organization_id=None)
+
     def mark_task_done(self, *, public_key, project_id, organization_id):
         """
         Mark a task done such that `is_debounced` starts emitting False
@@ -60,6 +60,47 @@ class RedisProjectConfigDebounceCache(ProjectConfigDebounceCache):
         client.setex(key, self._debounce_ttl, 1)
         metrics.incr("relay.projectconfig_debounce_cache.debounce")
 
+    def is_debounced_many(self, *, public_keys):
+        keys = {
+            public_key: self._get_redis_key(
+                public_key=public_key, project_id=None, organization_id=None
+            )
+            for public_key in public_keys
+        }
+        if not keys:
+            return set()
+
+        if self.is_redis_cluster:
+            with self.cluster.pipeline() as pipeline:
+                for key in keys.values():
+                    pipeline.get(key)
+                values = dict(zip(keys, pipeline.execute()))
+        else:
+            with self.cluster.map() as client:
+                promises = {public_key: client.get(key) for public_key, key in keys.items()}
+            values = {public_key: promise.value for public_key, promise in promises.items()}
+
+        return {public_key for public_key, value in values.items() if value}
+
+    def debounce_many(self, *, public_keys):
+        keys = [
+            self._get_redis_key(public_key=public_key, project_id=None, organization_id=None)
+            for public_key in public_keys
+        ]
+        if not keys:
+            return
+
+        if self.is_redis_cluster:
+            with self.cluster.pipeline() as pipeline:
+                for key in keys:
+                    pipeline.setex(key, self._debounce_ttl, 1)
+                pipeline.execute()
+        else:
+            with self.cluster.map() as client:
+                for key in keys:
+                    client.setex(key, self._debounce_ttl, 1)
+        metrics.incr("relay.projectconfig_debounce_cache.debounce", amount=len(keys))
+
     def mark_task_done(self, *, public_key, project_id, organization_id):
         key = self._get_redis_key(public_key, project_id, organization_id)
         client = self._get_redis_client(key)
@@ -5,13 +5,13 @@ import contextlib
 import logging
 import re
 from datetime import datetime, timedelta
-from typing import Any, Dict, Mapping, Tuple
+from typing import Any, Dict, List, Mapping, MutableMapping, Tuple
 
 from django import forms
 from django.core.cache import cache
 from django.utils import timezone
 
-from sentry import release_health, tsdb
+from sentry import options, release_health, tsdb
 from sentry.eventstore.models import GroupEvent
 from sentry.issues.constants import get_issue_tsdb_group_model, get_issue_tsdb_user_group_model
 from sentry.receivers.rules import DEFAULT_RULE_LABEL
@@ -23,6 +23,7 @@ from sentry.types.condition_activity import (
     round_to_five_minute,
 )
 from sentry.utils import metrics
+from sentry.utils.hashlib import hash_values
 from sentry.utils.snuba import options_override
 
 standard_intervals = {
@@ -95,6 +96,7 @@ class BaseEventFrequencyCondition(EventCondition, abc.ABC):
 
     def __init__(self, *args: Any, **kwargs: Any) -> None:
         self.tsdb = kwargs.pop("tsdb", tsdb)
+        self.query_cache: EventFrequencyQueryCache | None = kwargs.pop("query_cache", None)
         self.form_fields = {
             "value": {"type": "number", "placeholder": 100},
             "interval": {
@@ -163,7 +165,20 @@ class BaseEventFrequencyCondition(EventCondition, abc.ABC):
         raise NotImplementedError
 
     def query(self, event: GroupEvent, start: datetime, end: datetime, environment_id: str) -> int:
-        query_result = self.query_hook(event, start, end, environment_id)
+        if self.query_cache is not None:
+            return self.query_cache.get(self, event, start, end, environment_id)
+        return self.run_query(event, start, end, environment_id)
+
+    def run_query(
+        self, event: GroupEvent, start: datetime, end: datetime, environment_id: str
+    ) -> int:
+        # For conditions with interval >= 1 hour we don't need to worry about read your writes
+        # consistency. Disable it so that we can scale to more nodes.
+        option_override_cm = contextlib.nullcontext()
+        if end - start >= timedelta(hours=1):
+            option_override_cm = options_override({"consistent": False})
+        with option_override_cm:
+            query_result = self.query_hook(event, start, end, environment_id)
         metrics.incr(
             "rules.conditions.queried_snuba",
             tags={
@@ -179,27 +194,34 @@ class BaseEventFrequencyCondition(EventCondition, abc.ABC):
         """ """
         raise NotImplementedError  # subclass must implement
 
-    def get_rate(self, event: GroupEvent, interval: str, environment_id: str) -> int:
+    def get_query_windows(self, interval: str, end: datetime) -> List[Tuple[datetime, datetime]]:
+        """
+        Returns the ``(start, end)`` windows that are queried to compute the rate over
+        `interval`. When comparing by percent, the second window is the comparison interval.
+        """
         _, duration = self.intervals[interval]
-        end = timezone.now()
-        # For conditions with interval >= 1 hour we don't need to worry about read your writes
-        # consistency. Disable it so that we can scale to more nodes.
-        option_override_cm = contextlib.nullcontext()
-        if duration >= timedelta(hours=1):
-            option_override_cm = options_override({"consistent": False})
-        with option_override_cm:
-            result: int = self.query(event, end - duration, end, environment_id=environment_id)
-            comparison_type = self.get_option("comparisonType", COMPARISON_TYPE_COUNT)
-            if comparison_type == COMPARISON_TYPE_PERCENT:
-                comparison_interval = comparison_intervals[self.get_option("comparisonInterval")][1]
-                comparison_end = end - comparison_interval
-                # TODO: Figure out if there's a way we can do this less frequently. All queries are
-                # automatically cached for 10s. We could consider trying to cache this and the main
-                # query for 20s to reduce the load.
-                comparison_result = self.query(
-                    event, comparison_end - duration, comparison_end, environment_id=environment_id
-                )
-                result = percent_increase(result, comparison_result)
+        windows = [(end - duration, end)]
+        comparison_type = self.get_option("comparisonType", COMPARISON_TYPE_COUNT)
+        if comparison_type == COMPARISON_TYPE_PERCENT:
+            comparison_interval = comparison_intervals[self.get_option("comparisonInterval")][1]
+            comparison_end = end - comparison_interval
+            windows.append((comparison_end - duration, comparison_end))
+        return windows
+
+    def get_rate(self, event: GroupEvent, interval: str, environment_id: str) -> int:
+        end = self.query_cache.end if self.query_cache is not None else timezone.now()
+        windows = self.get_query_windows(interval, end)
+        start, end = windows[0]
+        result: int = self.query(event, start, end, environment_id=environment_id)
+        if len(windows) > 1:
+            # TODO: Figure out if there's a way we can do this less frequently. All queries are
+            # automatically cached for 10s. We could consider trying to cache this and the main
+            # query for 20s to reduce the load.
+            comparison_start, comparison_end = windows[1]
+            comparison_result = self.query(
+                event, comparison_start, comparison_end, environment_id=environment_id
+            )
+            result = percent_increase(result, comparison_result)
 
         return result
 
@@ -386,6 +408,104 @@ class EventFrequencyPercentCondition(BaseEventFrequencyCondition):
         raise NotImplementedError
 
 
+class EventFrequencyQueryCache:
+    """
+    Shares the counts queried by frequency conditions between all the rules evaluated for an
+    event.
+
+    Conditions are registered with `add` before any of them is evaluated, `fetch` then runs each
+    distinct query once, and conditions created with this cache as `query_cache` read their
+    counts from it.  All windows end at the same `end`, so conditions of different rules that
+    use the same interval and environment share a query.  When the
+    `rules.frequency-query-memo-ttl` option is set, the counts are also memoized per issue so
+    that a burst of events on the same issue does not query them again.
+    """
+
+    def __init__(self, end: datetime | None = None) -> None:
+        self.end = end or timezone.now()
+        self._planned: MutableMapping[
+            str, Tuple[BaseEventFrequencyCondition, datetime, datetime, str]
+        ] = {}
+        self._results: MutableMapping[str, int] = {}
+        self._errors: MutableMapping[str, Exception] = {}
+
+    def _get_key(
+        self,
+        condition: BaseEventFrequencyCondition,
+        event: GroupEvent,
+        start: datetime,
+        end: datetime,
+        environment_id: str,
+    ) -> str:
+        # Windows are keyed relative to `end`, which makes the key stable between events.
+        return "r.c.fq:%s" % hash_values(
+            [
+                condition.id,
+                event.group_id,
+                environment_id,
+                int((self.end - start).total_seconds()),
+                int((self.end - end).total_seconds()),
+            ]
+        )
+
+    def add(
+        self, condition: BaseEventFrequencyCondition, event: GroupEvent, environment_id: str
+    ) -> None:
+        interval, value = condition._get_options()
+        if not (interval and value is not None):
+            return
+        for start, end in condition.get_query_windows(interval, self.end):
+            key = self._get_key(condition, event, start, end, environment_id)
+            if key not in self._results:
+                self._planned.setdefault(key, (condition, start, end, environment_id))
+
+    def fetch(self, event: GroupEvent) -> None:
+        """
+        Runs the queries of the conditions added since the last call.
+        """
+        planned, self._planned = self._planned, {}
+        if not planned:
+            return
+
+        memo_ttl = options.get("rules.frequency-query-memo-ttl")
+        if memo_ttl:
+            memoized = cache.get_many(list(planned.keys()))
+            self._results.update(memoized)
+            metrics.incr("rules.conditions.frequency_query.memoized", amount=len(memoized))
+            for key in memoized:
+                del planned[key]
+
+        to_memoize = {}
+        for key, (condition, start, end, environment_id) in planned.items():
+            try:
+                result = condition.run_query(event, start, end, environment_id)
+            except Exception as e:
+                # The error is raised again when the condition is evaluated, so that it fails
+                # the same way as a condition that queries on its own.
+                self._errors[key] = e
+            else:
+                self._results[key] = to_memoize[key] = result
+
+        if memo_ttl and to_memoize:
+            cache.set_many(to_memoize, memo_ttl)
+
+    def get(
+        self,
+        condition: BaseEventFrequencyCondition,
+        event: GroupEvent,
+        start: datetime,
+        end: datetime,
+        environment_id: str,
+    ) -> int:
+        key = self._get_key(condition, event, start, end, environment_id)
+        if key in self._errors:
+            raise self._errors[key]
+        if key not in self._results:
+            # Conditions that were not added up front still query on their own.
+            self._results[key] = condition.run_query(event, start, end, environment_id)
+        return self._results[key]
+
+
 def bucket_count(start: datetime, end: datetime, buckets: Dict[datetime, int]) -> int:
     rounded_end = round_to_five_minute(end)
     rounded_start = round_to_five_minute(start)
@@ -12,6 +12,10 @@ from sentry import analytics
 from sentry.eventstore.models import GroupEvent
 from sentry.models import GroupRuleStatus, Rule
 from sentry.rules import EventState, history, rules
+from sentry.rules.conditions.event_frequency import (
+    BaseEventFrequencyCondition,
+    EventFrequencyQueryCache,
+)
 from sentry.types.rules import RuleFuture
 from sentry.utils.hashlib import hash_values
 from sentry.utils.safe import safe_execute
@@ -49,6 +53,7 @@ class RuleProcessor:
         self.is_new_group_environment = is_new_group_environment
         self.has_reappeared = has_reappeared
 
+        self.query_cache = EventFrequencyQueryCache()
         self.grouped_futures: MutableMapping[
             str, Tuple[Callable[[GroupEvent, Sequence[RuleFuture]], None], List[RuleFuture]]
         ] = {}
@@ -127,7 +132,12 @@ class RuleProcessor:
             self.logger.warning("Unregistered condition %r", condition["id"])
             return None
 
-        condition_inst = condition_cls(self.project, data=condition, rule=rule)
+        if issubclass(condition_cls, BaseEventFrequencyCondition):
+            condition_inst = condition_cls(
+                self.project, data=condition, rule=rule, query_cache=self.query_cache
+            )
+        else:
+            condition_inst = condition_cls(self.project, data=condition, rule=rule)
         passes: bool = safe_execute(
             condition_inst.passes, self.event, state, _with_transaction=False
         )
@@ -150,12 +160,14 @@ class RuleProcessor:
             has_reappeared=self.has_reappeared,
         )
 
-    def apply_rule(self, rule: Rule, status: GroupRuleStatus) -> None:
+    def get_slow_conditions_to_evaluate(
+        self, rule: Rule, status: GroupRuleStatus
+    ) -> List[Mapping[str, Any]] | None:
         """
-        If all conditions and filters pass, execute every action.
+        Evaluate the filters and the cheap conditions of a rule.
 
-        :param rule: `Rule` object
-        :return: void
+        Returns `None` if the rule does not fire, otherwise the slow conditions that still decide
+        whether it fires. An empty list means that the rule fires.
         """
         condition_match = rule.data.get("action_match") or Rule.DEFAULT_CONDITION_MATCH
         filter_match = rule.data.get("filter_match") or Rule.DEFAULT_FILTER_MATCH
@@ -166,47 +178,86 @@ class RuleProcessor:
             rule.environment_id is not None
             and self.event.get_environment().id != rule.environment_id
         ):
-            return
+            return None
 
         now = timezone.now()
         freq_offset = now - timedelta(minutes=frequency)
         if status.last_active and status.last_active > freq_offset:
-            return
+            return None
 
         state = self.get_state()
 
         condition_list = []
+        slow_condition_list = []
         filter_list = []
         for rule_cond in rule_condition_list:
             if self.get_rule_type(rule_cond) == "condition/event":
-                condition_list.append(rule_cond)
+                # Expensive conditions are evaluated last, after all the other conditions of
+                # every rule, so that their queries can be batched.
+                if any(slow_match in rule_cond["id"] for slow_match in SLOW_CONDITION_MATCHES):
+                    slow_condition_list.append(rule_cond)
+                else:
+                    condition_list.append(rule_cond)
             else:
                 filter_list.append(rule_cond)
 
-        # Sort `condition_list` so that most expensive conditions run last.
-        condition_list.sort(
-            key=lambda condition: any(
-                condition_match in condition["id"] for condition_match in SLOW_CONDITION_MATCHES
-            )
-        )
-
         for predicate_list, match, name in (
             (filter_list, filter_match, "filter"),
             (condition_list, condition_match, "condition"),
         ):
-            if not predicate_list:
+            if not predicate_list and (name == "filter" or not slow_condition_list):
                 continue
             predicate_iter = (self.condition_matches(f, state, rule) for f in predicate_list)
             predicate_func = get_match_function(match)
             if predicate_func:
-                if not predicate_func(predicate_iter):
-                    return
+                passes = predicate_func(predicate_iter)
+                if name == "condition" and slow_condition_list:
+                    # The slow conditions only matter if the cheap ones did not decide the match
+                    # already, e.g. one of them passed for "any" or failed for "all".
+                    if passes == (match == "any"):
+                        return [] if passes else None
+                    return slow_condition_list
+                if not passes:
+                    return None
             else:
                 self.logger.error(
                     f"Unsupported {name}_match {match!r} for rule {rule.id}", filter_match, rule.id
                 )
-                return
+                return None
+
+        return []
+
+    def slow_conditions_match(self, rule: Rule, slow_conditions: List[Mapping[str, Any]]) -> bool:
+        condition_match = rule.data.get("action_match") or Rule.DEFAULT_CONDITION_MATCH
+        predicate_func = get_match_function(condition_match)
+        state = self.get_state()
+        predicate_iter = (self.condition_matches(c, state, rule) for c in slow_conditions)
+        return bool(predicate_func and predicate_func(predicate_iter))
 
+    def plan_slow_conditions(self, rule: Rule, slow_conditions: List[Mapping[str, Any]]) -> None:
+        """
+        Add the queries of the frequency conditions to the query cache, so that they run once
+        for all the rules.
+        """
+        for condition in slow_conditions:
+            condition_cls = rules.get(condition["id"])
+            if condition_cls is None or not issubclass(condition_cls, BaseEventFrequencyCondition):
+                continue
+            condition_inst = condition_cls(
+                self.project, data=condition, rule=rule, query_cache=self.query_cache
+            )
+            safe_execute(
+                self.query_cache.add,
+                condition_inst,
+                self.event,
+                rule.environment_id,
+                _with_transaction=False,
+            )
+
+    def fire_rule(self, rule: Rule, status: GroupRuleStatus) -> None:
+        frequency = rule.data.get("frequency") or Rule.DEFAULT_FREQUENCY
+        now = timezone.now()
+        freq_offset = now - timedelta(minutes=frequency)
         updated = (
             GroupRuleStatus.objects.filter(id=status.id)
             .exclude(last_active__gt=freq_offset)
@@ -261,9 +312,28 @@ class RuleProcessor:
             return {}.values()
 
         self.grouped_futures.clear()
+        self.query_cache = EventFrequencyQueryCache()
         rules = self.get_rules()
         rule_statuses = self.bulk_get_rule_status(rules)
+
+        # Cheap filters and conditions are evaluated for every rule first. The frequency
+        # conditions of the rules that are still undecided are then queried together, so that
+        # rules with the same interval and environment share their queries.
+        undecided_rules = []
         for rule in rules:
-            self.apply_rule(rule, rule_statuses[rule.id])
+            status = rule_statuses[rule.id]
+            slow_conditions = self.get_slow_conditions_to_evaluate(rule, status)
+            if slow_conditions is None:
+                continue
+            if not slow_conditions:
+                self.fire_rule(rule, status)
+                continue
+            self.plan_slow_conditions(rule, slow_conditions)
+            undecided_rules.append((rule, status, slow_conditions))
+
+        safe_execute(self.query_cache.fetch, self.event, _with_transaction=False)
+        for rule, status, slow_conditions in undecided_rules:
+            if self.slow_conditions_match(rule, slow_conditions):
+                self.fire_rule(rule, status)
 
         return self.grouped_futures.values()
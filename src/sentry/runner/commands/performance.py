@@ -16,6 +16,19 @@ def performance() -> None:
     """
 
 
+def _get_detector_classes(detector_class=None):
+    from sentry.utils.performance_issues import performance_detection
+    from sentry.utils.performance_issues.base import PerformanceDetector
+
+    if detector_class:
+        return [performance_detection.__dict__[detector_class]]
+    return [
+        cls
+        for _, cls in performance_detection.__dict__.items()
+        if isclass(cls) and issubclass(cls, PerformanceDetector) and cls != PerformanceDetector
+    ]
+
+
 @performance.command()
 @click.argument("filename", type=click.Path(exists=True))
 @click.option(
@@ -30,17 +43,8 @@ def detect(filename, detector_class, verbose):
     path to a JSON event data file.
     """
     from sentry.utils.performance_issues import performance_detection
-    from sentry.utils.performance_issues.base import PerformanceDetector
-
-    if detector_class:
-        detector_classes = [performance_detection.__dict__[detector_class]]
-    else:
-        detector_classes = [
-            cls
-            for _, cls in performance_detection.__dict__.items()
-            if isclass(cls) and issubclass(cls, PerformanceDetector) and cls != PerformanceDetector
-        ]
 
+    detector_classes = _get_detector_classes(detector_class)
     settings = performance_detection.get_detection_settings()
 
     with open(filename) as file:
@@ -71,3 +75,51 @@ def detect(filename, detector_class, verbose):
                     click.echo(problem)
 
             click.echo("\n")
+
+
+@performance.command()
+@click.argument("filenames", nargs=-1, required=True, type=click.Path(exists=True))
+@click.option("-n", "--iterations", default=100, help="Number of times every event is processed")
+@configuration
+def benchmark(filenames, iterations):
+    """
+    Measures the span throughput of every detector, and of all detectors
+    walking the spans together, on the event data in the supplied filenames.
+    Filenames should be paths to JSON event data files, such as the fixtures
+    in fixtures/events/performance_problems.
+    """
+    import time
+
+    from sentry.utils.performance_issues import performance_detection
+
+    settings = performance_detection.get_detection_settings()
+
+    events = []
+    for filename in filenames:
+        with open(filename) as file:
+            events.append(json.loads(file.read()))
+    span_count = sum(len(data.get("spans") or ()) for data in events) * iterations
+    if not span_count:
+        raise click.ClickException("The supplied events have no spans")
+
+    detectors = [cls(settings, events[0]) for cls in _get_detector_classes()]
+    timings = {detector.__class__.__name__: 0.0 for detector in detectors}
+    total = 0.0
+    for _ in range(iterations):
+        for data in events:
+            for detector in detectors:
+                detector.reset(data)
+                start = time.perf_counter()
+                performance_detection.run_detector_on_data(detector, data)
+                timings[detector.__class__.__name__] += time.perf_counter() - start
+
+            for detector in detectors:
+                detector.reset(data)
+            start = time.perf_counter()
+            performance_detection.run_detectors_on_data(detectors, data)
+            total += time.perf_counter() - start
+
+    click.echo(f"{len(events)} {pluralize(len(events), 'event,events')}, {span_count} spans")
+    for name, duration in sorted(timings.items(), key=lambda item: item[1]):
+        click.echo(f"{name}: {span_count / duration:.0f} spans/s")
+    click.echo(f"All detectors, single pass: {span_count / total:.0f} spans/s")
@@ -14,6 +14,7 @@ from sentry.sentry_metrics.indexer.base import (
     StringIndexer,
 )
 from sentry.utils import metrics
+from sentry.utils.cache import LRUCache
 from sentry.utils.hashlib import md5_text
 
 logger = logging.getLogger(__name__)
@@ -21,21 +22,77 @@ logger = logging.getLogger(__name__)
 _INDEXER_CACHE_METRIC = "sentry_metrics.indexer.memcache"
 # only used to compare to the older version of the PGIndexer
 _INDEXER_CACHE_FETCH_METRIC = "sentry_metrics.indexer.memcache.fetch"
+_INDEXER_CACHE_TIER_METRIC = "sentry_metrics.indexer.cache_tier"
+
+# Stored in the local tier for strings that are known to not be indexed.
+_NEGATIVE_HIT = -1
+
+
+def _randomize_ttl(cache_ttl: int) -> int:
+    # introduce jitter in the cache_ttl so that when we have large
+    # amount of new keys written into the cache, they don't expire all at once
+    jitter = random.uniform(0, 0.25) * cache_ttl
+    return int(cache_ttl + jitter)
 
 
 class StringIndexerCache:
-    def __init__(self, cache_name: str, partition_key: str):
+    """
+    Caches string to id mappings in the Django cache ``cache_name``.
+
+    If ``local_cache_size`` is set, a bounded in-process LRU tier sits in
+    front of the Django cache.  Indexed ids never change for a given string,
+    so local entries are only evicted by size and by the same randomized TTL
+    as the shared tier (or ``local_cache_ttl`` if set).  With
+    ``local_negative_ttl`` set, `resolve` misses are remembered locally for
+    that many seconds as well.
+    """
+
+    def __init__(
+        self,
+        cache_name: str,
+        partition_key: str,
+        local_cache_size: int = 0,
+        local_cache_ttl: Optional[int] = None,
+        local_negative_ttl: int = 0,
+    ):
         self.version = 1
         self.cache = caches[cache_name]
         self.partition_key = partition_key
+        self.local_cache: Optional[LRUCache] = (
+            LRUCache(max_size=local_cache_size) if local_cache_size else None
+        )
+        self.local_cache_ttl = local_cache_ttl
+        self.local_negative_ttl = local_negative_ttl
 
     @property
     def randomized_ttl(self) -> int:
-        # introduce jitter in the cache_ttl so that when we have large
-        # amount of new keys written into the cache, they don't expire all at once
-        cache_ttl = settings.SENTRY_METRICS_INDEXER_CACHE_TTL
-        jitter = random.uniform(0, 0.25) * cache_ttl
-        return int(cache_ttl + jitter)
+        return _randomize_ttl(settings.SENTRY_METRICS_INDEXER_CACHE_TTL)
+
+    @property
+    def local_randomized_ttl(self) -> int:
+        if self.local_cache_ttl is None:
+            return self.randomized_ttl
+        return _randomize_ttl(self.local_cache_ttl)
+
+    def _record_tier_metric(self, tier: str, hits: int, misses: int) -> None:
+        if hits:
+            metrics.incr(
+                _INDEXER_CACHE_TIER_METRIC,
+                tags={"tier": tier, "cache_hit": "true"},
+                amount=hits,
+            )
+        if misses:
+            metrics.incr(
+                _INDEXER_CACHE_TIER_METRIC,
+                tags={"tier": tier, "cache_hit": "false"},
+                amount=misses,
+            )
+
+    def _set_local(self, cache_keys_values: Mapping[str, int]) -> None:
+        if self.local_cache is None:
+            return
+        for cache_key, value in cache_keys_values.items():
+            self.local_cache.set(cache_key, value, ttl=self.local_randomized_ttl)
 
     def make_cache_key(self, key: str, cache_namespace: str) -> str:
         hashed = md5_text(key).hexdigest()
@@ -59,27 +116,43 @@ class StringIndexerCache:
 
         return formatted
 
-    def get(self, key: str, cache_namespace: str) -> int:
-        result: int = self.cache.get(
-            self.make_cache_key(key, cache_namespace), version=self.version
-        )
-        return result
+    def get(self, key: str, cache_namespace: str) -> Optional[int]:
+        return self.get_many([key], cache_namespace)[key]
 
     def set(self, key: str, value: int, cache_namespace: str) -> None:
-        self.cache.set(
-            key=self.make_cache_key(key, cache_namespace),
-            value=value,
-            timeout=self.randomized_ttl,
-            version=self.version,
-        )
+        self.set_many({key: value}, cache_namespace)
 
     def get_many(
         self, keys: Sequence[str], cache_namespace: str
     ) -> MutableMapping[str, Optional[int]]:
         cache_keys = {self.make_cache_key(key, cache_namespace): key for key in keys}
-        results: Mapping[str, Optional[int]] = self.cache.get_many(
-            cache_keys.keys(), version=self.version
-        )
+        results: MutableMapping[str, Optional[int]] = {}
+
+        if self.local_cache is not None:
+            for cache_key in cache_keys:
+                value = self.local_cache.get(cache_key)
+                if value is not None:
+                    results[cache_key] = value
+            self._record_tier_metric("local", len(results), len(cache_keys) - len(results))
+            remote_keys = [k for k in cache_keys if k not in results]
+        else:
+            remote_keys = list(cache_keys)
+
+        if remote_keys:
+            remote_results: Mapping[str, Optional[int]] = self.cache.get_many(
+                remote_keys, version=self.version
+            )
+            self._record_tier_metric(
+                "remote", len(remote_results), len(remote_keys) - len(remote_results)
+            )
+            self._set_local(remote_results)
+            results.update(remote_results)
+
+        # Negative hits only short-circuit `resolve`, see `is_negative_hit`.
+        for cache_key, value in results.items():
+            if value == _NEGATIVE_HIT:
+                results[cache_key] = None
+
         return self._format_results(keys, results, cache_namespace)
 
     def set_many(self, key_values: Mapping[str, int], cache_namespace: str) -> None:
@@ -87,14 +160,36 @@ class StringIndexerCache:
             self.make_cache_key(k, cache_namespace): v for k, v in key_values.items()
         }
         self.cache.set_many(cache_key_values, timeout=self.randomized_ttl, version=self.version)
+        self._set_local(cache_key_values)
 
-    def delete(self, key: str, cache_namespace: str) -> None:
+    def set_negative_hit(self, key: str, cache_namespace: str) -> None:
+        """
+        Remembers locally that ``key`` is not indexed (yet).  This is a no-op
+        unless both the local tier and ``local_negative_ttl`` are configured.
+        """
+        if self.local_cache is None or not self.local_negative_ttl:
+            return
+        self.local_cache.set(
+            self.make_cache_key(key, cache_namespace),
+            _NEGATIVE_HIT,
+            ttl=self.local_negative_ttl,
+        )
+
+    def is_negative_hit(self, key: str, cache_namespace: str) -> bool:
+        if self.local_cache is None:
+            return False
         cache_key = self.make_cache_key(key, cache_namespace)
-        self.cache.delete(cache_key, version=self.version)
+        return self.local_cache.get(cache_key) == _NEGATIVE_HIT
+
+    def delete(self, key: str, cache_namespace: str) -> None:
+        self.delete_many([key], cache_namespace)
 
     def delete_many(self, keys: Sequence[str], cache_namespace: str) -> None:
         cache_keys = [self.make_cache_key(key, cache_namespace) for key in keys]
         self.cache.delete_many(cache_keys, version=self.version)
+        if self.local_cache is not None:
+            for cache_key in cache_keys:
+                self.local_cache.delete(cache_key)
 
 
 class CachingIndexer(StringIndexer):
@@ -151,6 +246,10 @@ class CachingIndexer(StringIndexer):
 
     def resolve(self, use_case_id: UseCaseKey, org_id: int, string: str) -> Optional[int]:
         key = f"{org_id}:{string}"
+        if self.cache.is_negative_hit(key, use_case_id.value):
+            metrics.incr(_INDEXER_CACHE_METRIC, tags={"cache_hit": "negative", "caller": "resolve"})
+            return None
+
         result = self.cache.get(key, use_case_id.value)
 
         if result and isinstance(result, int):
@@ -162,6 +261,8 @@ class CachingIndexer(StringIndexer):
 
         if id is not None:
             self.cache.set(key, id, use_case_id.value)
+        else:
+            self.cache.set_negative_hit(key, use_case_id.value)
 
         return id
 
@@ -16,7 +16,7 @@ from sentry.similarity.features import (
     get_application_chunks,
 )
 from sentry.similarity.featuresv2 import GroupingBasedFeatureSet
-from sentry.similarity.signatures import MinHashSignatureBuilder
+from sentry.similarity.signatures import VectorizedMinHashSignatureBuilder
 from sentry.utils import redis
 from sentry.utils.datastructures import BidirectionalMapping
 from sentry.utils.iterators import shingle
@@ -71,7 +71,13 @@ def _make_index_backend(cluster, namespace="sim:1"):
 
     return MetricsWrapper(
         RedisScriptMinHashIndexBackend(
-            cluster, namespace, MinHashSignatureBuilder(16, 0xFFFF), 8, 60 * 60 * 24 * 30, 3, 5000
+            cluster,
+            namespace,
+            VectorizedMinHashSignatureBuilder(16, 0xFFFF),
+            8,
+            60 * 60 * 24 * 30,
+            3,
+            5000,
         ),
         scope_tag_name=None,
     )
@@ -138,4 +144,5 @@ def _build_dispatcher(methodname):
 
 merge = _build_dispatcher("merge")
 record = _build_dispatcher("record")
+bulk_record = _build_dispatcher("bulk_record")
 delete = _build_dispatcher("delete")
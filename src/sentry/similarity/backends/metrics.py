@@ -19,6 +19,11 @@ class MetricsWrapper(AbstractIndexBackend):
         with timer(self.template.format(method), tags=tags):
             return getattr(self.backend, method)(scope, *args, **kwargs)
 
+    def __instrumented_multi_method_call(self, method, *args, **kwargs):
+        # Requests span many scopes, so these aren't tagged with one.
+        with timer(self.template.format(method)):
+            return getattr(self.backend, method)(*args, **kwargs)
+
     def record(self, *args, **kwargs):
         return self.__instrumented_method_call("record", *args, **kwargs)
 
@@ -28,6 +33,9 @@ class MetricsWrapper(AbstractIndexBackend):
     def compare(self, *args, **kwargs):
         return self.__instrumented_method_call("compare", *args, **kwargs)
 
+    def record_multi(self, *args, **kwargs):
+        return self.__instrumented_multi_method_call("record_multi", *args, **kwargs)
+
     def merge(self, *args, **kwargs):
         return self.__instrumented_method_call("merge", *args, **kwargs)
 
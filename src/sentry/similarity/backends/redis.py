@@ -2,6 +2,7 @@ import itertools
 import time
 
 from django.utils.encoding import force_text
+from redis.exceptions import NoScriptError
 
 from sentry.similarity.backends.abstract import AbstractIndexBackend
 from sentry.utils.iterators import chunked
@@ -40,6 +41,20 @@ class RedisScriptMinHashIndexBackend(AbstractIndexBackend):
             arguments.extend([1, ",".join(str(b) for b in bucket), 1])
         return arguments
 
+    def _get_signature_arguments_memoizer(self):
+        # Builds the signature arguments of each distinct feature set only
+        # once, events of the same group often share most of their features.
+        signatures = {}
+
+        def get_signature_arguments(features):
+            key = tuple(features)
+            arguments = signatures.get(key)
+            if arguments is None:
+                arguments = signatures[key] = self._build_signature_arguments(features)
+            return arguments
+
+        return get_signature_arguments
+
     def __index(self, scope, args):
         # scope must be passed into the script call as a key to allow the
         # cluster client to determine what cluster the script should be
@@ -47,6 +62,25 @@ class RedisScriptMinHashIndexBackend(AbstractIndexBackend):
         # all redis operations.
         return index(self.cluster, [scope], args)
 
+    def __index_multi(self, requests):
+        # The cluster client splits the pipeline into one pipeline per node.
+        # Unlike regular pipelines, cluster pipelines don't load the script
+        # before executing it, so calls that reach a node that hasn't seen the
+        # script yet are retried on their own (which loads the script.)
+        with self.cluster.pipeline(transaction=False) as pipeline:
+            for scope, args in requests:
+                index(pipeline, [scope], args)
+            responses = pipeline.execute(raise_on_error=False)
+
+        results = []
+        for (scope, args), response in zip(requests, responses):
+            if isinstance(response, NoScriptError):
+                response = self.__index(scope, args)
+            elif isinstance(response, Exception):
+                raise response
+            results.append(response)
+        return results
+
     def _as_search_result(self, results):
         score_replacements = {
             -1.0: None,  # both items don't have the feature (no comparison)
@@ -117,10 +151,7 @@ class RedisScriptMinHashIndexBackend(AbstractIndexBackend):
 
         return self._as_search_result(self.__index(scope, arguments))
 
-    def record(self, scope, key, items, timestamp=None):
-        if not items:
-            return  # nothing to do
-
+    def _get_record_arguments(self, scope, key, items, timestamp, get_signature_arguments):
         if timestamp is None:
             timestamp = int(time.time())
 
@@ -138,10 +169,39 @@ class RedisScriptMinHashIndexBackend(AbstractIndexBackend):
 
         for idx, features in items:
             arguments.append(idx)
-            arguments.extend(self._build_signature_arguments(features))
+            arguments.extend(get_signature_arguments(features))
 
+        return arguments
+
+    def record(self, scope, key, items, timestamp=None):
+        if not items:
+            return  # nothing to do
+
+        arguments = self._get_record_arguments(
+            scope, key, items, timestamp, self._build_signature_arguments
+        )
         return self.__index(scope, arguments)
 
+    def record_multi(self, requests, batch=100):
+        get_signature_arguments = self._get_signature_arguments_memoizer()
+
+        results = []
+        for chunk in chunked(requests, batch):
+            results.extend(
+                self.__index_multi(
+                    [
+                        (
+                            scope,
+                            self._get_record_arguments(
+                                scope, key, items, timestamp, get_signature_arguments
+                            ),
+                        )
+                        for scope, key, items, timestamp in chunk
+                    ]
+                )
+            )
+        return results
+
     def merge(self, scope, destination, items, timestamp=None):
         if timestamp is None:
             timestamp = int(time.time())
@@ -94,6 +94,28 @@ class FeatureSet:
                 )
         return results
 
+    def __encode(self, event):
+        # Yields the encoded features of the event for every label that has
+        # any, encoding errors are logged and the label is skipped.
+        for label, features in self.extract(event).items():
+            try:
+                features = [self.encoder.dumps(feature) for feature in features]
+            except Exception as error:
+                log = (
+                    logger.debug
+                    if isinstance(error, self.expected_encoding_errors)
+                    else functools.partial(logger.warning, exc_info=True)
+                )
+                log(
+                    "Could not encode features from %r for %r due to error: %r",
+                    event,
+                    label,
+                    error,
+                )
+            else:
+                if features:
+                    yield label, features
+
     def record(self, events):
         if not events:
             return []
@@ -105,7 +127,7 @@ class FeatureSet:
         for event in events:
             if not event.group_id:
                 continue
-            for label, features in self.extract(event).items():
+            for label, features in self.__encode(event):
                 if scope is None:
                     scope = self.__get_scope(event.project)
                 else:
@@ -120,26 +142,36 @@ class FeatureSet:
                         self.__get_key(event.group) == key
                     ), "all events must be associated with the same group"
 
-                try:
-                    features = [self.encoder.dumps(feature) for feature in features]
-                except Exception as error:
-                    log = (
-                        logger.debug
-                        if isinstance(error, self.expected_encoding_errors)
-                        else functools.partial(logger.warning, exc_info=True)
-                    )
-                    log(
-                        "Could not encode features from %r for %r due to error: %r",
-                        event,
-                        label,
-                        error,
-                    )
-                else:
-                    if features:
-                        items.append((self.aliases[label], features))
+                items.append((self.aliases[label], features))
 
         return self.index.record(scope, key, items, timestamp=int(to_timestamp(event.datetime)))  # type: ignore
 
+    def bulk_record(self, events):
+        """\
+        Records events of any number of groups and projects. This is the same
+        as calling `record` with each of the events, but the index is updated
+        for all of the events at once.
+        """
+        requests = {}
+        for event in events:
+            if not event.group_id:
+                continue
+            items = [(self.aliases[label], features) for label, features in self.__encode(event)]
+            if items:
+                # Events of a group that happened within the same second are
+                # recorded together, as `record` would with both events.
+                scope = self.__get_scope(event.project)
+                key = self.__get_key(event.group)
+                timestamp = int(to_timestamp(event.datetime))
+                requests.setdefault((scope, key, timestamp), []).extend(items)
+
+        return self.index.record_multi(
+            [
+                (scope, key, items, timestamp)
+                for (scope, key, timestamp), items in requests.items()
+            ]
+        )
+
     def classify(self, events, limit=None, thresholds=None):
         if not events:
             return []
@@ -152,7 +184,7 @@ class FeatureSet:
         labels = []
         items = []
         for event in events:
-            for label, features in self.extract(event).items():
+            for label, features in self.__encode(event):
                 if scope is None:
                     scope = self.__get_scope(event.project)
                 else:
@@ -160,24 +192,8 @@ class FeatureSet:
                         self.__get_scope(event.project) == scope
                     ), "all events must be associated with the same project"
 
-                try:
-                    features = [self.encoder.dumps(feature) for feature in features]
-                except Exception as error:
-                    log = (
-                        logger.debug
-                        if isinstance(error, self.expected_encoding_errors)
-                        else functools.partial(logger.warning, exc_info=True)
-                    )
-                    log(
-                        "Could not encode features from %r for %r due to error: %r",
-                        event,
-                        label,
-                        error,
-                    )
-                else:
-                    if features:
-                        items.append((self.aliases[label], thresholds.get(label, 0), features))
-                        labels.append(label)
+                items.append((self.aliases[label], thresholds.get(label, 0), features))
+                labels.append(label)
 
         return [
             (int(key), dict(zip(labels, scores)))
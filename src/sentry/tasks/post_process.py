@@ -9,7 +9,7 @@ import sentry_sdk
 from django.conf import settings
 from django.utils import timezone
 
-from sentry import analytics, features
+from sentry import analytics, features, options
 from sentry.exceptions import PluginError
 from sentry.issues.issue_occurrence import IssueOccurrence
 from sentry.killswitches import killswitch_matches_context
@@ -22,6 +22,7 @@ from sentry.utils.cache import cache
 from sentry.utils.event_frames import get_sdk_name
 from sentry.utils.locking import UnableToAcquireLock
 from sentry.utils.locking.manager import LockManager
+from sentry.utils.performance import StepProfiler
 from sentry.utils.safe import safe_execute
 from sentry.utils.sdk import bind_organization_context, set_current_event_project
 from sentry.utils.services import build_instance_from_options
@@ -487,11 +488,16 @@ def run_post_process_job(job: PostProcessJob):
         # specific pipelines for issue types
         pipeline = GROUP_CATEGORY_POST_PROCESS_PIPELINE[issue_category]
 
+    issue_category_metric = issue_category.name.lower() if issue_category else None
+    profiler = StepProfiler(
+        "sentry.tasks.post_process.post_process_group.step",
+        tags={"issue_category": issue_category_metric},
+    )
     for pipeline_step in pipeline:
         try:
-            pipeline_step(job)
+            with profiler.step(pipeline_step.__name__):
+                pipeline_step(job)
         except Exception:
-            issue_category_metric = issue_category.name.lower() if issue_category else None
             metrics.incr(
                 "sentry.tasks.post_process.post_process_group.exception",
                 tags={"issue_category": issue_category_metric},
@@ -501,6 +507,18 @@ def run_post_process_job(job: PostProcessJob):
                 extra={"event": group_event, "group": group_event.group},
             )
 
+    if random.random() < options.get("post-process.step-profile-sample-rate"):
+        logger.info(
+            "post_process.step_profile",
+            extra={
+                "event_id": group_event.event_id,
+                "group_id": group_event.group_id,
+                "project_id": group_event.project_id,
+                "issue_category": issue_category_metric,
+                "steps": profiler.as_trace(),
+            },
+        )
+
 
 def process_event(data: dict, group_id: Optional[int]) -> Event:
     from sentry.eventstore.models import Event
@@ -11,6 +11,9 @@ from sentry.utils.sdk import set_current_event_project
 
 logger = logging.getLogger(__name__)
 
+# Maximum number of configs written to the projectconfig cache at once
+SET_MANY_CHUNK_SIZE = 500
+
 
 # The time_limit here should match the `debounce_ttl` of the projectconfig_debounce_cache
 # service.
@@ -89,6 +92,39 @@ def schedule_build_project_config(public_key):
     )
 
 
+def schedule_build_project_configs(public_keys):
+    """Schedule `build_project_config` for many public keys at once.
+
+    Behaves like calling :func:`schedule_build_project_config` for every key, but checks
+    and writes the debounce keys with one batch of Redis commands each.  One task is
+    still enqueued per key so that every key keeps its own deadline.
+    """
+    tmp_scheduled = time.time()
+    public_keys = set(public_keys)
+    debounced = projectconfig_debounce_cache.is_debounced_many(public_keys=public_keys)
+    if debounced:
+        metrics.incr(
+            "relay.projectconfig_cache.skipped",
+            amount=len(debounced),
+            tags={"reason": "debounce", "task": "build"},
+        )
+
+    to_schedule = public_keys - debounced
+    if not to_schedule:
+        return
+
+    metrics.incr(
+        "relay.projectconfig_cache.scheduled",
+        amount=len(to_schedule),
+        tags={"task": "build"},
+    )
+    for public_key in to_schedule:
+        build_project_config.delay(public_key=public_key, tmp_scheduled=tmp_scheduled)
+
+    # Debounce only after scheduling, see `schedule_build_project_config`.
+    projectconfig_debounce_cache.debounce_many(public_keys=to_schedule)
+
+
 def validate_args(organization_id=None, project_id=None, public_key=None):
     """Validates arguments for the tasks and sets sentry scope.
 
@@ -121,22 +157,7 @@ def compute_configs(organization_id=None, project_id=None, public_key=None):
         # it could be possible that refrequent invalidations cause the task to take excessive time
         # to complete.
         for organization in Organization.objects.filter(id=organization_id):
-            for project in Project.objects.filter(organization_id=organization_id):
-                project.set_cached_field_value("organization", organization)
-                for key in ProjectKey.objects.filter(project_id=project.id):
-                    key.set_cached_field_value("project", project)
-                    # If we find the config in the cache it means it was active.  As such we want to
-                    # recalculate it.  If the config was not there at all, we leave it and avoid the
-                    # cost of re-computation.
-                    if projectconfig_cache.get(key.public_key) is not None:
-                        configs[key.public_key] = compute_projectkey_config(key)
-                        action = "recompute"
-                    else:
-                        action = "not-cached"
-                    metrics.incr(
-                        "relay.projectconfig_cache.invalidation.recompute",
-                        tags={"action": action, "scope": "organization"},
-                    )
+            configs.update(compute_organization_configs(organization))
     elif project_id:
         for project in Project.objects.filter(id=project_id):
             for key in ProjectKey.objects.filter(project_id=project_id):
@@ -175,9 +196,56 @@ def compute_configs(organization_id=None, project_id=None, public_key=None):
     return configs
 
 
-def compute_projectkey_config(key):
+def compute_organization_configs(organization):
+    """Computes the configs of all cached public keys of all projects in an organization.
+
+    Projects and keys are loaded with one query each, the cache is checked for all keys in
+    one batch, project options are preloaded in bulk and organization-level parts of the
+    configs are only computed once.
+
+    :returns: A dict mapping all public keys whose config was in the cache to their new
+       config.  Keys whose config was not cached are left alone.
+    """
+    from sentry.models import Project, ProjectKey, ProjectOption
+
+    projects = {
+        project.id: project for project in Project.objects.filter(organization_id=organization.id)
+    }
+    keys = list(ProjectKey.objects.filter(project_id__in=projects.keys()))
+
+    # If we find the config in the cache it means it was active.  As such we want to
+    # recalculate it.  If the config was not there at all, we leave it and avoid the
+    # cost of re-computation.
+    cached = projectconfig_cache.get_many([key.public_key for key in keys])
+    active_keys = [key for key in keys if cached.get(key.public_key) is not None]
+    metrics.incr(
+        "relay.projectconfig_cache.invalidation.recompute",
+        amount=len(active_keys),
+        tags={"action": "recompute", "scope": "organization"},
+    )
+    metrics.incr(
+        "relay.projectconfig_cache.invalidation.recompute",
+        amount=len(keys) - len(active_keys),
+        tags={"action": "not-cached", "scope": "organization"},
+    )
+
+    ProjectOption.objects.preload_all_values(list({key.project_id for key in active_keys}))
+
+    org_cache = {}
+    configs = {}
+    for key in active_keys:
+        project = projects[key.project_id]
+        project.set_cached_field_value("organization", organization)
+        key.set_cached_field_value("project", project)
+        configs[key.public_key] = compute_projectkey_config(key, org_cache=org_cache)
+
+    return configs
+
+
+def compute_projectkey_config(key, org_cache=None):
     """Computes a single config for the given :class:`ProjectKey`.
 
+    :param org_cache: See :func:`sentry.relay.config.get_project_config`.
     :returns: A dict with the project config.
     """
     from sentry.models import ProjectKeyStatus
@@ -186,7 +254,9 @@ def compute_projectkey_config(key):
     if key.status != ProjectKeyStatus.ACTIVE:
         return {"disabled": True}
     else:
-        return get_project_config(key.project, project_keys=[key], full_config=True).to_dict()
+        return get_project_config(
+            key.project, project_keys=[key], full_config=True, org_cache=org_cache
+        ).to_dict()
 
 
 @instrumented_task(
@@ -237,7 +307,12 @@ def invalidate_project_config(
     updated_configs = compute_configs(
         organization_id=organization_id, project_id=project_id, public_key=public_key
     )
-    projectconfig_cache.set_many(updated_configs)
+
+    # Large organizations produce thousands of configs, write them in chunks to keep
+    # individual pipelines small.
+    updated_configs = list(updated_configs.items())
+    for i in range(0, len(updated_configs), SET_MANY_CHUNK_SIZE):
+        projectconfig_cache.set_many(dict(updated_configs[i : i + SET_MANY_CHUNK_SIZE]))
 
 
 def schedule_invalidate_project_config(
@@ -1,7 +1,7 @@
 import logging
 from datetime import datetime
 from time import time
-from typing import Any, Callable, Dict, List, Optional
+from typing import Any, Callable, Dict, List, Mapping, Optional, Sequence
 
 import sentry_sdk
 from django.conf import settings
@@ -733,6 +733,132 @@ def _do_save_event(
             time_synthetic_monitoring_event(data, project_id, start_time)
 
 
+def can_save_event_in_batch(data: Event, has_attachments: bool) -> bool:
+    """
+    Whether an event can skip ``preprocess_event`` and be saved directly,
+    together with other events, through ``save_event_batch``. This is the case
+    for error events without attachments that need neither symbolication nor
+    plugin processing.
+    """
+    from sentry.lang.native.processing import get_symbolication_function
+
+    if has_attachments or data.get("type") in ("transaction", "generic"):
+        return False
+
+    data = CanonicalKeyDict(data)
+    return not get_symbolication_function(data) and not should_process(data)
+
+
+def save_event_batch(events: Sequence[Mapping[str, Any]], projects: Mapping[int, Project]) -> None:
+    """
+    Saves many error events at once. This is the batched equivalent of
+    ``_do_save_event`` for events accepted by ``can_save_event_in_batch``;
+    each entry needs ``cache_key``, ``data``, ``start_time``, ``event_id`` and
+    ``project_id``.
+
+    If the batch cannot be saved, the events that were not counted yet are
+    handed to ``save_event`` one by one so that a single bad event does not
+    fail the whole batch.
+    """
+    from sentry.event_manager import (
+        _auto_update_grouping,
+        _project_should_update_grouping,
+        save_error_events,
+    )
+
+    metrics.timing("tasks.store.save_event_batch.size", len(events))
+
+    jobs = []
+    for entry in events:
+        data = CanonicalKeyDict(entry["data"])
+        project_id = entry["project_id"]
+        cache_key = entry["cache_key"]
+
+        if reprocessing.event_supports_reprocessing(data):
+            with metrics.timer("tasks.store.do_save_event.delete_raw_event"):
+                delete_raw_event(project_id, entry["event_id"], allow_hint_clear=True)
+
+        if killswitch_matches_context(
+            "store.load-shed-save-event-projects",
+            {
+                "project_id": project_id,
+                "event_type": data.get("type") or "none",
+                "platform": data.get("platform") or "none",
+            },
+        ):
+            processing.event_processing_store.delete_by_key(cache_key)
+            continue
+
+        jobs.append(
+            {
+                "data": data,
+                "project_id": project_id,
+                "raw": False,
+                "start_time": entry["start_time"],
+                "cache_key": cache_key,
+            }
+        )
+
+    try:
+        with metrics.timer(
+            "tasks.store.save_event_batch.event_manager.save", tags={"batch_size": len(jobs)}
+        ):
+            saved_jobs = save_error_events(jobs, projects)
+    except Exception:
+        metrics.incr("events.save_event.exception", tags={"event_type": "batch"})
+        error_logger.exception("Failed to save event batch", extra={"batch_size": len(jobs)})
+        # The payloads are still in the processing store, so fall back to
+        # the per-event task where a failure only affects its own event.
+        for job in jobs:
+            if job.get("saving"):
+                # The group, TSDB or the eventstream may already have counted
+                # this event, saving it again would count it twice.
+                metrics.incr(
+                    "events.failed", tags={"reason": "batch", "stage": "post"}, skip_internal=False
+                )
+                continue
+            save_event.delay(
+                cache_key=job["cache_key"],
+                data=None,
+                start_time=job["start_time"],
+                event_id=job["data"]["event_id"],
+                project_id=job["project_id"],
+            )
+        return
+
+    # Check if the projects are configured for auto upgrading and we need to
+    # upgrade to the latest grouping config, like ``EventManager.save`` does.
+    for project_id in {job["project_id"] for job in saved_jobs}:
+        if _project_should_update_grouping(projects[project_id]):
+            _auto_update_grouping(projects[project_id])
+
+    saved = {id(job) for job in saved_jobs}
+    for job in jobs:
+        cache_key = job["cache_key"]
+        if id(job) in saved:
+            # Put the updated event back into the cache so that post_process
+            # has the most recent data.
+            with metrics.timer("tasks.store.do_save_event.write_processing_cache"):
+                processing.event_processing_store.store(dict(job["event"].data.data.items()))
+        else:
+            # Delete the event payload from cache since it won't show up in post-processing.
+            with metrics.timer("tasks.store.do_save_event.delete_cache"):
+                processing.event_processing_store.delete_by_key(cache_key)
+
+        attachment_cache.delete(cache_key)
+
+        data = job["data"]
+        if job["start_time"]:
+            metrics.timing(
+                "events.time-to-process",
+                time() - job["start_time"],
+                instance=data["platform"],
+                tags={"is_reprocessing2": "false"},
+            )
+
+        time_synthetic_monitoring_event(data, job["project_id"], job["start_time"])
+
+
 def time_synthetic_monitoring_event(
     data: Event, project_id: int, start_time: Optional[int]
 ) -> bool:
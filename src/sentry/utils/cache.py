@@ -1,7 +1,13 @@
+import threading
+import time
+from collections import OrderedDict
+
 from django.core.cache import cache
 
 default_cache = cache
 
+_missing = object()
+
 
 class memoize:
     """
@@ -33,5 +39,62 @@ class memoize:
         return value
 
 
+class LRUCache:
+    """
+    A thread-safe, process-local cache that holds at most ``max_size`` items
+    and evicts the least recently used one first.  Items can optionally
+    expire after ``ttl`` seconds, either per cache or per item.
+
+    >>> cache = LRUCache(max_size=100)
+    >>> cache.set('foo', 1)
+    >>> cache.get('foo')
+    1
+    """
+
+    def __init__(self, max_size, ttl=None):
+        assert max_size > 0
+        self.max_size = max_size
+        self.ttl = ttl
+        # Maps keys to ``(value, expires_at)``
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return self.get(key, _missing) is not _missing
+
+    def get(self, key, default=None):
+        with self._lock:
+            try:
+                value, expires_at = self._data[key]
+            except KeyError:
+                return default
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        if ttl is None:
+            ttl = self.ttl
+        expires_at = time.monotonic() + ttl if ttl is not None else None
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
 def cache_key_for_event(data) -> str:
     return "e:{1}:{0}".format(data["project"], data["event_id"])
@@ -120,6 +120,13 @@ def loads(value: str | bytes, use_rapid_json: bool = False, **kwargs: NoReturn)
             return _default_decoder.decode(value)
 
 
+def raw_decode(value: str, idx: int = 0) -> tuple[JSONData, int]:
+    """Decodes the JSON document at ``idx`` of ``value``, ignoring whatever follows it.
+    Returns the document along with the index at which it ended."""
+    rv: tuple[JSONData, int] = _default_decoder.raw_decode(value, idx)
+    return rv
+
+
 def dumps_htmlsafe(value: object) -> SafeString:
     return mark_safe(_default_escaped_encoder.encode(value))
 
@@ -160,4 +167,5 @@ __all__ = (
     "load",
     "loads",
     "prune_empty_keys",
+    "raw_decode",
 )
@@ -1 +1,3 @@
+from .callcount import count_calls, record_calls  # NOQA
 from .sqlquerycount import SqlQueryCountMonitor  # NOQA
+from .steps import StepProfiler  # NOQA
@@ -0,0 +1,56 @@
+import threading
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+from typing import Generator, MutableMapping, Optional
+
+from django.db import connections
+
+
+class State(threading.local):
+    def __init__(self):
+        self.counter: Optional[MutableMapping[str, int]] = None
+
+
+_state = State()
+
+
+def record_calls(service: str, amount: int = 1) -> None:
+    """
+    Records calls to a service for the innermost `count_calls` block of the
+    current thread, if any.
+    """
+    counter = _state.counter
+    if counter is not None:
+        counter[service] += amount
+
+
+def _count_db_query(execute, sql, params, many, context):
+    record_calls("db")
+    return execute(sql, params, many, context)
+
+
+@contextmanager
+def count_calls() -> Generator[MutableMapping[str, int], None, None]:
+    """
+    Counts the database queries (``db``), redis round trips (``redis``) and
+    snuba queries (``snuba``) made by the current thread within the block.
+
+    Redis round trips are counted by the connections of the blaster clusters
+    in `sentry.utils.redis`, other redis clients are not counted. Queries that
+    snuba runs in its thread pool are counted for the thread that issued them.
+    Calls counted by nested blocks are also counted by the enclosing block.
+    """
+    parent = _state.counter
+    counter: MutableMapping[str, int] = Counter()
+    _state.counter = counter
+    try:
+        with ExitStack() as stack:
+            if parent is None:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(_count_db_query))
+            yield counter
+    finally:
+        _state.counter = parent
+        if parent is not None:
+            for service, count in counter.items():
+                parent[service] += count
@@ -0,0 +1,79 @@
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Generator, List, Mapping, Optional, Sequence
+
+from sentry.utils import metrics
+from sentry.utils.performance.callcount import count_calls
+
+
+@dataclass(frozen=True)
+class StepProfile:
+    name: str
+    wall_time: float
+    cpu_time: float
+    calls: Mapping[str, int]
+    failed: bool
+
+    def as_trace(self) -> Mapping[str, Any]:
+        return {
+            "step": self.name,
+            "wall_time_ms": round(self.wall_time * 1000, 3),
+            "cpu_time_ms": round(self.cpu_time * 1000, 3),
+            "calls": dict(self.calls),
+            "failed": self.failed,
+        }
+
+
+class StepProfiler:
+    """
+    Profiles the steps of a pipeline, such as the post process pipeline of an
+    event. Every step records its wall time, the CPU time of the thread and the
+    number of calls it made to the database, redis and snuba (see
+    `count_calls`.) These are emitted as the ``{prefix}.wall_time``,
+    ``{prefix}.cpu_time`` and ``{prefix}.calls`` metrics, tagged with the step
+    name, the result of the step and the service called.
+    """
+
+    services: Sequence[str] = ("db", "redis", "snuba")
+
+    def __init__(self, prefix: str, tags: Optional[Mapping[str, Any]] = None) -> None:
+        self.prefix = prefix
+        self.tags = tags or {}
+        self.profiles: List[StepProfile] = []
+
+    @contextmanager
+    def step(self, name: str) -> Generator[None, None, None]:
+        failed = True
+        calls: Mapping[str, int] = {}
+        wall_start = time.perf_counter()
+        cpu_start = time.thread_time()
+        try:
+            with count_calls() as calls:
+                yield
+            failed = False
+        finally:
+            profile = StepProfile(
+                name=name,
+                wall_time=time.perf_counter() - wall_start,
+                cpu_time=time.thread_time() - cpu_start,
+                calls=dict(calls),
+                failed=failed,
+            )
+            self.profiles.append(profile)
+            self.__record_metrics(profile)
+
+    def __record_metrics(self, profile: StepProfile) -> None:
+        tags = {**self.tags, "step": profile.name}
+        result_tags = {**tags, "result": "failure" if profile.failed else "success"}
+        metrics.timing(f"{self.prefix}.wall_time", profile.wall_time, tags=result_tags)
+        metrics.timing(f"{self.prefix}.cpu_time", profile.cpu_time, tags=result_tags)
+        for service in self.services:
+            metrics.timing(
+                f"{self.prefix}.calls",
+                profile.calls.get(service, 0),
+                tags={**tags, "service": service},
+            )
+
+    def as_trace(self) -> List[Mapping[str, Any]]:
+        return [profile.as_trace() for profile in self.profiles]
@@ -71,6 +71,15 @@ class PerformanceDetector(ABC):
     def init(self):
         raise NotImplementedError
 
+    def reset(self, event: Event) -> None:
+        """Prepares the detector for visiting the spans of another event."""
+        self._event = event
+        self.init()
+
+    def release(self) -> None:
+        """Drops the last event and everything found in it, once its problems were collected."""
+        self.reset({})
+
     def find_span_prefix(self, settings, span_op: str):
         allowed_span_ops = settings.get("allowed_span_ops", [])
         if len(allowed_span_ops) <= 0:
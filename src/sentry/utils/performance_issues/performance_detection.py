@@ -4,13 +4,14 @@ import hashlib
 import logging
 import random
 import re
+import threading
+import time
 from abc import ABC, abstractmethod
 from collections import defaultdict, deque
 from datetime import timedelta
 from typing import Any, Dict, List, Optional, Sequence, Tuple, cast
 
 import sentry_sdk
-from symbolic import ProguardMapper  # type: ignore
 
 from sentry import features, nodestore, options, projectoptions
 from sentry.eventstore.models import Event
@@ -21,10 +22,11 @@ from sentry.grouptype.grouptype import (
     PerformanceRenderBlockingAssetSpanGroupType,
     PerformanceSlowDBQueryGroupType,
 )
-from sentry.models import Organization, Project, ProjectDebugFile, ProjectOption
+from sentry.models import Organization, Project, ProjectOption
 from sentry.projectoptions.defaults import DEFAULT_PROJECT_PERFORMANCE_DETECTION_SETTINGS
 from sentry.types.issues import GroupType
 from sentry.utils import metrics
+from sentry.utils.cache import LRUCache
 from sentry.utils.event_frames import get_sdk_name
 from sentry.utils.safe import get_path
 
@@ -39,6 +41,7 @@ from .base import (
 )
 from .detectors import NPlusOneAPICallsDetector, UncompressedAssetSpanDetector
 from .performance_problem import PerformanceProblem
+from .proguard import proguard_mappers
 from .types import Span
 
 
@@ -47,6 +50,7 @@ def join_regexes(regexes: Sequence[str]) -> str:
 
 
 PERFORMANCE_GROUP_COUNT_LIMIT = 10
+DETECTION_SETTINGS_CACHE_SIZE = 1000
 INTEGRATIONS_OF_INTEREST = [
     "django",
     "flask",
@@ -147,6 +151,11 @@ def detect_performance_problems(data: Event, project: Project) -> List[Performan
 # Duration thresholds are in milliseconds.
 # Allowed span ops are allowed span prefixes. (eg. 'http' would work for a span with 'http.client' as its op)
 def get_detection_settings(project_id: Optional[int] = None) -> Dict[DetectorType, Any]:
+    return _build_detection_settings(_get_raw_detection_settings(project_id))
+
+
+# Reads the system and project options detection settings are built from.
+def _get_raw_detection_settings(project_id: Optional[int] = None) -> Dict[str, Any]:
     system_settings = {
         "n_plus_one_db_count": options.get("performance.issues.n_plus_one_db.count_threshold"),
         "n_plus_one_db_duration_threshold": options.get(
@@ -188,8 +197,10 @@ def get_detection_settings(project_id: Optional[int] = None) -> Dict[DetectorTyp
         **project_option_settings,
     }  # Merge saved project settings into default so updating the default to add new settings works in the future.
 
-    settings = {**system_settings, **project_settings}
+    return {**system_settings, **project_settings}
 
+
+def _build_detection_settings(settings: Dict[str, Any]) -> Dict[DetectorType, Any]:
     return {
         DetectorType.SLOW_DB_QUERY: [
             {
@@ -248,27 +259,91 @@ def get_detection_settings(project_id: Optional[int] = None) -> Dict[DetectorTyp
     }
 
 
+class ProjectDetectionSettings:
+    """
+    Detection settings of a project, stamped with the raw option values they were built from.
+    Holds detector instances that are reset and reused for every event of the project, so
+    that they are only allocated once.  Not thread-safe, see `get_project_detection_settings`.
+    """
+
+    def __init__(self, raw_settings: Dict[str, Any]):
+        self.raw_settings = raw_settings
+        self.settings = _build_detection_settings(raw_settings)
+        self._detectors: Optional[List[PerformanceDetector]] = None
+
+    def get_detectors(self, data: Event) -> List[PerformanceDetector]:
+        if self._detectors is None:
+            self._detectors = [
+                ConsecutiveDBSpanDetector(self.settings, data),
+                SlowDBQueryDetector(self.settings, data),
+                RenderBlockingAssetSpanDetector(self.settings, data),
+                NPlusOneDBSpanDetector(self.settings, data),
+                NPlusOneDBSpanDetectorExtended(self.settings, data),
+                FileIOMainThreadDetector(self.settings, data),
+                NPlusOneAPICallsDetector(self.settings, data),
+                MNPlusOneDBSpanDetector(self.settings, data),
+                UncompressedAssetSpanDetector(self.settings, data),
+            ]
+        else:
+            for detector in self._detectors:
+                detector.reset(data)
+        return self._detectors
+
+    def release_detectors(self) -> None:
+        """Releases the event the reused detectors were last run on, see `get_detectors`."""
+        for detector in self._detectors or ():
+            detector.release()
+
+
+# Detectors keep per-event state, so every thread gets its own cache.
+_detection_settings_cache = threading.local()
+
+
+def get_project_detection_settings(project_id: int) -> ProjectDetectionSettings:
+    """
+    Returns the cached detection settings of a project.  Within the
+    `performance.issues.settings-cache-ttl` they are returned without reading any option.
+    After that, options are read again and the settings are only rebuilt if they changed.
+    """
+    cache = getattr(_detection_settings_cache, "cache", None)
+    if cache is None:
+        cache = _detection_settings_cache.cache = LRUCache(DETECTION_SETTINGS_CACHE_SIZE)
+
+    cached = cache.get(project_id)
+    if cached is not None:
+        project_settings, checked_at = cached
+        if time.monotonic() - checked_at < options.get("performance.issues.settings-cache-ttl"):
+            return project_settings
+
+    raw_settings = _get_raw_detection_settings(project_id)
+    if cached is not None and cached[0].raw_settings == raw_settings:
+        project_settings = cached[0]
+    else:
+        project_settings = ProjectDetectionSettings(raw_settings)
+    cache.set(project_id, (project_settings, time.monotonic()))
+    return project_settings
+
+
 def _detect_performance_problems(
     data: Event, sdk_span: Any, project: Project
 ) -> List[PerformanceProblem]:
-    event_id = data.get("event_id", None)
     project_id = cast(int, project.id)
 
-    detection_settings = get_detection_settings(project_id)
-    detectors: List[PerformanceDetector] = [
-        ConsecutiveDBSpanDetector(detection_settings, data),
-        SlowDBQueryDetector(detection_settings, data),
-        RenderBlockingAssetSpanDetector(detection_settings, data),
-        NPlusOneDBSpanDetector(detection_settings, data),
-        NPlusOneDBSpanDetectorExtended(detection_settings, data),
-        FileIOMainThreadDetector(detection_settings, data),
-        NPlusOneAPICallsDetector(detection_settings, data),
-        MNPlusOneDBSpanDetector(detection_settings, data),
-        UncompressedAssetSpanDetector(detection_settings, data),
-    ]
+    project_settings = get_project_detection_settings(project_id)
+    detectors = project_settings.get_detectors(data)
+    try:
+        return _collect_performance_problems(data, sdk_span, project, detectors)
+    finally:
+        # Detectors are cached across events, don't keep the event alive until the next one.
+        project_settings.release_detectors()
 
-    for detector in detectors:
-        run_detector_on_data(detector, data)
+
+def _collect_performance_problems(
+    data: Event, sdk_span: Any, project: Project, detectors: Sequence[PerformanceDetector]
+) -> List[PerformanceProblem]:
+    event_id = data.get("event_id", None)
+
+    run_detectors_on_data(detectors, data)
 
     # Metrics reporting only for detection, not created issues.
     report_metrics_for_detectors(data, event_id, detectors, sdk_span)
@@ -310,14 +385,22 @@ def _detect_performance_problems(
 
 
 def run_detector_on_data(detector, data):
-    if not detector.is_event_eligible(data):
+    run_detectors_on_data([detector], data)
+
+
+# Walks the spans of the event once and hands every span to all eligible detectors in turn.
+def run_detectors_on_data(detectors: Sequence[PerformanceDetector], data: Event) -> None:
+    detectors = [detector for detector in detectors if detector.is_event_eligible(data)]
+    if not detectors:
         return
 
-    spans = data.get("spans", [])
-    for span in spans:
-        detector.visit_span(span)
+    visitors = [detector.visit_span for detector in detectors]
+    for span in data.get("spans", []):
+        for visit_span in visitors:
+            visit_span(span)
 
-    detector.on_complete()
+    for detector in detectors:
+        detector.on_complete()
 
 
 def contains_complete_query(span: Span, is_source: Optional[bool] = False) -> bool:
@@ -961,7 +1044,6 @@ class FileIOMainThreadDetector(PerformanceDetector):
         self.stored_problems = {}
         self.mapper = None
         self.parent_to_blocked_span = defaultdict(list)
-        self._prepare_deobfuscation()
 
     def _prepare_deobfuscation(self):
         event = self._event
@@ -977,18 +1059,7 @@ class FileIOMainThreadDetector(PerformanceDetector):
 
             for image in images:
                 if image.get("type") == "proguard":
-                    uuid = image.get("uuid")
-                    dif_paths = ProjectDebugFile.difcache.fetch_difs(
-                        project, [uuid], features=["mapping"]
-                    )
-                    debug_file_path = dif_paths.get(uuid)
-                    if debug_file_path is None:
-                        return
-
-                    mapper = ProguardMapper.open(debug_file_path)
-                    if not mapper.has_line_info:
-                        return
-                    self.mapper = mapper
+                    self.mapper = proguard_mappers.get(project, image.get("uuid"))
                     return
 
     def _deobfuscate_module(self, module: str) -> str:
@@ -999,10 +1070,9 @@ class FileIOMainThreadDetector(PerformanceDetector):
 
     def _deobfuscate_function(self, frame):
         if self.mapper is not None and "module" in frame and "function" in frame:
-            functions = self.mapper.remap_frame(
+            return self.mapper.remap_function(
                 frame["module"], frame["function"], frame.get("lineno") or 0
             )
-            return ".".join([func.method for func in functions])
         else:
             return frame.get("function", "")
 
@@ -1012,6 +1082,10 @@ class FileIOMainThreadDetector(PerformanceDetector):
             self.parent_to_blocked_span[parent_span_id].append(span)
 
     def on_complete(self):
+        # Mapping files are only needed to fingerprint problems, most events have none.
+        if self.parent_to_blocked_span:
+            self._prepare_deobfuscation()
+
         for parent_span_id, span_list in self.parent_to_blocked_span.items():
             span_list = [
                 span for span in span_list if "start_timestamp" in span and "timestamp" in span
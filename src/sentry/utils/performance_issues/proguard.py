@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from symbolic import ProguardMapper  # type: ignore
+
+from sentry import options
+from sentry.models import Project, ProjectDebugFile
+
+# Lookups that did not yield a usable mapping file are cached for this long, so that a mapping
+# file that is uploaded after the first events arrive is picked up eventually.
+MISSING_MAPPER_TTL = 60  # seconds
+# Upper bound of remapped names kept per mapper, the names are dropped once it is reached.
+MAX_REMAPPED_NAMES = 10000
+
+
+class CachedProguardMapper:
+    """
+    Wraps a `ProguardMapper` and memoizes the names it remaps, since the same classes and
+    frames show up in the call stacks of many events.
+    """
+
+    def __init__(self, mapper: ProguardMapper):
+        self.mapper = mapper
+        self._classes: Dict[str, Optional[str]] = {}
+        self._functions: Dict[Tuple[str, str, int], str] = {}
+
+    def remap_class(self, module: str) -> Optional[str]:
+        try:
+            return self._classes[module]
+        except KeyError:
+            pass
+
+        if len(self._classes) >= MAX_REMAPPED_NAMES:
+            self._classes.clear()
+        rv = self._classes[module] = self.mapper.remap_class(module)
+        return rv
+
+    def remap_function(self, module: str, function: str, lineno: int) -> str:
+        key = (module, function, lineno)
+        try:
+            return self._functions[key]
+        except KeyError:
+            pass
+
+        if len(self._functions) >= MAX_REMAPPED_NAMES:
+            self._functions.clear()
+        functions = self.mapper.remap_frame(module, function, lineno)
+        rv = self._functions[key] = ".".join([func.method for func in functions])
+        return rv
+
+
+class ProguardMapperCache:
+    """
+    A process-wide LRU cache of opened proguard mappers, keyed by project and debug file UUID.
+
+    `ProguardMapper.open` memory maps the mapping file, the mapper's indexes are weighed by the
+    size of that file.  Least recently used mappers are evicted once the summed size exceeds the
+    `performance.issues.proguard-mapper-cache-bytes` option.  The project is part of the key so
+    that an event is only deobfuscated with mapping files uploaded to its own project.
+    """
+
+    def __init__(self) -> None:
+        # Maps ``(project_id, uuid)`` to ``(mapper, size, expires_at)``
+        self._mappers: OrderedDict[
+            Tuple[int, str], Tuple[Optional[CachedProguardMapper], int, Optional[float]]
+        ] = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._mappers)
+
+    def get(self, project: Project, uuid: str) -> Optional[CachedProguardMapper]:
+        key = (project.id, uuid)
+        with self._lock:
+            entry = self._mappers.get(key)
+            if entry is not None:
+                mapper, size, expires_at = entry
+                if expires_at is None or expires_at > time.monotonic():
+                    self._mappers.move_to_end(key)
+                    return mapper
+                self._remove(key)
+
+        mapper, size, expires_at = self._load(project, uuid)
+        with self._lock:
+            if key in self._mappers:
+                self._remove(key)
+            self._mappers[key] = (mapper, size, expires_at)
+            self._size += size
+            max_size = options.get("performance.issues.proguard-mapper-cache-bytes")
+            while self._size > max_size and len(self._mappers) > 1:
+                self._remove(next(iter(self._mappers)))
+        return mapper
+
+    def clear(self) -> None:
+        with self._lock:
+            self._mappers.clear()
+            self._size = 0
+
+    def _remove(self, key: Tuple[int, str]) -> None:
+        _, size, _ = self._mappers.pop(key)
+        self._size -= size
+
+    def _load(
+        self, project: Project, uuid: str
+    ) -> Tuple[Optional[CachedProguardMapper], int, Optional[float]]:
+        dif_paths = ProjectDebugFile.difcache.fetch_difs(project, [uuid], features=["mapping"])
+        debug_file_path = dif_paths.get(uuid)
+        if debug_file_path is None:
+            return None, 0, time.monotonic() + MISSING_MAPPER_TTL
+
+        mapper = ProguardMapper.open(debug_file_path)
+        if not mapper.has_line_info:
+            return None, 0, time.monotonic() + MISSING_MAPPER_TTL
+        return CachedProguardMapper(mapper), os.path.getsize(debug_file_path), None
+
+
+proguard_mappers = ProguardMapperCache()
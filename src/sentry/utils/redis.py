@@ -10,7 +10,7 @@ import rb
 from django.utils.functional import SimpleLazyObject
 from pkg_resources import resource_string
 from redis.client import Script, StrictRedis
-from redis.connection import ConnectionPool, Encoder
+from redis.connection import Connection, ConnectionPool, Encoder
 from redis.exceptions import BusyLoadingError, ConnectionError, ReadOnlyError
 from redis.exceptions import TimeoutError as RedisTimeoutError
 from rediscluster import RedisCluster
@@ -20,6 +20,7 @@ from sentry import options
 from sentry.exceptions import InvalidConfiguration
 from sentry.utils import warnings
 from sentry.utils.imports import import_string
+from sentry.utils.performance.callcount import record_calls
 from sentry.utils.versioning import Version, check_versions
 from sentry.utils.warnings import DeprecatedSettingWarning
 
@@ -29,7 +30,20 @@ _pool_cache = {}
 _pool_lock = Lock()
 
 
+@functools.lru_cache(maxsize=None)
+def _counted_connection_class(connection_class):
+    class CountedConnection(connection_class):
+        # Single commands and whole pipelines are sent with this method, so
+        # this counts round trips rather than commands (see `count_calls`).
+        def send_packed_command(self, *args, **kwargs):
+            record_calls("redis")
+            return super().send_packed_command(*args, **kwargs)
+
+    return CountedConnection
+
+
 def _shared_pool(**opts):
+    opts["connection_class"] = _counted_connection_class(opts.get("connection_class", Connection))
     if "host" in opts:
         key = "{}:{}/{}".format(opts["host"], opts["port"], opts["db"])
     else:
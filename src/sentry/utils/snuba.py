@@ -1,15 +1,30 @@
+import codecs
 import functools
 import logging
 import os
 import re
+import threading
 import time
-from collections import namedtuple
-from concurrent.futures import ThreadPoolExecutor
+from collections import Counter, namedtuple
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FuturesTimeoutError
 from contextlib import contextmanager
 from copy import deepcopy
 from datetime import datetime, timedelta
 from hashlib import sha1
-from typing import Any, Callable, List, Mapping, MutableMapping, Optional, Sequence, Tuple, Union
+from queue import Full
+from typing import (
+    Any,
+    Callable,
+    Iterator,
+    List,
+    Mapping,
+    MutableMapping,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
 from urllib.parse import urlparse
 
 import pytz
@@ -22,6 +37,7 @@ from sentry_sdk import Hub
 from snuba_sdk import Request
 from snuba_sdk.legacy import json_to_snql
 
+from sentry.exceptions import InvalidConfiguration
 from sentry.models import (
     Environment,
     Group,
@@ -37,7 +53,9 @@ from sentry.snuba.dataset import Dataset
 from sentry.snuba.events import Columns
 from sentry.snuba.referrer import validate_referrer
 from sentry.utils import json, metrics
+from sentry.utils.concurrent import ThreadedExecutor, TimedFuture
 from sentry.utils.dates import outside_retention_with_modified_start, to_timestamp
+from sentry.utils.performance.callcount import record_calls
 
 logger = logging.getLogger(__name__)
 
@@ -200,6 +218,13 @@ class RateLimitExceeded(SnubaError):
     """
 
 
+class QueryQueueFull(SnubaError):
+    """
+    Exception raised when a query was rejected because the queue of its
+    referrer group stayed full for longer than the queue timeout.
+    """
+
+
 class SchemaValidationError(QueryExecutionError):
     """
     Exception raised when a query is not valid.
@@ -363,7 +388,80 @@ _snuba_pool = connection_from_url(
     timeout=settings.SENTRY_SNUBA_TIMEOUT,
     maxsize=10,
 )
-_query_thread_pool = ThreadPoolExecutor(max_workers=10)
+
+
+class QueryExecutor:
+    """
+    Sends the queries of bulk requests from worker threads.  Referrers are assigned to groups
+    that each have their own workers and bounded queue, so that one busy group of referrers can
+    not hold up the queries of all others.  Worker threads are only started on first use.
+    """
+
+    def __init__(self, groups: Mapping[str, Mapping[str, Any]], queue_timeout: float):
+        if "default" not in groups:
+            raise InvalidConfiguration(
+                "Snuba executors must include a `default` group for unmatched referrers"
+            )
+        self.groups = groups
+        self.queue_timeout = queue_timeout
+        self._executors = {
+            name: ThreadedExecutor(
+                worker_count=group["workers"], maxsize=group.get("queue_size", 0)
+            )
+            for name, group in groups.items()
+        }
+        self._referrer_groups: MutableMapping[str, str] = {}
+        self._in_flight: MutableMapping[str, int] = Counter()
+        self._lock = threading.Lock()
+
+    def get_group(self, referrer: str) -> str:
+        group = self._referrer_groups.get(referrer)
+        if group is None:
+            group = next(
+                (
+                    name
+                    for name, config in self.groups.items()
+                    if referrer.startswith(tuple(config.get("referrers", ())))
+                ),
+                "default",
+            )
+            self._referrer_groups[referrer] = group
+        return group
+
+    def submit(self, referrer: str, function: Callable[[], Any]) -> TimedFuture:
+        group = self.get_group(referrer)
+        tags = {"group": group}
+        submitted = time.time()
+
+        def run() -> Any:
+            metrics.timing("snuba.executor.queue_wait", time.time() - submitted, tags=tags)
+            with self._lock:
+                self._in_flight[group] += 1
+                in_flight = self._in_flight[group]
+            metrics.gauge("snuba.executor.in_flight", in_flight, tags=tags)
+            try:
+                return function()
+            finally:
+                with self._lock:
+                    self._in_flight[group] -= 1
+
+        future = self._executors[group].submit(run, block=True, timeout=self.queue_timeout)
+        if future.done() and isinstance(future.exception(), Full):
+            metrics.incr("snuba.executor.rejected", tags=tags)
+            raise QueryQueueFull(f"Queue of snuba referrer group {group} is full")
+        return future
+
+
+_query_executor = QueryExecutor(
+    settings.SENTRY_SNUBA_EXECUTORS, settings.SENTRY_SNUBA_EXECUTOR_QUEUE_TIMEOUT
+)
+# Size of the chunks in which streamed responses are read, see `iter_raw_snql_query`.
+STREAMING_CHUNK_SIZE = 64 * 1024
+
+# Maps cache keys of queries that are currently being sent to snuba to the future of their
+# response, so that identical queries issued concurrently share a single request.
+_in_flight_queries: MutableMapping[str, Future] = {}
+_in_flight_lock = threading.Lock()
 
 
 epoch_naive = datetime(1970, 1, 1, tzinfo=None)
@@ -763,6 +861,162 @@ def bulk_snql_query(
     return _apply_cache_and_build_results(params, referrer=referrer, use_cache=use_cache)
 
 
+def iter_raw_snql_query(
+    request: Request,
+    referrer: Optional[str] = None,
+) -> Iterator[Mapping[str, Any]]:
+    """
+    Like `raw_snql_query`, but yields the rows of the result while they are decoded from the
+    response instead of holding the entire result in memory.  Errors are raised before the first
+    row is yielded.  Results are never cached nor shared with identical in-flight queries.
+
+    The connection of the response is returned to the pool once all rows have been read.  Rows
+    that are not read to the end must be closed, for example by using the result as a context
+    manager, so that the connection is not held on to.
+    """
+    metrics.incr("snql.sdk.api", tags={"referrer": referrer or "unknown"})
+    validate_referrer(referrer)
+    if "consistent" in OVERRIDE_OPTIONS:
+        request.flags.consistent = OVERRIDE_OPTIONS["consistent"]
+
+    headers = {"referer": referrer} if referrer else {}
+    with sentry_sdk.configure_scope() as scope:
+        if scope.transaction:
+            request.parent_api = scope.transaction.name
+
+    record_calls("snuba")
+    try:
+        response = _raw_snql_query(request, Hub(Hub.current), headers, preload_content=False)
+    except urllib3.exceptions.HTTPError as err:
+        raise SnubaError(err)
+
+    if response.status != 200:
+        _decode_snuba_response(response, headers)
+
+    return _ResponseRows(response)
+
+
+class _ResponseRows(Iterator[Any]):
+    """
+    The rows of a streamed response, see `iter_raw_snql_query`.  Closing the rows before they
+    were read to the end closes the connection of the response, even if no row was read yet.
+    """
+
+    def __init__(self, response: urllib3.response.HTTPResponse):
+        self._response = response
+        self._rows = _iter_response_rows(response)
+        self._closed = False
+
+    def __next__(self) -> Any:
+        return next(self._rows)
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        # Closing a generator that hasn't started yet doesn't run its `finally` block.
+        self._rows.close()
+        if self._response.connection is not None:
+            self._response.close()
+
+    def __enter__(self) -> "_ResponseRows":
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
+
+    def __del__(self) -> None:
+        self.close()
+
+
+def _iter_response_rows(response: urllib3.response.HTTPResponse) -> Iterator[Any]:
+    reader = _JSONStreamReader(response.stream(STREAMING_CHUNK_SIZE))
+    completed = False
+    try:
+        reader.expect("{")
+        while reader.peek() != "}":
+            key = reader.decode_value()
+            reader.expect(":")
+            if key != "data":
+                reader.decode_value()
+            else:
+                reader.expect("[")
+                while reader.peek() != "]":
+                    yield reader.decode_value()
+                    if reader.peek() == ",":
+                        reader.expect(",")
+                reader.expect("]")
+            if reader.peek() == ",":
+                reader.expect(",")
+        completed = True
+    except urllib3.exceptions.HTTPError as err:
+        raise SnubaError(err)
+    finally:
+        # Connections with unread data can not be reused.
+        if completed:
+            response.release_conn()
+        else:
+            response.close()
+
+
+_NUMBER_CHARACTERS = frozenset("0123456789.eE+-")
+
+
+class _JSONStreamReader:
+    """
+    Decodes JSON incrementally from a stream of byte chunks.  Only holds the current chunk and
+    the value being decoded in memory.
+    """
+
+    def __init__(self, chunks: Iterator[bytes]):
+        self._chunks = chunks
+        self._decoder = codecs.getincrementaldecoder("utf-8")()
+        self._buffer = ""
+        self._pos = 0
+
+    def _fill(self) -> bool:
+        chunk = next(self._chunks, None)
+        if chunk is None:
+            return False
+        self._buffer = self._buffer[self._pos :] + self._decoder.decode(chunk)
+        self._pos = 0
+        return True
+
+    def peek(self) -> str:
+        while True:
+            while self._pos < len(self._buffer) and self._buffer[self._pos] in " \t\n\r":
+                self._pos += 1
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+            if not self._fill():
+                raise UnexpectedResponseError("Unexpected end of JSON response")
+
+    def expect(self, char: str) -> None:
+        if self.peek() != char:
+            raise UnexpectedResponseError(f"Could not decode JSON response, expected {char!r}")
+        self._pos += 1
+
+    def decode_value(self) -> Any:
+        self.peek()
+        while True:
+            try:
+                value, end = json.raw_decode(self._buffer, self._pos)
+            except json.JSONDecodeError:
+                if self._fill():
+                    continue
+                raise UnexpectedResponseError("Could not decode JSON response")
+            # A number may continue in the next chunk, whether it was split within its digits
+            # (`12` | `34`) or right after its fraction or exponent mark (`0.` | `25`).
+            if (
+                type(value) in (int, float)
+                and (end == len(self._buffer) or self._buffer[end] in _NUMBER_CHARACTERS)
+                and self._fill()
+            ):
+                continue
+            self._pos = end
+            return value
+
+
 def get_cache_key(query: SnubaQuery) -> str:
     if isinstance(query, Request):
         hashable = str(query)
@@ -792,6 +1046,12 @@ def _apply_cache_and_build_results(
     if referrer:
         headers["referer"] = referrer
 
+    revalidate_settings = settings.SENTRY_SNUBA_CACHE_REVALIDATE.get(referrer)
+    if revalidate_settings is not None:
+        return _apply_revalidating_cache_and_build_results(
+            snuba_param_list, headers, referrer, revalidate_settings
+        )
+
     # Store the original position of the query so that we can maintain the order
     query_param_list = list(enumerate(snuba_param_list))
 
@@ -826,6 +1086,77 @@ def _apply_cache_and_build_results(
     return [result[1] for result in results]
 
 
+def _apply_revalidating_cache_and_build_results(
+    snuba_param_list: Sequence[SnubaQueryBody],
+    headers: Mapping[str, str],
+    referrer: str,
+    revalidate_settings: Mapping[str, int],
+) -> ResultSet:
+    """
+    Serves cached results until they are older than `soft_ttl`.  Then the first caller to take
+    a short lock queries snuba to refresh the result, while concurrent callers keep being served
+    the stale result instead of running the same query.  Should the refresh fail, the stale
+    result is served to the refreshing caller as well.
+    """
+    metric_tags = {"referrer": referrer}
+    cache_keys = [f"{get_cache_key(query_params[0])}:swr" for query_params in snuba_param_list]
+    cache_data = cache.get_many(cache_keys)
+    now = time.time()
+
+    results: List[Any] = [None] * len(snuba_param_list)
+    stale_results: MutableMapping[int, Mapping[str, Any]] = {}
+    to_query: List[Tuple[int, SnubaQueryBody, str]] = []
+    for query_pos, (query_params, cache_key) in enumerate(zip(snuba_param_list, cache_keys)):
+        cached_result = cache_data.get(cache_key)
+        if cached_result is None:
+            metrics.incr("snuba.query_cache.miss", tags=metric_tags)
+            to_query.append((query_pos, query_params, cache_key))
+            continue
+
+        cached_result = json.loads(cached_result)
+        if cached_result["refresh_at"] > now:
+            metrics.incr("snuba.query_cache.hit", tags=metric_tags)
+            results[query_pos] = cached_result["result"]
+        elif cache.add(f"{cache_key}:lock", 1, settings.SENTRY_SNUBA_TIMEOUT):
+            metrics.incr("snuba.query_cache.revalidate", tags=metric_tags)
+            stale_results[query_pos] = cached_result["result"]
+            to_query.append((query_pos, query_params, cache_key))
+        else:
+            metrics.incr("snuba.query_cache.stale", tags={**metric_tags, "reason": "coalesced"})
+            results[query_pos] = cached_result["result"]
+
+    if not to_query:
+        return results
+
+    try:
+        query_results = _bulk_snuba_query([item[1] for item in to_query], headers)
+    except SnubaError:
+        if len(stale_results) < len(to_query):
+            raise
+        for query_pos, stale_result in stale_results.items():
+            metrics.incr("snuba.query_cache.stale", tags={**metric_tags, "reason": "error"})
+            results[query_pos] = stale_result
+        return results
+    finally:
+        cache.delete_many(
+            [
+                f"{cache_key}:lock"
+                for query_pos, _, cache_key in to_query
+                if query_pos in stale_results
+            ]
+        )
+
+    refresh_at = time.time() + revalidate_settings["soft_ttl"]
+    for result, (query_pos, _, cache_key) in zip(query_results, to_query):
+        cache.set(
+            cache_key,
+            json.dumps({"result": result, "refresh_at": refresh_at}),
+            revalidate_settings["ttl"],
+        )
+        results[query_pos] = result
+    return results
+
+
 def _bulk_snuba_query(
     snuba_param_list: Sequence[SnubaQueryBody],
     headers: Mapping[str, str],
@@ -853,57 +1184,72 @@ def _bulk_snuba_query(
             if scope.transaction:
                 parent_api = scope.transaction.name
 
-        if len(snuba_param_list) > 1:
-            query_results = list(
-                _query_thread_pool.map(
-                    query_fn,
-                    [
-                        (params, Hub(Hub.current), headers, parent_api)
-                        for params in snuba_param_list
-                    ],
-                )
+        # Identical queries, whether issued by other threads or repeated within this bulk
+        # query, wait for the response of the first one instead of querying snuba again.
+        # Queries of different referrers are never shared, snuba attributes and rate limits
+        # queries by their referrer.
+        futures: List[Future] = []
+        to_query: List[Tuple[str, Future, SnubaQueryBody]] = []
+        with _in_flight_lock:
+            for params in snuba_param_list:
+                cache_key = f"{query_referrer}:{get_cache_key(params[0])}"
+                future = _in_flight_queries.get(cache_key)
+                if future is None:
+                    future = _in_flight_queries[cache_key] = Future()
+                    to_query.append((cache_key, future, params))
+                futures.append(future)
+
+        record_calls("snuba", len(to_query))
+        coalesced = len(snuba_param_list) - len(to_query)
+        span.set_tag("snuba.num_coalesced_queries", coalesced)
+        metrics.incr(
+            "snuba.query.single_flight",
+            amount=len(to_query),
+            tags={"referrer": query_referrer, "coalesced": "false"},
+        )
+        if coalesced:
+            metrics.incr(
+                "snuba.query.single_flight",
+                amount=coalesced,
+                tags={"referrer": query_referrer, "coalesced": "true"},
             )
-        else:
-            # No need to submit to the thread pool if we're just performing a single query
-            query_results = [query_fn((snuba_param_list[0], Hub(Hub.current), headers, parent_api))]
 
-    results = []
-    for response, _, reverse in query_results:
-        try:
-            body = json.loads(response.data)
-            if SNUBA_INFO:
-                if "sql" in body:
-                    print(  # NOQA: only prints when an env variable is set
-                        "{}.sql:\n {}".format(
-                            headers.get("referer", "<unknown>"),
-                            sqlparse.format(body["sql"], reindent_aligned=True),
-                        )
+        if len(to_query) > 1:
+            for cache_key, future, params in to_query:
+                try:
+                    _query_executor.submit(
+                        query_referrer,
+                        functools.partial(
+                            _run_in_flight_query,
+                            cache_key,
+                            future,
+                            query_fn,
+                            (params, Hub(Hub.current), headers, parent_api),
+                        ),
                     )
-                if "error" in body:
-                    print(  # NOQA: only prints when an env variable is set
-                        "{}.err: {}".format(headers.get("referer", "<unknown>"), body["error"])
-                    )
-        except ValueError:
-            if response.status != 200:
-                logger.exception("snuba.query.invalid-json", extra={"response.data": response.data})
-                raise SnubaError("Failed to parse snuba error response")
-            raise UnexpectedResponseError(f"Could not decode JSON response: {response.data}")
+                except BaseException as e:
+                    # Not only ``QueryQueueFull``, starting a worker thread can fail as
+                    # well. Resolve the future so that nobody waits for it forever.
+                    future.set_exception(e)
+                    with _in_flight_lock:
+                        _in_flight_queries.pop(cache_key, None)
+        elif to_query:
+            # No need to submit to the executor if we're just performing a single query
+            cache_key, future, params = to_query[0]
+            _run_in_flight_query(
+                cache_key, future, query_fn, (params, Hub(Hub.current), headers, parent_api)
+            )
 
-        if response.status != 200:
-            if body.get("error"):
-                error = body["error"]
-                if response.status == 429:
-                    raise RateLimitExceeded(error["message"])
-                elif error["type"] == "schema":
-                    raise SchemaValidationError(error["message"])
-                elif error["type"] == "clickhouse":
-                    raise clickhouse_error_codes_map.get(error["code"], QueryExecutionError)(
-                        error["message"]
-                    )
-                else:
-                    raise SnubaError(error["message"])
-            else:
-                raise SnubaError(f"HTTP {response.status}")
+        # Every query parses the shared response on its own, results are not shared between
+        # callers as they are commonly mutated.
+        query_results = [
+            (_wait_for_in_flight_query(future), reverse)
+            for future, (_, _, reverse) in zip(futures, snuba_param_list)
+        ]
+
+    results = []
+    for response, reverse in query_results:
+        body = _decode_snuba_response(response, headers)
 
         # Forward and reverse translation maps from model ids to snuba keys, per column
         body["data"] = [reverse(d) for d in body["data"]]
@@ -912,9 +1258,76 @@ def _bulk_snuba_query(
     return results
 
 
+def _decode_snuba_response(
+    response: urllib3.response.HTTPResponse, headers: Mapping[str, str]
+) -> MutableMapping[str, Any]:
+    try:
+        body = json.loads(response.data)
+        if SNUBA_INFO:
+            if "sql" in body:
+                print(  # NOQA: only prints when an env variable is set
+                    "{}.sql:\n {}".format(
+                        headers.get("referer", "<unknown>"),
+                        sqlparse.format(body["sql"], reindent_aligned=True),
+                    )
+                )
+            if "error" in body:
+                print(  # NOQA: only prints when an env variable is set
+                    "{}.err: {}".format(headers.get("referer", "<unknown>"), body["error"])
+                )
+    except ValueError:
+        if response.status != 200:
+            logger.exception("snuba.query.invalid-json", extra={"response.data": response.data})
+            raise SnubaError("Failed to parse snuba error response")
+        raise UnexpectedResponseError(f"Could not decode JSON response: {response.data}")
+
+    if response.status != 200:
+        if body.get("error"):
+            error = body["error"]
+            if response.status == 429:
+                raise RateLimitExceeded(error["message"])
+            elif error["type"] == "schema":
+                raise SchemaValidationError(error["message"])
+            elif error["type"] == "clickhouse":
+                raise clickhouse_error_codes_map.get(error["code"], QueryExecutionError)(
+                    error["message"]
+                )
+            else:
+                raise SnubaError(error["message"])
+        else:
+            raise SnubaError(f"HTTP {response.status}")
+
+    return body
+
+
 RawResult = Tuple[urllib3.response.HTTPResponse, Callable[[Any], Any], Callable[[Any], Any]]
 
 
+def _run_in_flight_query(
+    cache_key: str,
+    future: Future,
+    query_fn: Callable[[Tuple[SnubaQueryBody, Hub, Mapping[str, str], str]], RawResult],
+    params: Tuple[SnubaQueryBody, Hub, Mapping[str, str], str],
+) -> None:
+    try:
+        response, _, _ = query_fn(params)
+        future.set_result(response)
+    except BaseException as e:
+        future.set_exception(e)
+    finally:
+        with _in_flight_lock:
+            _in_flight_queries.pop(cache_key, None)
+
+
+def _wait_for_in_flight_query(future: Future) -> urllib3.response.HTTPResponse:
+    # A query waits for room in its executor queue before it is sent to snuba.
+    timeout = settings.SENTRY_SNUBA_EXECUTOR_QUEUE_TIMEOUT + settings.SENTRY_SNUBA_TIMEOUT
+    try:
+        return future.result(timeout=timeout)
+    except FuturesTimeoutError:
+        raise SnubaError(f"No response to in-flight snuba query within {timeout} seconds")
+
+
 def _snql_query(params: Tuple[SnubaQuery, Hub, Mapping[str, str], str]) -> RawResult:
     # Eventually we can get rid of this wrapper, but for now it's cleaner to unwrap
     # the params here than in the calling function.
@@ -945,7 +1358,7 @@ def _legacy_snql_query(params: Tuple[SnubaQuery, Hub, Mapping[str, str], str]) -
 
 
 def _raw_snql_query(
-    request: Request, thread_hub: Hub, headers: Mapping[str, str]
+    request: Request, thread_hub: Hub, headers: Mapping[str, str], preload_content: bool = True
 ) -> urllib3.response.HTTPResponse:
     # Enter hub such that http spans are properly nested
     with thread_hub, timer("snql_query"):
@@ -965,7 +1378,11 @@ def _raw_snql_query(
         with thread_hub.start_span(op="snuba_snql.run", description=str(request)) as span:
             span.set_tag("snuba.referrer", referrer)
             return _snuba_pool.urlopen(
-                "POST", f"/{request.dataset}/snql", body=body, headers=headers
+                "POST",
+                f"/{request.dataset}/snql",
+                body=body,
+                headers=headers,
+                preload_content=preload_content,
             )
 
 
@@ -67,24 +67,26 @@ def call_endpoint(client, relay, private_key, default_projectkey):
 @pytest.fixture
 def projectconfig_cache_get_mock_config(monkeypatch):
     monkeypatch.setattr(
-        "sentry.relay.projectconfig_cache.get", lambda *args, **kwargs: {"is_mock_config": True}
+        "sentry.relay.projectconfig_cache.get_many",
+        lambda public_keys: {key: {"is_mock_config": True} for key in public_keys},
     )
 
 
 @pytest.fixture
 def single_mock_proj_cached(monkeypatch):
-    def cache_get(*args, **kwargs):
-        if args[0] == "must_exist":
-            return {"is_mock_config": True}
-        return None
+    def cache_get_many(public_keys):
+        return {
+            key: {"is_mock_config": True} if key == "must_exist" else None for key in public_keys
+        }
 
-    monkeypatch.setattr("sentry.relay.projectconfig_cache.get", cache_get)
+    monkeypatch.setattr("sentry.relay.projectconfig_cache.get_many", cache_get_many)
 
 
 @pytest.fixture
 def projectconfig_debounced_cache(monkeypatch):
     monkeypatch.setattr(
-        "sentry.relay.projectconfig_debounce_cache.is_debounced", lambda *args, **kargs: True
+        "sentry.relay.projectconfig_debounce_cache.is_debounced_many",
+        lambda public_keys: set(public_keys),
     )
 
 
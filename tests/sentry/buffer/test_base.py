@@ -59,6 +59,24 @@ class BufferTest(TestCase):
         release_project_ = ReleaseProject.objects.get(id=release_project.id)
         assert release_project_.new_groups == 1
 
+    def test_process_batch(self):
+        group = Group.objects.create(project=Project(id=1))
+        other = Group.objects.create(project=Project(id=1))
+        release_project = ReleaseProject.objects.create(project=self.project, release=self.release)
+        the_date = timezone.now() + timedelta(days=5)
+        self.buf.process_batch(
+            [
+                (Group, {"times_seen": 2}, {"id": group.id}, {"last_seen": the_date}, None),
+                (Group, {"times_seen": 3}, {"id": other.id}, {"last_seen": the_date}, None),
+                (ReleaseProject, {"new_groups": 1}, {"id": release_project.id}, {}, None),
+            ]
+        )
+        group_ = Group.objects.get(id=group.id)
+        assert group_.times_seen == group.times_seen + 2
+        assert group_.last_seen == the_date
+        assert Group.objects.get(id=other.id).times_seen == other.times_seen + 3
+        assert ReleaseProject.objects.get(id=release_project.id).new_groups == 1
+
     @mock.patch("sentry.models.Group.objects.create_or_update")
     def test_signal_only(self, create_or_update):
         group = Group.objects.create(project=Project(id=1))
@@ -2,12 +2,13 @@ import pickle
 from datetime import datetime
 from unittest import mock
 
+import pytest
 from django.utils import timezone
 from django.utils.encoding import force_text
 from freezegun import freeze_time
 
 from sentry.buffer.redis import RedisBuffer
-from sentry.models import Group, Project
+from sentry.models import Group, Project, ReleaseProject
 from sentry.testutils import TestCase
 
 
@@ -103,6 +104,40 @@ class RedisBufferTest(TestCase):
         group = Group.objects.get_from_cache(id=self.group.id)
         assert group.times_seen == orig_times_seen + times_seen_incr
 
+    def test_process_batch_keys(self):
+        other = self.create_group()
+        signal_only = self.create_group()
+        release_project = ReleaseProject.objects.create(project=self.project, release=self.release)
+        the_date = datetime(2017, 5, 3, 6, 6, 6, tzinfo=timezone.utc)
+        increments = [
+            (Group, {"times_seen": 2}, {"id": self.group.id}, {"last_seen": the_date}, None),
+            (Group, {"times_seen": 3}, {"id": other.id}, {"last_seen": the_date}, None),
+            (Group, {"times_seen": 4}, {"id": signal_only.id}, None, True),
+            (ReleaseProject, {"new_groups": 1}, {"id": release_project.id}, None, None),
+            (
+                ReleaseProject,
+                {"new_groups": 1},
+                {"project_id": self.project.id, "release_id": self.release.id},
+                None,
+                None,
+            ),
+        ]
+        for model, columns, filters, extra, signal in increments:
+            self.buf.incr(model, columns, filters, extra, signal_only=signal)
+        keys = [self.buf._make_key(model, filters) for model, _, filters, _, _ in increments]
+
+        self.buf.process(batch_keys=keys)
+
+        group = Group.objects.get(id=self.group.id)
+        assert group.times_seen == self.group.times_seen + 2
+        assert group.last_seen == the_date
+        assert Group.objects.get(id=other.id).times_seen == other.times_seen + 3
+        assert Group.objects.get(id=signal_only.id).times_seen == signal_only.times_seen
+        assert ReleaseProject.objects.get(id=release_project.id).new_groups == 2
+        client = self.buf.cluster.get_routing_client()
+        assert client.zrange("b:p", 0, -1) == []
+        assert not client.exists(*keys)
+
     def test_get(self):
         model = mock.Mock()
         model.__name__ = "Mock"
@@ -149,6 +184,130 @@ class RedisBufferTest(TestCase):
         pending = client.zrange("b:p", 0, -1)
         assert pending == [key.encode("utf-8")]
 
+    def test_incr_coalesced(self):
+        buf = RedisBuffer(coalesce_window=60, coalesce_max_keys=2)
+        client = buf.cluster.get_routing_client()
+        model = mock.Mock()
+        model.__name__ = "Mock"
+        filters = {"pk": 1}
+        key = buf._make_key(model, filters=filters)
+
+        buf.incr(model, {"times_seen": 1}, filters, extra={"foo": "bar"})
+        buf.incr(model, {"times_seen": 2}, filters, extra={"foo": "baz"})
+        assert client.hgetall(key) == {}
+        assert buf.get(model, ["times_seen"], filters=filters) == {"times_seen": 3}
+
+        buf.flush_coalesced()
+        result = {force_text(k): v for k, v in client.hgetall(key).items()}
+        assert pickle.loads(result.pop("f")) == filters
+        assert pickle.loads(result.pop("e+foo")) == "baz"
+        assert result == {"i+times_seen": b"3", "m": b"unittest.mock.Mock"}
+        assert client.zrange("b:p", 0, -1) == [key.encode("utf-8")]
+        assert buf.get(model, ["times_seen"], filters=filters) == {"times_seen": 3}
+
+    def test_incr_coalesced_flushes_when_full(self):
+        buf = RedisBuffer(coalesce_window=60, coalesce_max_keys=2)
+        client = buf.cluster.get_routing_client()
+        model = mock.Mock()
+        model.__name__ = "Mock"
+
+        buf.incr(model, {"times_seen": 1}, {"pk": 1})
+        assert client.zrange("b:p", 0, -1) == []
+        buf.incr(model, {"times_seen": 1}, {"pk": 2})
+        assert len(client.zrange("b:p", 0, -1)) == 2
+
+    def test_incr_coalesced_flushes_after_window(self):
+        buf = RedisBuffer(coalesce_window=60, coalesce_max_keys=2)
+        client = buf.cluster.get_routing_client()
+        model = mock.Mock()
+        model.__name__ = "Mock"
+
+        buf.incr(model, {"times_seen": 1}, {"pk": 1})
+        timer = buf.coalescer.timer
+        assert timer.interval == 60
+        assert client.zrange("b:p", 0, -1) == []
+
+        timer.function()
+        assert len(client.zrange("b:p", 0, -1)) == 1
+        assert buf.coalescer.timer is None
+
+    def test_incr_coalesced_restores_failed_writes(self):
+        buf = RedisBuffer(coalesce_window=60, coalesce_max_keys=2)
+        client = buf.cluster.get_routing_client()
+        model = mock.Mock()
+        model.__name__ = "Mock"
+        filters = {"pk": 1}
+        key = buf._make_key(model, filters=filters)
+
+        buf.incr(model, {"times_seen": 1}, filters)
+        with mock.patch.object(buf, "_queue_incr", side_effect=ConnectionError()):
+            with pytest.raises(ConnectionError):
+                buf.flush_coalesced()
+        buf.incr(model, {"times_seen": 2}, filters)
+        assert buf.get(model, ["times_seen"], filters=filters) == {"times_seen": 3}
+
+        buf.flush_coalesced()
+        assert client.hget(key, "i+times_seen") == b"3"
+
+    def test_incr_saves_to_redis_compact(self):
+        buf = RedisBuffer(codec="compact")
+        now = datetime(2017, 5, 3, 6, 6, 6, 123456, tzinfo=timezone.utc)
+        client = buf.cluster.get_routing_client()
+        model = mock.Mock()
+        model.__name__ = "Mock"
+        filters = {"pk": 1, "datetime": now}
+        key = buf._make_key(model, filters=filters)
+        buf.incr(
+            model,
+            {"times_seen": 1},
+            filters,
+            extra={"foo": "bar", "datetime": now, "data": {"a": [1]}, "score": 1.5},
+        )
+        result = {force_text(k): v for k, v in client.hgetall(key).items()}
+        assert result == {
+            "e+foo": b"\x01sbar",
+            "e+datetime": b"\x01d1493791566123456",
+            "e+data": b'\x01j{"a":[1]}',
+            "e+score": b"\x01f1.5",
+            "f": b'\x01{"pk":"i1","datetime":"d1493791566123456"}',
+            "i+times_seen": b"1",
+            "m": b"unittest.mock.Mock",
+        }
+
+    @mock.patch("sentry.buffer.redis.RedisBuffer._make_key", mock.Mock(return_value="foo"))
+    @mock.patch("sentry.buffer.base.Buffer.process")
+    def test_process_does_bubble_up_compact(self, process):
+        client = self.buf.cluster.get_routing_client()
+        client.hmset(
+            "foo",
+            {
+                "e+foo": b"\x01sbar",
+                "e+datetime": b"\x01d1493791566000000",
+                "e+data": b'\x01j{"a":[1]}',
+                "f": b'\x01{"pk":"i1"}',
+                "i+times_seen": "2",
+                "m": "sentry.models.Group",
+            },
+        )
+        extra = {
+            "foo": "bar",
+            "datetime": datetime(2017, 5, 3, 6, 6, 6, tzinfo=timezone.utc),
+            "data": {"a": [1]},
+        }
+        self.buf.process("foo")
+        process.assert_called_once_with(Group, {"times_seen": 2}, {"pk": 1}, extra, None)
+
+    @mock.patch("sentry.buffer.redis.RedisBuffer._make_key", mock.Mock(return_value="foo"))
+    def test_process_refuses_pickle(self):
+        buf = RedisBuffer(codec="compact", allow_pickle=False)
+        client = buf.cluster.get_routing_client()
+        client.hmset(
+            "foo",
+            {"f": pickle.dumps({"pk": 1}), "i+times_seen": "2", "m": "sentry.models.Group"},
+        )
+        with pytest.raises(TypeError):
+            buf.process("foo")
+
     @mock.patch("sentry.buffer.redis.RedisBuffer._make_key", mock.Mock(return_value="foo"))
     @mock.patch("sentry.buffer.redis.process_incr")
     @mock.patch("sentry.buffer.redis.process_pending")
@@ -1,11 +1,18 @@
+import time
 from collections import defaultdict
 from functools import cached_property, reduce
 
 from sentry.digests import Record
+from sentry.digests.backends.redis import RedisBackend
+from sentry.digests.codecs import CompressedPickleCodec, JSONCodec
 from sentry.digests.notifications import (
     Notification,
+    NotificationReference,
+    build_digest,
     event_to_record,
+    get_record_reference,
     group_records,
+    load_record,
     rewrite_record,
     sort_group_contents,
     sort_rule_groups,
@@ -15,9 +22,69 @@ from sentry.digests.notifications import (
 from sentry.models import Rule
 from sentry.notifications.types import ActionTargetType, FallthroughChoiceType
 from sentry.testutils import TestCase
+from sentry.testutils.helpers.options import override_options
 from sentry.testutils.silo import region_silo_test
 
 
+class EventToRecordTestCase(TestCase):
+    @override_options({"digests.write-event-references": True})
+    def test_record_references_event(self):
+        event = self.store_event(data={}, project_id=self.project.id)
+        rule = self.project.rule_set.all()[0]
+        record = event_to_record(event, (rule,))
+
+        reference = NotificationReference(event.event_id, event.group_id, None, [rule.id])
+        assert record.value == reference
+
+        codec = JSONCodec()
+        value = codec.decode(codec.encode(record.value))
+        assert get_record_reference(load_record(record._replace(value=value))) == reference
+
+    def test_legacy_record(self):
+        event = self.store_event(data={}, project_id=self.project.id)
+        rule = self.project.rule_set.all()[0]
+        notification = Notification(event, [rule.id])
+
+        value = JSONCodec().decode(CompressedPickleCodec().encode(notification))
+        assert value == notification
+        assert get_record_reference(Record(event.event_id, value, 0)) is None
+
+
+class BuildDigestTestCase(TestCase):
+    @override_options({"digests.write-event-references": True})
+    def test_records_from_backend(self):
+        event = self.store_event(data={}, project_id=self.project.id)
+        rule = self.project.rule_set.all()[0]
+
+        backend = RedisBackend()
+        backend.add("timeline", event_to_record(event, (rule,)), timestamp=time.time())
+        with backend.digest("timeline", 0) as records:
+            digest, logs = build_digest(self.project, records)
+
+        assert list(digest) == [rule]
+        assert list(digest[rule]) == [event.group]
+        [record] = digest[rule][event.group]
+        assert record.value.event.event_id == event.event_id
+        assert record.value.rules == [rule]
+
+    def test_legacy_records_from_backend(self):
+        event = self.store_event(data={}, project_id=self.project.id)
+        rule = self.project.rule_set.all()[0]
+
+        backend = RedisBackend()
+        record = event_to_record(event, (rule,))
+        # Until the option is enabled, workers that only decode pickles can read the records.
+        assert isinstance(record.value, Notification)
+        assert backend.codec.encode(record.value) == CompressedPickleCodec().encode(record.value)
+        backend.add("timeline", record, timestamp=time.time())
+        with backend.digest("timeline", 0) as records:
+            digest, logs = build_digest(self.project, records)
+
+        [record] = digest[rule][event.group]
+        assert record.value.event.event_id == event.event_id
+        assert record.value.rules == [rule]
+
+
 class RewriteRecordTestCase(TestCase):
     @cached_property
     def rule(self):
@@ -27,36 +94,72 @@ class RewriteRecordTestCase(TestCase):
     def record(self):
         return event_to_record(self.event, (self.rule,))
 
+    @cached_property
+    def group_event(self):
+        return self.event.for_group(self.event.group)
+
+    @override_options({"digests.write-event-references": True})
     def test_success(self):
         assert rewrite_record(
             self.record,
             project=self.event.project,
             groups={self.event.group.id: self.event.group},
             rules={self.rule.id: self.rule},
+            events={self.event.event_id: self.group_event},
         ) == Record(
             self.record.key,
-            Notification(self.record.value.event, [self.rule]),
+            Notification(self.group_event, [self.rule]),
             self.record.timestamp,
         )
 
+    def test_legacy_record(self):
+        record = Record(
+            self.event.event_id, Notification(self.event, [self.rule.id]), self.record.timestamp
+        )
+        assert rewrite_record(
+            record,
+            project=self.event.project,
+            groups={self.event.group.id: self.event.group},
+            rules={self.rule.id: self.rule},
+        ) == Record(record.key, Notification(self.event, [self.rule]), record.timestamp)
+
+    @override_options({"digests.write-event-references": True})
     def test_without_group(self):
         # If the record can't be associated with a group, it should be returned as None.
         assert (
             rewrite_record(
-                self.record, project=self.event.project, groups={}, rules={self.rule.id: self.rule}
+                self.record,
+                project=self.event.project,
+                groups={},
+                rules={self.rule.id: self.rule},
+                events={self.event.event_id: self.group_event},
+            )
+            is None
+        )
+
+    @override_options({"digests.write-event-references": True})
+    def test_without_event(self):
+        # If the referenced event could not be fetched, it should be returned as None.
+        assert (
+            rewrite_record(
+                self.record,
+                project=self.event.project,
+                groups={self.event.group.id: self.event.group},
+                rules={self.rule.id: self.rule},
+                events={},
             )
             is None
         )
 
+    @override_options({"digests.write-event-references": True})
     def test_filters_invalid_rules(self):
         assert rewrite_record(
             self.record,
             project=self.event.project,
             groups={self.event.group.id: self.event.group},
             rules={},
-        ) == Record(
-            self.record.key, Notification(self.record.value.event, []), self.record.timestamp
-        )
+            events={self.event.event_id: self.group_event},
+        ) == Record(self.record.key, Notification(self.group_event, []), self.record.timestamp)
 
 
 @region_silo_test
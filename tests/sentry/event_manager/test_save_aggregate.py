@@ -4,8 +4,9 @@ from threading import Thread
 
 import pytest
 
-from sentry.event_manager import _save_aggregate
+from sentry.event_manager import _get_grouphashes_many, _save_aggregate
 from sentry.eventstore.models import CalculatedHashes, Event
+from sentry.models import GroupHash
 
 
 @pytest.mark.django_db(transaction=True)
@@ -87,3 +88,44 @@ def test_group_creation_race(monkeypatch, default_project, is_race_free):
         # assert many groups are new
         assert 1 < len({rv.group.id for rv in return_values}) <= CONCURRENCY
         assert 1 < sum(rv.is_new for rv in return_values) <= CONCURRENCY
+
+
+@pytest.mark.django_db
+def test_get_grouphashes_many(default_project, default_group, django_assert_num_queries):
+    grouphash = GroupHash.objects.create(
+        project=default_project, hash="a" * 32, group=default_group
+    )
+    GroupHash.objects.create(project=default_project, hash="b" * 32)
+
+    with django_assert_num_queries(1):
+        rv = _get_grouphashes_many({default_project.id: ["a" * 32, "b" * 32, "c" * 32]})
+    assert set(rv) == {(default_project.id, "a" * 32), (default_project.id, "b" * 32)}
+    assert rv[(default_project.id, "a" * 32)] == grouphash
+    assert rv[(default_project.id, "b" * 32)].group_id is None
+
+
+@pytest.mark.django_db
+def test_save_aggregate_stale_prefetched_grouphash(default_project, default_group):
+    grouphash = GroupHash.objects.create(
+        project=default_project, hash="a" * 32, group=default_group
+    )
+    # The prefetched grouphash still points to a group that has been deleted since.
+    stale = GroupHash(id=grouphash.id, project_id=default_project.id, hash="a" * 32, group_id=0)
+
+    rv = _save_aggregate(
+        Event(
+            default_project.id,
+            "89aeed6a472e4c5fb992d14df4d7e1b6",
+            data={"timestamp": time.time()},
+        ),
+        hashes=CalculatedHashes(hashes=["a" * 32], hierarchical_hashes=[], tree_labels=[]),
+        release=None,
+        metadata={},
+        received_timestamp=time.time(),
+        grouphashes={(default_project.id, "a" * 32): stale},
+        level=10,
+        culprit="",
+    )
+
+    assert rv.group.id == default_group.id
+    assert not rv.is_new
@@ -43,6 +43,29 @@ class EventStorageTest(TestCase):
         assert event.data._node_data is not None
         assert event.data["user"]["id"] == "user1"
 
+    def test_prefetch_nodes(self):
+        min_ago = iso_format(before_now(minutes=1))
+        self.store_event(
+            data={"event_id": "a" * 32, "timestamp": min_ago, "user": {"id": "user1"}},
+            project_id=self.project.id,
+        )
+        self.store_event(
+            data={"event_id": "b" * 32, "timestamp": min_ago, "user": {"id": "user2"}},
+            project_id=self.project.id,
+        )
+
+        with self.eventstorage.prefetch_nodes(
+            [(self.project.id, "a" * 32), (self.project.id, "b" * 32), (self.project.id, "c" * 32)]
+        ), mock.patch("sentry.nodestore.get") as get:
+            event = Event(project_id=self.project.id, event_id="a" * 32)
+            event2 = Event(project_id=self.project.id, event_id="b" * 32)
+            missing = Event(project_id=self.project.id, event_id="c" * 32)
+            assert event.data["user"]["id"] == "user1"
+            assert event2.data["user"]["id"] == "user2"
+            assert len(missing.data) == 0
+
+        assert not get.called
+
 
 class ServiceDelegationTest(TestCase, SnubaTestCase):
     def setUp(self):
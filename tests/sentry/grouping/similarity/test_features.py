@@ -1,3 +1,6 @@
+import time
+from unittest import mock
+
 import pytest
 
 import sentry.similarity
@@ -10,13 +13,13 @@ from sentry.utils import json
 from tests.sentry.grouping import with_fingerprint_input, with_grouping_input
 
 
-def create_event(data, group_id=123):
+def create_event(data, group_id=123, project_id=123):
     mgr = EventManager(data=data, grouping_config=get_default_grouping_config_dict())
     mgr.normalize()
     data = mgr.get_data()
 
     evt = eventstore.create_event(data=data)
-    evt.project = project = Project(id=123)
+    evt.project = project = Project(id=project_id)
     evt.group = Group(id=group_id, project=project)
 
     return evt
@@ -52,6 +55,49 @@ def test_basic(similarity):
     assert evt2_diff[msg_label] == 0.5
 
 
+def test_bulk_record(similarity):
+    timestamp = int(time.time()) - 60
+    events = [
+        create_event({"message": "hello world", "timestamp": timestamp}, 1, project_id=456),
+        create_event({"message": "hello world", "timestamp": timestamp + 30}, 1, project_id=456),
+        create_event({"message": "jello world", "timestamp": timestamp}, 2, project_id=456),
+        create_event({"message": "hello world", "timestamp": timestamp}, 3, project_id=789),
+    ]
+
+    with mock.patch.object(
+        similarity.index, "record_multi", wraps=similarity.index.record_multi
+    ) as record_multi:
+        similarity.bulk_record(events)
+
+    # Every event is recorded at its own timestamp.
+    ((requests,), _) = record_multi.call_args
+    assert [(scope, key, ts) for scope, key, _, ts in requests] == [
+        ("456", "1", timestamp),
+        ("456", "1", timestamp + 30),
+        ("456", "2", timestamp),
+        ("789", "3", timestamp),
+    ]
+
+    if similarity is sentry.similarity.features:
+        msg_label = "message:message:character-shingles"
+    else:
+        msg_label = ("similarity:2020-07-23", "message", "character-5-shingle")
+
+    comparison = dict(similarity.compare(events[0].group))
+    assert set(comparison) == {1, 2}
+    assert comparison[1][msg_label] == 1.0
+    assert comparison[2][msg_label] == 0.5
+
+    comparison = dict(similarity.compare(events[2].group))
+    assert set(comparison) == {1, 2}
+    assert comparison[1][msg_label] == 0.5
+    assert comparison[2][msg_label] == 1.0
+
+    comparison = dict(similarity.compare(events[3].group))
+    assert set(comparison) == {3}
+    assert comparison[3][msg_label] == 1.0
+
+
 @with_grouping_input("grouping_input")
 def test_similarity_extract_grouping_input(grouping_input, insta_snapshot):
     similarity = sentry.similarity.features2
@@ -0,0 +1,11 @@
+from sentry.grouping.api import get_default_grouping_config_dict, load_grouping_config
+
+
+def test_load_grouping_config_is_cached():
+    config_dict = get_default_grouping_config_dict()
+    config = load_grouping_config(config_dict)
+    assert load_grouping_config(dict(config_dict)) is config
+
+    other = get_default_grouping_config_dict("legacy:2019-03-12")
+    assert load_grouping_config(other) is not config
+    assert load_grouping_config(other).id == "legacy:2019-03-12"
@@ -1,6 +1,7 @@
 import pytest
 
 from sentry.grouping.api import get_default_grouping_config_dict
+from sentry.grouping.enhancer import Enhancements
 from sentry.grouping.strategies.configurations import CONFIGURATIONS
 from tests.sentry.grouping import grouping_input as grouping_inputs
 
@@ -37,3 +38,18 @@ def run_configuration(grouping_input, config):
     event.project = None
 
     event.get_hashes()
+
+
+@pytest.mark.skipif(not benchmark_available(), reason="requires pytest-benchmark")
+@pytest.mark.parametrize("use_rule_index", [True, False], ids=["rule_index", "all_rules"])
+def test_benchmark_enhancements(use_rule_index, benchmark, monkeypatch):
+    """Compares evaluating the latest stack trace rules through a
+    ``RuleIndex`` against evaluating every rule on every frame."""
+    monkeypatch.setattr(Enhancements, "use_rule_index", use_rule_index)
+    config = CONFIGS["newstyle:2023-01-11"]
+    input_iter = iter(grouping_inputs)
+
+    def setup():
+        return (next(input_iter), config), {}
+
+    benchmark.pedantic(run_configuration, setup=setup, rounds=len(grouping_inputs))
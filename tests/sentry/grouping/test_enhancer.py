@@ -1,7 +1,12 @@
 import pytest
 
 from sentry.grouping.component import GroupingComponent
-from sentry.grouping.enhancer import Enhancements, InvalidEnhancerConfig, create_match_frame
+from sentry.grouping.enhancer import (
+    Enhancements,
+    InvalidEnhancerConfig,
+    RuleIndex,
+    create_match_frame,
+)
 
 
 def dump_obj(obj):
@@ -442,3 +447,48 @@ def test_app_no_matches(frame):
     enhancements = Enhancements.from_config_string("app:no +app")
     enhancements.apply_modifications_to_frame([frame], "native", None)
     assert frame.get("in_app")
+
+
+def test_rule_index_candidates():
+    enhancements = Enhancements.from_config_string(
+        """
+        family:native function:std::*                  -app
+        family:native package:/usr/lib/**              -app
+        family:javascript                              -group
+        module:foo.* !function:bar                     +group
+        app:yes                                        +group
+    """
+    )
+    std_rule, usr_rule, js_rule, module_rule, app_rule = enhancements.rules
+    frames = [
+        {"function": "std::whatever", "package": "/usr/lib/libc.so"},
+        {"function": "main", "package": "usr/lib/libfoo.so"},
+        {"function": "main", "package": "C:\\usr\\lib\\libbar.so"},
+        {"function": "main", "module": "foo.bar"},
+    ]
+    match_frames = [create_match_frame(frame, "native") for frame in frames]
+
+    index = RuleIndex(enhancements.rules)
+    candidates = index._get_candidate_frames(match_frames)
+    assert candidates[0] == [0]
+    assert candidates[1] == [0, 1]
+    assert 2 not in candidates
+    assert candidates[3] == [3]
+    # Rules without a guard are not indexed
+    assert 4 not in index._indexed
+
+
+@pytest.mark.parametrize("use_rule_index", [True, False])
+def test_rule_index_preserves_rule_order(monkeypatch, use_rule_index):
+    monkeypatch.setattr(Enhancements, "use_rule_index", use_rule_index)
+    enhancements = Enhancements.from_config_string(
+        """
+        function:foo::*              category=bar
+        category:bar                 +app
+        function:foo::baz            -app
+    """
+    )
+    frames = [{"function": "foo::bar"}, {"function": "foo::baz"}, {"function": "main"}]
+    enhancements.apply_modifications_to_frame(frames, "native", None)
+
+    assert [frame.get("in_app") for frame in frames] == [True, False, None]
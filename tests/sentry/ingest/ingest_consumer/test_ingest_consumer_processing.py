@@ -70,6 +70,33 @@ def test_deduplication_works(default_project, task_runner, preprocess_event):
     }
 
 
+@pytest.mark.django_db
+def test_batch_save_collects_errors(default_project, task_runner, preprocess_event):
+    payload = get_normalized_event({"message": "hello world"}, default_project)
+    event_id = payload["event_id"]
+    project_id = default_project.id
+    start_time = time.time() - 3600
+    save_batch = []
+
+    process_event(
+        {
+            "payload": json.dumps(payload),
+            "start_time": start_time,
+            "event_id": event_id,
+            "project_id": project_id,
+            "remote_addr": "127.0.0.1",
+        },
+        projects={default_project.id: default_project},
+        save_batch=save_batch,
+    )
+
+    assert not len(preprocess_event)
+    (batched,) = save_batch
+    assert batched.cache_key == f"e:{event_id}:{project_id}"
+    assert batched.data == payload
+    assert batched.project_id == project_id
+
+
 @pytest.mark.django_db
 def test_transactions_spawn_save_event_transaction(
     default_project,
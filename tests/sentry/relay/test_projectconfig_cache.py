@@ -1,8 +1,10 @@
 from unittest import mock
 
 import pytest
+import zstandard
 
 from sentry.relay.projectconfig_cache import redis
+from sentry.utils import json
 
 
 def test_delete_count(monkeypatch):
@@ -24,3 +26,63 @@ def test_read_write():
     my_key = "fake-dsn-1"
     cache.set_many({my_key: "my-value"})
     assert cache.get(my_key) == "my-value"
+
+
+@pytest.mark.django_db
+def test_read_many():
+    cache = redis.RedisProjectConfigCache()
+    cache.set_many({"fake-dsn-1": "my-value", "fake-dsn-2": {"disabled": True}})
+    assert cache.get_many(["fake-dsn-1", "fake-dsn-2", "fake-dsn-3"]) == {
+        "fake-dsn-1": "my-value",
+        "fake-dsn-2": {"disabled": True},
+        "fake-dsn-3": None,
+    }
+    assert cache.get_many([]) == {}
+
+
+def _train_dictionary(path, dict_id):
+    samples = [
+        json.dumps(
+            {"disabled": False, "slug": f"project-{i}", "config": {"allowedDomains": ["*"]}}
+        ).encode()
+        for i in range(200)
+    ]
+    path.write_bytes(zstandard.train_dictionary(1024, samples, dict_id=dict_id).as_bytes())
+    return str(path)
+
+
+@pytest.mark.django_db
+def test_compression_dictionary(tmp_path):
+    dictionary = _train_dictionary(tmp_path / "v1.dict", dict_id=1)
+    legacy_cache = redis.RedisProjectConfigCache()
+    legacy_cache.set_many({"fake-dsn-1": {"slug": "project-1"}})
+
+    cache = redis.RedisProjectConfigCache(compression_dictionary=dictionary)
+    cache.set_many({"fake-dsn-2": {"slug": "project-2"}})
+
+    raw = cache.cluster.get("relayconfig:fake-dsn-2")
+    assert zstandard.get_frame_parameters(raw).dict_id == 1
+    assert cache.get_many(["fake-dsn-1", "fake-dsn-2"]) == {
+        "fake-dsn-1": {"slug": "project-1"},
+        "fake-dsn-2": {"slug": "project-2"},
+    }
+
+
+@pytest.mark.django_db
+def test_compression_dictionary_rotation(tmp_path):
+    v1 = _train_dictionary(tmp_path / "v1.dict", dict_id=1)
+    v2 = _train_dictionary(tmp_path / "v2.dict", dict_id=2)
+    redis.RedisProjectConfigCache(compression_dictionary=v1).set_many({"fake-dsn-1": "my-value"})
+
+    # Payloads written with an unknown dictionary are treated as cache misses.
+    assert redis.RedisProjectConfigCache(compression_dictionary=v2).get("fake-dsn-1") is None
+
+    cache = redis.RedisProjectConfigCache(compression_dictionary=v2, compression_dictionaries=[v1])
+    assert cache.get("fake-dsn-1") == "my-value"
+
+
+def test_compression_dictionary_requires_id(tmp_path):
+    path = tmp_path / "raw.dict"
+    path.write_bytes(b'{"disabled": false, "slug": "project"}')
+    with pytest.raises(ValueError):
+        redis.RedisProjectConfigCache(compression_dictionary=str(path))
@@ -76,3 +76,16 @@ def test_custom_prefix():
     redis = cache._get_redis_client(expected_key)
 
     assert redis.get(expected_key) == b"1"
+
+
+def test_many_lifecycle():
+    cache = RedisProjectConfigDebounceCache()
+    cache.debounce(public_key="abc", project_id=None, organization_id=None)
+
+    assert cache.is_debounced_many(public_keys=["abc", "def", "ghi"]) == {"abc"}
+    cache.debounce_many(public_keys=["def"])
+    assert cache.is_debounced_many(public_keys=["abc", "def", "ghi"]) == {"abc", "def"}
+
+    cache.mark_task_done(public_key="def", project_id=None, organization_id=None)
+    assert cache.is_debounced_many(public_keys=["abc", "def", "ghi"]) == {"abc"}
+    assert cache.is_debounced_many(public_keys=[]) == set()
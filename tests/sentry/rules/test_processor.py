@@ -223,6 +223,51 @@ class RuleProcessorTest(TestCase):
         # mock condition first.
         assert passes.call_count == 0
 
+    @patch(
+        "sentry.constants._SENTRY_RULES",
+        [
+            "sentry.mail.actions.NotifyEmailAction",
+            "sentry.rules.conditions.event_frequency.EventFrequencyCondition",
+        ],
+    )
+    def test_frequency_conditions_share_queries(self):
+        frequency_condition = {
+            "id": "sentry.rules.conditions.event_frequency.EventFrequencyCondition",
+            "interval": "1h",
+            "value": 1,
+        }
+        self.rule.update(data={"conditions": [frequency_condition], "actions": [EMAIL_ACTION_DATA]})
+        Rule.objects.create(
+            project=self.group_event.project,
+            data={
+                "conditions": [{**frequency_condition, "value": 5}],
+                "actions": [EMAIL_ACTION_DATA],
+            },
+        )
+        daily_rule = Rule.objects.create(
+            project=self.group_event.project,
+            data={
+                "conditions": [{**frequency_condition, "interval": "1d"}],
+                "actions": [EMAIL_ACTION_DATA],
+            },
+        )
+        with patch("sentry.rules.processor.rules", init_registry()), patch(
+            "sentry.rules.conditions.event_frequency.EventFrequencyCondition.query_hook",
+            return_value=3,
+        ) as query_hook:
+            rp = RuleProcessor(
+                self.group_event,
+                is_new=True,
+                is_regression=True,
+                is_new_group_environment=True,
+                has_reappeared=True,
+            )
+            results = list(rp.apply())
+
+        # Both 1h conditions share a query, the threshold of one of them is not reached.
+        assert query_hook.call_count == 2
+        assert {futures[0].rule for _, futures in results} == {self.rule, daily_rule}
+
 
 class MockFilterTrue(EventFilter):
     id = "tests.sentry.rules.test_processor.MockFilterTrue"
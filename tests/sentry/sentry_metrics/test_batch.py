@@ -7,7 +7,12 @@ from arroyo.backends.kafka import KafkaPayload
 from arroyo.types import BrokerValue, Message, Partition, Topic, Value
 
 from sentry.sentry_metrics.configuration import UseCaseKey
-from sentry.sentry_metrics.consumers.indexer.batch import IndexerBatch, PartitionIdxOffset
+from sentry.sentry_metrics.consumers.indexer.batch import (
+    IndexerBatch,
+    PartitionIdxOffset,
+    _decode_payload,
+    _encode_payload,
+)
 from sentry.sentry_metrics.indexer.base import FetchType, FetchTypeExt, Metadata
 from sentry.snuba.metrics.naming_layer.mri import SessionMRI
 from sentry.utils import json
@@ -208,6 +213,11 @@ def test_extract_strings_with_rollout(should_index_tag_values, expected):
     assert batch.extract_strings() == expected
 
 
+def test_payload_numbers_round_trip():
+    values = [3800.1492190071162, 0.1 + 0.2, 123456789012345678901234567890, -(2**63), 1e-300]
+    assert _decode_payload(_encode_payload({"value": values})) == {"value": values}
+
+
 def test_all_resolved(caplog, settings):
     settings.SENTRY_METRICS_INDEXER_DEBUG_LOG_SAMPLE_RATE = 1.0
     outer_message = _construct_outer_message(
@@ -1226,3 +1236,36 @@ def test_cardinality_limiter(caplog, settings):
             ],
         )
     ]
+
+
+def benchmark_available():
+    try:
+        import pytest_benchmark  # NOQA
+    except ModuleNotFoundError:
+        return False
+    else:
+        return True
+
+
+@pytest.mark.skipif(not benchmark_available(), reason="requires pytest-benchmark")
+def test_benchmark_batch(benchmark):
+    payloads = [(counter_payload, []), (distribution_payload, []), (set_payload, [])] * 1000
+    strings = sorted(extracted_string_output[1])
+    mapping = {1: {string: idx for idx, string in enumerate(strings, 1)}}
+    meta = {
+        1: {
+            string: Metadata(id=idx, fetch_type=FetchType.CACHE_HIT)
+            for idx, string in enumerate(strings, 1)
+        }
+    }
+
+    def setup():
+        return (_construct_outer_message(payloads),), {}
+
+    def run(outer_message):
+        batch = IndexerBatch(UseCaseKey.PERFORMANCE, outer_message, True, False)
+        batch.extract_strings()
+        return batch.reconstruct_messages(mapping, meta)
+
+    result = benchmark.pedantic(run, setup=setup, rounds=10)
+    assert len(result) == len(payloads)
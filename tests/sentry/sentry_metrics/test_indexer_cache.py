@@ -71,3 +71,47 @@ def test_separate_namespacing() -> None:
     indexer_cache.set("a", 2, UseCaseKey.PERFORMANCE.value)
     assert indexer_cache.get("a", UseCaseKey.RELEASE_HEALTH.value) == 1
     assert indexer_cache.get("a", UseCaseKey.PERFORMANCE.value) == 2
+
+
+def test_local_cache_tier(use_case_id: str) -> None:
+    cache.clear()
+    local_indexer_cache = StringIndexerCache(
+        **settings.SENTRY_STRING_INDEXER_CACHE_OPTIONS,
+        partition_key=_PARTITION_KEY,
+        local_cache_size=10,
+    )
+    local_indexer_cache.set("blah", 1, use_case_id)
+    assert local_indexer_cache.get("blah", use_case_id) == 1
+
+    # served from the local tier even if the shared cache lost the key
+    cache.clear()
+    assert local_indexer_cache.get_many(["blah", "other"], use_case_id) == {
+        "blah": 1,
+        "other": None,
+    }
+
+    # hits from the shared cache are written to the local tier
+    indexer_cache.set("other", 2, use_case_id)
+    assert local_indexer_cache.get("other", use_case_id) == 2
+    cache.clear()
+    assert local_indexer_cache.get("other", use_case_id) == 2
+
+    local_indexer_cache.delete("other", use_case_id)
+    assert local_indexer_cache.get("other", use_case_id) is None
+
+
+def test_local_cache_negative_hits(use_case_id: str) -> None:
+    cache.clear()
+    local_indexer_cache = StringIndexerCache(
+        **settings.SENTRY_STRING_INDEXER_CACHE_OPTIONS,
+        partition_key=_PARTITION_KEY,
+        local_cache_size=10,
+        local_negative_ttl=60,
+    )
+    local_indexer_cache.set_negative_hit("blah", use_case_id)
+    assert local_indexer_cache.is_negative_hit("blah", use_case_id)
+    assert local_indexer_cache.get("blah", use_case_id) is None
+
+    local_indexer_cache.set("blah", 1, use_case_id)
+    assert not local_indexer_cache.is_negative_hit("blah", use_case_id)
+    assert local_indexer_cache.get("blah", use_case_id) == 1
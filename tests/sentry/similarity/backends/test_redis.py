@@ -1,9 +1,10 @@
 import time
 from functools import cached_property
+from unittest import mock
 
 import msgpack
 
-from sentry.similarity.backends.redis import RedisScriptMinHashIndexBackend
+from sentry.similarity.backends.redis import RedisScriptMinHashIndexBackend, index
 from sentry.similarity.signatures import MinHashSignatureBuilder
 from sentry.testutils import TestCase
 from sentry.utils import redis
@@ -222,3 +223,40 @@ class RedisScriptMinHashIndexBackendTestCase(TestCase):
 
         self.index.flush("*", ["index"])
         assert self.index.classify("example", [("index", 0, ["foo", "bar"])]) == []
+
+    def test_record_multi(self):
+        timestamp = int(time.time())
+        self.index.record_multi(
+            [
+                ("example", "1", [("index", ["foo", "bar"])], timestamp),
+                ("example", "2", [("index", ["baz"])], timestamp),
+                ("other", "1", [("index", ["baz"])], timestamp),
+                ("other", "2", [], timestamp),
+            ],
+            batch=3,
+        )
+
+        assert self.index.classify("example", [("index", 0, ["foo", "bar"])]) == [("1", [1.0])]
+        assert self.index.classify("example", [("index", 0, ["baz"])]) == [("2", [1.0])]
+        assert self.index.compare("other", "1", [("index", 0)]) == [("1", [1.0])]
+
+    def test_record_multi_retries_noscript(self):
+        # Cluster pipelines don't load scripts before executing them, which
+        # is emulated here by flushing the script cache and not loading it.
+        self.index.cluster.script_flush()
+
+        timestamp = int(time.time())
+        requests = [
+            ("example", "1", [("index", ["foo", "bar"])], timestamp),
+            ("other", "1", [("index", ["baz"])], timestamp),
+        ]
+
+        with mock.patch("redis.client.Pipeline.load_scripts"), mock.patch(
+            "sentry.similarity.backends.redis.index", wraps=index
+        ) as index_script:
+            self.index.record_multi(requests)
+
+        # Each request is sent through the pipeline and retried on its own.
+        assert index_script.call_count == 4
+        assert self.index.classify("example", [("index", 0, ["foo", "bar"])]) == [("1", [1.0])]
+        assert self.index.classify("other", [("index", 0, ["baz"])]) == [("1", [1.0])]
@@ -1,7 +1,8 @@
 from collections import Counter
+from random import Random
 from unittest import TestCase
 
-from sentry.similarity.signatures import MinHashSignatureBuilder
+from sentry.similarity.signatures import MinHashSignatureBuilder, VectorizedMinHashSignatureBuilder
 
 
 class MinHashSignatureBuilderTestCase(TestCase):
@@ -28,3 +29,22 @@ class MinHashSignatureBuilderTestCase(TestCase):
         self.assertAlmostEqual(
             similarity, estimation, delta=0.1  # totally made up constant, seems reasonable
         )
+
+
+class VectorizedMinHashSignatureBuilderTestCase(TestCase):
+    def test_matches_signature_builder(self):
+        random = Random(0)
+        for columns, rows in [(16, 0xFFFF), (32, 0xFFFF), (8, 7)]:
+            get_signature = MinHashSignatureBuilder(columns, rows)
+            get_vectorized_signature = VectorizedMinHashSignatureBuilder(columns, rows)
+
+            text = "the quick brown fox jumps over the lazy dog, ünïcödé included " * 5
+            shingles = [text[i : i + 5] for i in range(len(text) - 4)]
+            assert get_vectorized_signature(shingles) == get_signature(shingles)
+
+            for _ in range(50):
+                features = [
+                    bytes(random.randrange(256) for _ in range(random.randrange(20)))
+                    for _ in range(random.randrange(1, 100))
+                ]
+                assert get_vectorized_signature(features) == get_signature(features)
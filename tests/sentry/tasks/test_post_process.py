@@ -151,6 +151,29 @@ class CorePostProcessGroupTestMixin(BasePostProgressGroupMixin):
         )
         assert event_processing_store.get(cache_key) is None
 
+    @patch("sentry.tasks.post_process.logger")
+    def test_step_profile_logged(self, mock_logger):
+        event = self.create_event(data={}, project_id=self.project.id)
+
+        with self.options({"post-process.step-profile-sample-rate": 1.0}):
+            self.call_post_process_group(
+                is_new=True,
+                is_regression=False,
+                is_new_group_environment=True,
+                event=event,
+            )
+
+        (call,) = [
+            call
+            for call in mock_logger.info.call_args_list
+            if call[0] == ("post_process.step_profile",)
+        ]
+        extra = call[1]["extra"]
+        assert extra["group_id"] == event.group_id
+        steps = [step["step"] for step in extra["steps"]]
+        assert "process_snoozes" in steps
+        assert "process_rules" in steps
+
 
 @apply_feature_flag_on_cls("organizations:derive-code-mappings")
 @apply_feature_flag_on_cls("organizations:derive-code-mappings-dry-run")
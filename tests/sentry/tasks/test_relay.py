@@ -9,8 +9,10 @@ from sentry.relay.projectconfig_cache.redis import RedisProjectConfigCache
 from sentry.relay.projectconfig_debounce_cache.redis import RedisProjectConfigDebounceCache
 from sentry.tasks.relay import (
     build_project_config,
+    compute_organization_configs,
     invalidate_project_config,
     schedule_build_project_config,
+    schedule_build_project_configs,
     schedule_invalidate_project_config,
 )
 
@@ -79,6 +81,7 @@ def redis_cache(monkeypatch):
     monkeypatch.setattr("sentry.relay.projectconfig_cache.set_many", cache.set_many)
     monkeypatch.setattr("sentry.relay.projectconfig_cache.delete_many", cache.delete_many)
     monkeypatch.setattr("sentry.relay.projectconfig_cache.get", cache.get)
+    monkeypatch.setattr("sentry.relay.projectconfig_cache.get_many", cache.get_many)
 
     return cache
 
@@ -98,6 +101,12 @@ def debounce_cache(monkeypatch):
     monkeypatch.setattr(
         "sentry.relay.projectconfig_debounce_cache.is_debounced", cache.is_debounced
     )
+    monkeypatch.setattr(
+        "sentry.relay.projectconfig_debounce_cache.debounce_many", cache.debounce_many
+    )
+    monkeypatch.setattr(
+        "sentry.relay.projectconfig_debounce_cache.is_debounced_many", cache.is_debounced_many
+    )
 
     return cache
 
@@ -144,6 +153,31 @@ def test_debounce(
     assert tasks[0]["public_key"] == default_projectkey.public_key
 
 
+@pytest.mark.django_db
+def test_debounce_many(
+    monkeypatch,
+    default_projectkey,
+    debounce_cache,
+    django_cache,
+):
+    tasks = []
+
+    def apply_async(args, kwargs):
+        assert not args
+        tasks.append(kwargs)
+
+    monkeypatch.setattr("sentry.tasks.relay.build_project_config.apply_async", apply_async)
+
+    schedule_build_project_config(public_key=default_projectkey.public_key)
+    schedule_build_project_configs(public_keys=[default_projectkey.public_key, "other"])
+    schedule_build_project_configs(public_keys=[default_projectkey.public_key, "other"])
+
+    assert sorted(task["public_key"] for task in tasks) == [
+        default_projectkey.public_key,
+        "other",
+    ]
+
+
 @pytest.mark.django_db
 def test_generate(
     monkeypatch,
@@ -170,6 +204,28 @@ def test_generate(
     ]
 
 
+@pytest.mark.django_db
+def test_compute_organization_configs(
+    default_project,
+    default_organization,
+    default_projectkey,
+    factories,
+    redis_cache,
+    django_cache,
+):
+    other_project = factories.create_project(organization=default_organization)
+    other_key = factories.create_project_key(project=other_project)
+    redis_cache.set_many({default_projectkey.public_key: "dummy"})
+
+    configs = compute_organization_configs(default_organization)
+
+    # Only keys whose config was cached are recomputed
+    assert list(configs) == [default_projectkey.public_key]
+    assert other_key.public_key not in configs
+    assert configs[default_projectkey.public_key]["projectId"] == default_project.id
+    assert configs[default_projectkey.public_key]["organizationId"] == default_organization.id
+
+
 @pytest.mark.django_db
 def test_project_update_option(
     default_projectkey, default_project, emulate_transactions, redis_cache, django_cache
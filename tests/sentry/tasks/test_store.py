@@ -5,12 +5,15 @@ import pytest
 from django.test.utils import override_settings
 
 from sentry import quotas
-from sentry.event_manager import EventManager, HashDiscarded
+from sentry.event_manager import EventManager, HashDiscarded, _tsdb_record_all_metrics
+from sentry.eventstore import processing
+from sentry.models import Group
 from sentry.plugins.base.v2 import Plugin2
 from sentry.tasks.store import (
     preprocess_event,
     process_event,
     save_event,
+    save_event_batch,
     time_synthetic_monitoring_event,
 )
 
@@ -232,6 +235,84 @@ def test_hash_discarded_raised(default_project, mock_refund, register_plugin):
         # should be caught
 
 
+@pytest.mark.django_db
+def test_save_event_batch(default_project):
+    events = []
+    for message in ("foo", "foo", "bar"):
+        manager = EventManager({"message": message}, project=default_project)
+        manager.normalize()
+        data = dict(manager.get_data())
+        events.append(
+            {
+                "cache_key": f"e:{data['event_id']}:{default_project.id}",
+                "data": data,
+                "start_time": time(),
+                "event_id": data["event_id"],
+                "project_id": default_project.id,
+            }
+        )
+
+    save_event_batch(events, {default_project.id: default_project})
+
+    groups = Group.objects.filter(project=default_project)
+    assert sorted(group.times_seen for group in groups) == [1, 2]
+
+
+def _store_batch(project, messages):
+    events = []
+    for message in messages:
+        manager = EventManager({"message": message}, project=project)
+        manager.normalize()
+        data = dict(manager.get_data())
+        data["project"] = project.id
+        events.append(
+            {
+                "cache_key": processing.event_processing_store.store(data),
+                "data": data,
+                "start_time": time(),
+                "event_id": data["event_id"],
+                "project_id": project.id,
+            }
+        )
+    return events
+
+
+@pytest.mark.django_db
+def test_save_event_batch_falls_back_to_save_event(default_project):
+    events = _store_batch(default_project, ("foo", "bar"))
+
+    with mock.patch(
+        "sentry.event_manager.save_error_events", side_effect=ValueError("bad event")
+    ), mock.patch("sentry.tasks.store.save_event.delay") as mock_save_event:
+        save_event_batch(events, {default_project.id: default_project})
+
+    assert mock_save_event.call_count == 2
+    for event, call in zip(events, mock_save_event.call_args_list):
+        assert call[1]["cache_key"] == event["cache_key"]
+        assert call[1]["event_id"] == event["event_id"]
+        assert call[1]["project_id"] == default_project.id
+
+
+@pytest.mark.django_db
+def test_save_event_batch_does_not_save_counted_events_again(default_project):
+    events = _store_batch(default_project, ("foo", "bar"))
+
+    # Fails after TSDB and the groups have counted both events.
+    with mock.patch(
+        "sentry.event_manager._tsdb_record_all_metrics", wraps=_tsdb_record_all_metrics
+    ) as tsdb_record, mock.patch(
+        "sentry.event_manager._materialize_event_metrics", side_effect=ValueError("bad event")
+    ), mock.patch(
+        "sentry.tasks.store.save_event.delay"
+    ) as mock_save_event:
+        save_event_batch(events, {default_project.id: default_project})
+
+    assert tsdb_record.call_count == 1
+    assert mock_save_event.call_count == 0
+    groups = Group.objects.filter(project=default_project)
+    assert sorted(group.times_seen for group in groups) == [1, 1]
+
+
 @pytest.fixture(params=["org", "project"])
 def options_model(request, default_organization, default_project):
     if request.param == "org":
@@ -0,0 +1,63 @@
+from unittest.mock import patch
+
+import pytest
+
+from sentry.models import Project
+from sentry.testutils import TestCase
+from sentry.utils import redis
+from sentry.utils.performance import StepProfiler, count_calls, record_calls
+
+
+class CountCallsTest(TestCase):
+    def test_counts_calls(self):
+        client = redis.clusters.get("default").get_local_client(0)
+        client.ping()  # connect outside of the block
+
+        with count_calls() as outer:
+            list(Project.objects.all())
+            with count_calls() as inner:
+                client.get("foo")
+                with client.pipeline() as pipeline:
+                    pipeline.get("foo")
+                    pipeline.get("bar")
+                    pipeline.execute()
+                record_calls("snuba", 2)
+
+        assert inner == {"redis": 2, "snuba": 2}
+        assert outer == {"db": 1, "redis": 2, "snuba": 2}
+
+        # Calls outside of a block are not counted anywhere.
+        record_calls("snuba")
+        assert outer["snuba"] == 2
+
+
+class StepProfilerTest(TestCase):
+    @patch("sentry.utils.performance.steps.metrics")
+    def test_steps(self, metrics):
+        profiler = StepProfiler("pipeline.step", tags={"issue_category": "error"})
+
+        with profiler.step("first"):
+            record_calls("snuba")
+
+        with pytest.raises(ValueError):
+            with profiler.step("second"):
+                raise ValueError
+
+        first, second = profiler.as_trace()
+        assert first["step"] == "first"
+        assert first["calls"] == {"snuba": 1}
+        assert not first["failed"]
+        assert second["step"] == "second"
+        assert second["calls"] == {}
+        assert second["failed"]
+
+        metrics.timing.assert_any_call(
+            "pipeline.step.calls",
+            1,
+            tags={"issue_category": "error", "step": "first", "service": "snuba"},
+        )
+        metrics.timing.assert_any_call(
+            "pipeline.step.wall_time",
+            profiler.profiles[1].wall_time,
+            tags={"issue_category": "error", "step": "second", "result": "failure"},
+        )
@@ -1,13 +1,15 @@
 import hashlib
 from io import BytesIO
 from typing import List
+from unittest import mock
 from zipfile import ZipFile
 
 import pytest
 
 from sentry.eventstore.models import Event
-from sentry.models import create_files_from_dif_zip
+from sentry.models import ProjectDebugFile, create_files_from_dif_zip
 from sentry.testutils import TestCase
+from sentry.testutils.helpers import override_options
 from sentry.testutils.performance_issues.event_generators import get_event
 from sentry.testutils.silo import region_silo_test
 from sentry.types.issues import GroupType
@@ -17,6 +19,7 @@ from sentry.utils.performance_issues.performance_detection import (
     get_detection_settings,
     run_detector_on_data,
 )
+from sentry.utils.performance_issues.proguard import proguard_mappers
 
 PROGUARD_SOURCE = b"""\
 # compiler: R8
@@ -93,6 +96,25 @@ class NPlusOneAPICallsDetectorTest(TestCase):
         )
         assert problem.title == "File IO on Main Thread"
 
+    def test_file_io_with_proguard_cached_mapper(self):
+        event = get_event("file-io-on-main-thread-with-obfuscation")
+        event["project"] = self.project.id
+
+        uuid = event["debug_meta"]["images"][0]["uuid"]
+        self.create_proguard(uuid)
+        problem = self.find_problems(event)[0]
+
+        with mock.patch.object(ProjectDebugFile.difcache, "fetch_difs") as fetch_difs:
+            assert self.find_problems(event) == [problem]
+        assert fetch_difs.call_count == 0
+
+        proguard_mappers.clear()
+        other_project = self.create_project()
+        with override_options({"performance.issues.proguard-mapper-cache-bytes": 1}):
+            proguard_mappers.get(self.project, uuid)
+            proguard_mappers.get(other_project, uuid)
+            assert len(proguard_mappers) == 1
+
     def test_parallel_spans_detected(self):
         event = get_event("file-io-on-main-thread-with-parallel-spans")
         problem = self.find_problems(event)[0]
@@ -7,7 +7,7 @@ from sentry import projectoptions
 from sentry.eventstore.models import Event
 from sentry.testutils import TestCase
 from sentry.testutils.helpers import override_options
-from sentry.testutils.performance_issues.event_generators import get_event
+from sentry.testutils.performance_issues.event_generators import EVENTS, get_event
 from sentry.testutils.silo import region_silo_test
 from sentry.types.issues import GroupType
 from sentry.utils.performance_issues.base import DETECTOR_TYPE_TO_GROUP_TYPE, DetectorType
@@ -15,8 +15,12 @@ from sentry.utils.performance_issues.performance_detection import (
     EventPerformanceProblem,
     NPlusOneDBSpanDetector,
     PerformanceProblem,
+    ProjectDetectionSettings,
     _detect_performance_problems,
     detect_performance_problems,
+    get_project_detection_settings,
+    run_detector_on_data,
+    run_detectors_on_data,
     total_span_time,
 )
 
@@ -103,6 +107,38 @@ class PerformanceDetectionTest(TestCase):
         perf_problems = _detect_performance_problems(n_plus_one_event, sdk_span_mock, self.project)
         assert perf_problems == []
 
+    @override_options(BASE_DETECTOR_OPTIONS)
+    def test_detection_settings_are_reused(self):
+        n_plus_one_event = get_event("n-plus-one-in-django-index-view")
+        sdk_span_mock = Mock()
+        self.project_option_mock.return_value = {}
+
+        project_settings = get_project_detection_settings(self.project.id)
+        assert get_project_detection_settings(self.project.id) is project_settings
+
+        detectors = project_settings.get_detectors(n_plus_one_event)
+        perf_problems = _detect_performance_problems(n_plus_one_event, sdk_span_mock, self.project)
+        assert_n_plus_one_db_problem(perf_problems)
+        for detector in detectors:
+            # The event is released once detection is done.
+            assert detector.event() == {}
+            assert detector.stored_problems == {}
+        assert project_settings.get_detectors(n_plus_one_event) == detectors
+
+        # Detector state is reset between events.
+        perf_problems = _detect_performance_problems(
+            get_event("no-issue-in-django-detail-view"), sdk_span_mock, self.project
+        )
+        assert perf_problems == []
+
+        self.project_option_mock.return_value = {"n_plus_one_db_count": 20}
+        assert get_project_detection_settings(self.project.id) is not project_settings
+
+        with override_options({"performance.issues.settings-cache-ttl": 60}):
+            project_settings = get_project_detection_settings(self.project.id)
+            self.project_option_mock.return_value = {}
+            assert get_project_detection_settings(self.project.id) is project_settings
+
     @override_options(BASE_DETECTOR_OPTIONS)
     def test_n_plus_one_extended_detection_no_parent_span(self):
         n_plus_one_event = get_event("n-plus-one-db-root-parent-span")
@@ -330,6 +366,21 @@ class DetectorTypeToGroupTypeTest(unittest.TestCase):
             ), f"{detector_type} must have a corresponding entry in DETECTOR_TYPE_TO_GROUP_TYPE"
 
 
+@pytest.mark.django_db
+def test_single_pass_matches_separate_runs():
+    raw_settings = get_project_detection_settings(1).raw_settings
+    for event_name in EVENTS:
+        event = get_event(event_name)
+        detectors = ProjectDetectionSettings(raw_settings).get_detectors(event)
+        run_detectors_on_data(detectors, event)
+
+        for detector in ProjectDetectionSettings(raw_settings).get_detectors(event):
+            run_detector_on_data(detector, event)
+            assert detector.stored_problems == next(
+                d.stored_problems for d in detectors if type(d) is type(detector)
+            ), event_name
+
+
 @region_silo_test
 class EventPerformanceProblemTest(TestCase):
     def test_save_and_fetch(self):
@@ -0,0 +1,36 @@
+from freezegun import freeze_time
+
+from sentry.utils.cache import LRUCache
+
+
+def test_lru_cache():
+    cache = LRUCache(max_size=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+
+    # "b" is the least recently used item now
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert len(cache) == 2
+
+    cache.delete("a")
+    assert "a" not in cache
+    cache.clear()
+    assert len(cache) == 0
+
+
+def test_lru_cache_ttl():
+    cache = LRUCache(max_size=10, ttl=60)
+    with freeze_time("2022-01-01 00:00:00") as frozen_time:
+        cache.set("a", 1)
+        cache.set("b", 2, ttl=120)
+        cache.set("c", 3, ttl=10)
+        frozen_time.tick(30)
+        assert cache.get("a") == 1
+        assert cache.get("c") is None
+        frozen_time.tick(60)
+        assert "a" not in cache
+        assert cache.get("b") == 2
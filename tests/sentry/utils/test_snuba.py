@@ -1,23 +1,43 @@
+import threading
 import unittest
 from datetime import datetime, timedelta
+from io import BytesIO
 from unittest import mock
 
 import pytest
 import pytz
+import urllib3
+from django.core.cache import cache
+from django.test import override_settings
 from django.utils import timezone
+from freezegun import freeze_time
+from snuba_sdk import Column, Condition, Entity, Op, Query, Request
 
+from sentry.exceptions import InvalidConfiguration
 from sentry.models import GroupRelease, Project, Release
 from sentry.testutils import TestCase
+from sentry.utils import json
 from sentry.utils.snuba import (
     Dataset,
+    QueryExecutor,
+    QueryQueueFull,
+    SchemaValidationError,
+    SnubaError,
     SnubaQueryParams,
     UnqualifiedQueryError,
+    _apply_cache_and_build_results,
+    _in_flight_queries,
+    _JSONStreamReader,
     _prepare_query_params,
+    bulk_snql_query,
+    get_cache_key,
     get_json_type,
     get_query_params_to_update_for_projects,
     get_snuba_column_name,
     get_snuba_translators,
+    iter_raw_snql_query,
     quantize_time,
+    raw_snql_query,
 )
 
 
@@ -296,6 +316,266 @@ class PrepareQueryParamsTest(TestCase):
         assert kwargs == snuba_params.kwargs
 
 
+@override_settings(
+    SENTRY_SNUBA_CACHE_REVALIDATE={"api.dashboards.tablewidget": {"soft_ttl": 60, "ttl": 600}}
+)
+@mock.patch("sentry.utils.snuba._bulk_snuba_query")
+class RevalidatingCacheTest(TestCase):
+    referrer = "api.dashboards.tablewidget"
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+
+    def query(self):
+        params = ({"dataset": "events", "query": 1}, lambda x: x, lambda x: x)
+        return _apply_cache_and_build_results([params], referrer=self.referrer)[0]
+
+    def test_serves_cached_result_until_soft_ttl(self, bulk_snuba_query):
+        bulk_snuba_query.return_value = [{"data": [1]}]
+        with freeze_time() as frozen_time:
+            assert self.query() == {"data": [1]}
+            frozen_time.tick(timedelta(seconds=30))
+            assert self.query() == {"data": [1]}
+            assert bulk_snuba_query.call_count == 1
+
+            frozen_time.tick(timedelta(seconds=31))
+            bulk_snuba_query.return_value = [{"data": [2]}]
+            assert self.query() == {"data": [2]}
+            assert bulk_snuba_query.call_count == 2
+
+    def test_serves_stale_result_while_refreshing(self, bulk_snuba_query):
+        bulk_snuba_query.return_value = [{"data": [1]}]
+        with freeze_time() as frozen_time:
+            self.query()
+            frozen_time.tick(timedelta(seconds=61))
+
+            # Another caller holds the lock and is refreshing the result.
+            cache_key = get_cache_key({"dataset": "events", "query": 1})
+            cache.add(f"{cache_key}:swr:lock", 1)
+            assert self.query() == {"data": [1]}
+            assert bulk_snuba_query.call_count == 1
+
+    def test_serves_stale_result_on_error(self, bulk_snuba_query):
+        bulk_snuba_query.return_value = [{"data": [1]}]
+        with freeze_time() as frozen_time:
+            self.query()
+            frozen_time.tick(timedelta(seconds=61))
+
+            bulk_snuba_query.side_effect = SnubaError()
+            assert self.query() == {"data": [1]}
+
+            frozen_time.tick(timedelta(seconds=600))
+            with pytest.raises(SnubaError):
+                self.query()
+
+
+@mock.patch("sentry.utils.snuba._raw_snql_query")
+class SingleFlightTest(TestCase):
+    def request(self, project_id):
+        return Request(
+            dataset="events",
+            app_id="tests",
+            query=Query(
+                Entity("events"),
+                select=[Column("event_id")],
+                where=[Condition(Column("project_id"), Op.EQ, project_id)],
+            ),
+        )
+
+    def test_duplicate_queries_in_bulk(self, _raw_snql_query):
+        _raw_snql_query.return_value = mock.Mock(status=200, data=b'{"data": [{"event_id": "a"}]}')
+
+        results = bulk_snql_query([self.request(1), self.request(1), self.request(2)])
+        assert _raw_snql_query.call_count == 2
+        assert results == [{"data": [{"event_id": "a"}]}] * 3
+        assert results[0]["data"] is not results[1]["data"]
+
+    @mock.patch("sentry.utils.snuba.metrics.incr")
+    def test_concurrent_queries(self, incr, _raw_snql_query):
+        started = threading.Event()
+        release = threading.Event()
+
+        def query(*args):
+            started.set()
+            assert release.wait(10)
+            return mock.Mock(status=200, data=b'{"data": []}')
+
+        _raw_snql_query.side_effect = query
+        results = []
+        first = threading.Thread(target=lambda: results.append(raw_snql_query(self.request(1))))
+        first.start()
+        assert started.wait(10)
+
+        coalesced = mock.call(
+            "snuba.query.single_flight",
+            amount=1,
+            tags={"referrer": "<unknown>", "coalesced": "true"},
+        )
+        second = threading.Thread(target=lambda: results.append(raw_snql_query(self.request(1))))
+        second.start()
+        for _ in range(100):
+            if coalesced in incr.call_args_list:
+                break
+            second.join(0.1)
+        release.set()
+        first.join(10)
+        second.join(10)
+
+        assert _raw_snql_query.call_count == 1
+        assert results == [{"data": []}, {"data": []}]
+
+    def test_concurrent_queries_of_different_referrers(self, _raw_snql_query):
+        release = threading.Event()
+
+        def query(*args):
+            assert release.wait(10)
+            return mock.Mock(status=200, data=b'{"data": []}')
+
+        _raw_snql_query.side_effect = query
+        threads = [
+            threading.Thread(target=raw_snql_query, args=(self.request(1), referrer))
+            for referrer in ("search", "api.auth-token.events")
+        ]
+        for thread in threads:
+            thread.start()
+        for _ in range(100):
+            if _raw_snql_query.call_count == 2:
+                break
+            threads[1].join(0.1)
+        release.set()
+        for thread in threads:
+            thread.join(10)
+
+        assert _raw_snql_query.call_count == 2
+        referrers = {call[0][2]["referer"] for call in _raw_snql_query.call_args_list}
+        assert referrers == {"search", "api.auth-token.events"}
+
+    def test_failed_submit(self, _raw_snql_query):
+        _raw_snql_query.return_value = mock.Mock(status=200, data=b'{"data": []}')
+
+        with mock.patch(
+            "sentry.utils.snuba._query_executor.submit",
+            side_effect=RuntimeError("can't start new thread"),
+        ):
+            with pytest.raises(RuntimeError):
+                bulk_snql_query([self.request(1), self.request(2)])
+        assert not _in_flight_queries
+
+        assert bulk_snql_query([self.request(1), self.request(2)]) == [{"data": []}] * 2
+
+    def test_in_flight_query_timeout(self, _raw_snql_query):
+        release = threading.Event()
+
+        def query(*args):
+            assert release.wait(10)
+            return mock.Mock(status=200, data=b'{"data": []}')
+
+        _raw_snql_query.side_effect = query
+        with override_settings(SENTRY_SNUBA_TIMEOUT=0, SENTRY_SNUBA_EXECUTOR_QUEUE_TIMEOUT=0.1):
+            with pytest.raises(SnubaError):
+                bulk_snql_query([self.request(1), self.request(2)])
+        release.set()
+
+
+@mock.patch("sentry.utils.snuba.STREAMING_CHUNK_SIZE", 5)
+@mock.patch("sentry.utils.snuba._raw_snql_query")
+class IterRawSnqlQueryTest(TestCase):
+    def request(self):
+        return Request(
+            dataset="events",
+            app_id="tests",
+            query=Query(Entity("events"), select=[Column("event_id")]),
+        )
+
+    def response(self, status, body):
+        return urllib3.HTTPResponse(
+            body=BytesIO(json.dumps(body).encode()), status=status, preload_content=False
+        )
+
+    def test_yields_rows(self, raw_snql_query):
+        rows = [{"event_id": f"{i:032x}", "title": "\u2603" * i} for i in range(20)]
+        raw_snql_query.return_value = self.response(
+            200, {"meta": [{"name": "event_id"}], "data": rows, "timing": {"duration_ms": 1}}
+        )
+        assert list(iter_raw_snql_query(self.request())) == rows
+
+        raw_snql_query.return_value = self.response(200, {"data": []})
+        assert list(iter_raw_snql_query(self.request())) == []
+
+    def test_raises_errors(self, raw_snql_query):
+        raw_snql_query.return_value = self.response(
+            400, {"error": {"type": "schema", "message": "invalid query"}}
+        )
+        with pytest.raises(SchemaValidationError):
+            iter_raw_snql_query(self.request())
+
+        raw_snql_query.return_value = urllib3.HTTPResponse(
+            body=BytesIO(b'{"data": [{"event_id": 1}, {"ev'), status=200, preload_content=False
+        )
+        rows = iter_raw_snql_query(self.request())
+        assert next(rows) == {"event_id": 1}
+        with pytest.raises(SnubaError):
+            next(rows)
+
+    def test_numbers_split_between_chunks(self, raw_snql_query):
+        chunks = [b'{"meta": 0.', b'25, "data": [1e', b"3, 12", b'34], "x": -', b"1}"]
+        reader = _JSONStreamReader(iter(chunks))
+        reader.expect("{")
+        values = {}
+        while reader.peek() != "}":
+            key = reader.decode_value()
+            reader.expect(":")
+            values[key] = reader.decode_value()
+            if reader.peek() == ",":
+                reader.expect(",")
+        assert values == {"meta": 0.25, "data": [1000.0, 1234], "x": -1}
+
+    def test_close_unread_rows(self, raw_snql_query):
+        response = raw_snql_query.return_value = mock.Mock(status=200, connection=mock.Mock())
+        with iter_raw_snql_query(self.request()):
+            pass
+        response.close.assert_called_once_with()
+        response.release_conn.assert_not_called()
+
+
+class QueryExecutorTest(unittest.TestCase):
+    def test_referrer_groups(self):
+        executor = QueryExecutor(
+            {
+                "default": {"workers": 1},
+                "dashboards": {"workers": 1, "referrers": ["api.dashboards."]},
+            },
+            queue_timeout=1,
+        )
+        assert executor.get_group("api.dashboards.tablewidget") == "dashboards"
+        assert executor.get_group("api.issues.issue_events") == "default"
+        assert executor.submit("api.dashboards.tablewidget", lambda: 1).result(10) == 1
+
+    def test_requires_default_group(self):
+        with pytest.raises(InvalidConfiguration):
+            QueryExecutor({"dashboards": {"workers": 1, "referrers": ["api.dashboards."]}}, 1)
+
+    def test_rejects_when_queue_is_full(self):
+        executor = QueryExecutor({"default": {"workers": 1, "queue_size": 1}}, queue_timeout=0.01)
+        started = threading.Event()
+        release = threading.Event()
+
+        def block():
+            started.set()
+            return release.wait(10)
+
+        running = executor.submit("referrer", block)
+        assert started.wait(10)
+        queued = executor.submit("referrer", lambda: 2)
+        with pytest.raises(QueryQueueFull):
+            executor.submit("referrer", lambda: 3)
+
+        release.set()
+        assert running.result(10) is True
+        assert queued.result(10) == 2
+
+
 class QuantizeTimeTest(unittest.TestCase):
     def setUp(self):
         self.now = timezone.now().replace(microsecond=0)